@@ -31,7 +31,26 @@ SESSION_COOKIE_NAME = os.environ.get('SESSION_COOKIE_NAME') or 'sess_python_flas
 JWT_TOKEN_NAME = os.environ.get('JWT_TOKEN_NAME') or 'jwt_python_flask'
 app.config['SECRET_KEY'] = SECRET_KEY
 app.config['SESSION_COOKIE_NAME'] = SESSION_COOKIE_NAME 
-app.config['JWT_TOKEN_NAME'] = JWT_TOKEN_NAME 
+app.config['JWT_TOKEN_NAME'] = JWT_TOKEN_NAME
+app.config['JWT_IDENTITY_CACHE_TTL'] = int(os.environ.get('JWT_IDENTITY_CACHE_TTL') or 60)  # seconds a verified token skips the users lookup, also how long a role change or delete in another worker takes to apply
+app.config['JWT_IDENTITY_CACHE_SIZE'] = int(os.environ.get('JWT_IDENTITY_CACHE_SIZE') or 1024)  # max cached tokens per worker
+
+# Password hashing settings, stored hashes with a different cost are upgraded on login
+app.config['PASSWORD_HASH_ITERATIONS'] = int(os.environ.get('PASSWORD_HASH_ITERATIONS') or 1000000)  # pbkdf2:sha256 cost
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)  # processes per web worker, 0 hashes inline
+app.config['PASSWORD_HASH_QUEUE_LIMIT'] = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT') or 32)  # jobs waiting or running
+app.config['PASSWORD_HASH_QUEUE_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT') or 5)  # seconds to wait for a slot
+
+# Navigation tree cache, commits in this worker invalidate it at once, the TTL bounds staleness from other workers
+app.config['NAV_TREE_CACHE_TTL'] = int(os.environ.get('NAV_TREE_CACHE_TTL') or 30)  # seconds
+
+# Leaderboard, the top entries are kept sorted in memory, new entries are merged in on every read
+app.config['LEADERBOARD_CACHE_SIZE'] = int(os.environ.get('LEADERBOARD_CACHE_SIZE') or 1000)  # entries held per worker
+app.config['LEADERBOARD_CACHE_TTL'] = int(os.environ.get('LEADERBOARD_CACHE_TTL') or 60)  # seconds before a full reload picks up other workers' edits
+app.config['LEADERBOARD_ID_WINDOW'] = int(os.environ.get('LEADERBOARD_ID_WINDOW') or 100)  # ids below the newest seen that are re-read for entries committed out of order
+
+# Grade projections, recomputed by the custom project_grades command
+app.config['GRADE_TERM_END'] = os.environ.get('GRADE_TERM_END') or None  # YYYY-MM-DD, defaults to the end of the current half year
 
 # Database settings 
 dbName = 'user_management'
@@ -60,6 +79,7 @@ app.config['SQLALCHEMY_DATABASE_STRING'] = dbString
 app.config['SQLALCHEMY_DATABASE_URI'] = dbURI
 app.config['SQLALCHEMY_BACKUP_URI'] = backupURI
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['UNIT_OF_WORK'] = (os.environ.get('UNIT_OF_WORK') or 'false').lower() in ('1', 'true')  # one commit per request instead of per model call
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 
@@ -67,6 +87,18 @@ migrate = Migrate(app, db)
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # maximum size of uploaded content
 app.config['UPLOAD_EXTENSIONS'] = ['.jpg', '.png', '.gif']  # supported file types
 app.config['UPLOAD_FOLDER'] = os.path.join(app.instance_path, 'uploads')
+app.config['IMAGE_CACHE_MAX_AGE'] = int(os.environ.get('IMAGE_CACHE_MAX_AGE') or 365 * 24 * 3600)  # seconds for versioned (?v=) image URLs
+app.config['IMAGE_MAX_PIXELS'] = int(os.environ.get('IMAGE_MAX_PIXELS') or 40000000)  # larger uploads are rejected before decoding
+app.config['IMAGE_VARIANT_SIZES'] = os.environ.get('IMAGE_VARIANT_SIZES') or '64,256,1024'  # longest side in pixels of each resized copy
+app.config['IMAGE_VARIANT_QUALITY'] = int(os.environ.get('IMAGE_VARIANT_QUALITY') or 80)  # WebP and JPEG quality
+app.config['IMAGE_PROCESS_WORKERS'] = int(os.environ.get('IMAGE_PROCESS_WORKERS') or 1)  # processes per web worker, 0 processes inline
+app.config['STORAGE_BACKEND'] = os.environ.get('STORAGE_BACKEND') or 'local'  # where uploads are kept, local (UPLOAD_FOLDER) or s3
+app.config['STORAGE_S3_BUCKET'] = os.environ.get('STORAGE_S3_BUCKET') or None
+app.config['STORAGE_S3_PREFIX'] = os.environ.get('STORAGE_S3_PREFIX') or 'uploads/'  # prepended to every object key
+app.config['STORAGE_S3_REGION'] = os.environ.get('STORAGE_S3_REGION') or None
+app.config['STORAGE_S3_ENDPOINT_URL'] = os.environ.get('STORAGE_S3_ENDPOINT_URL') or None  # S3-compatible servers, e.g. MinIO
+app.config['STORAGE_URL_EXPIRES'] = int(os.environ.get('STORAGE_URL_EXPIRES') or 3600)  # seconds a presigned image URL stays valid
+app.config['DECK_IMPORT_MAX_LENGTH'] = int(os.environ.get('DECK_IMPORT_MAX_LENGTH') or 100 * 1024 * 1024)  # deck imports are streamed, not held in memory
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # GITHUB settings
@@ -75,6 +107,11 @@ app.config['GITHUB_TOKEN'] = os.environ.get('GITHUB_TOKEN') or None
 app.config['GITHUB_TARGET_TYPE'] = os.environ.get('GITHUB_TARGET_TYPE') or 'user'
 app.config['GITHUB_TARGET_NAME'] = os.environ.get('GITHUB_TARGET_NAME') or 'nighthawkcoders'
 
+# Outbound HTTP settings for external content providers
+app.config['OUTBOUND_HTTP_STUB'] = (os.environ.get('OUTBOUND_HTTP_STUB') or 'false').lower() in ('1', 'true')  # canned responses, no network
+app.config['OUTBOUND_HTTP_CACHE_SIZE'] = int(os.environ.get('OUTBOUND_HTTP_CACHE_SIZE') or 256)  # cached responses per worker
+app.config['API_NINJAS_KEY'] = os.environ.get('API_NINJAS_KEY') or None  # trivia provider key, trivia reports not configured without it
+
 # KASM settings
 app.config['KASM_SERVER'] = os.environ.get('KASM_SERVER') or 'https://kasm.nighthawkcodingsociety.com'
 app.config['KASM_API_KEY'] = os.environ.get('KASM_API_KEY') or None
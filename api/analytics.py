@@ -0,0 +1,32 @@
+from flask import Blueprint, request, jsonify, g
+from flask_restful import Api, Resource
+from api.jwt_authorize import token_required
+from model.analytics import AnalyticsRollup
+
+# Blueprint and API
+analytics_api = Blueprint('analytics_api', __name__, url_prefix='/api/analytics')
+api = Api(analytics_api)
+
+MAX_WEEKS = 104
+MAX_MONTHS = 36
+
+
+class AnalyticsAPI:
+    class _Me(Resource):
+        @token_required()
+        def get(self):
+            """
+            Get the current user's weekly and monthly study hours per subject, grade averages and
+            grade trends, from the pre-aggregated rollups.
+
+            Query parameters: weeks (default 26) and months (default 12) of history to chart.
+            """
+            weeks = request.args.get('weeks', default=26, type=int)
+            months = request.args.get('months', default=12, type=int)
+            if not 1 <= weeks <= MAX_WEEKS:
+                return {"message": f"weeks must be between 1 and {MAX_WEEKS}"}, 400
+            if not 1 <= months <= MAX_MONTHS:
+                return {"message": f"months must be between 1 and {MAX_MONTHS}"}, 400
+            return jsonify(AnalyticsRollup.summary(g.current_user.id, weeks=weeks, months=months))
+
+    api.add_resource(_Me, '/me')
@@ -1,6 +1,7 @@
 from sqlalchemy.exc import IntegrityError
 from __init__ import app, db
 from model.user import User
+from model.unit_of_work import commit, rollback
 
 class CalendarEvent(db.Model):
     """
@@ -33,10 +34,10 @@ class CalendarEvent(db.Model):
     def create(self):
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
             print(f"Event Created: {self._title}, {self._start_time}")
         except IntegrityError:
-            db.session.rollback()
+            rollback()
             return None
         return self
 
@@ -60,12 +61,12 @@ class CalendarEvent(db.Model):
                 self._end_time = value
             if key == "description":
                 self._description = value
-        db.session.commit()
+        commit()
         return self
 
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
 
 
 def initCalendarEvents():
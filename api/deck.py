@@ -1,7 +1,12 @@
-from flask import Blueprint, request, jsonify
+import codecs
+import csv
+import io
+import json
+from flask import Blueprint, request, jsonify, g, Response, stream_with_context
 from model.deck import Deck
 from model.flashcard import Flashcard
-from __init__ import db
+from __init__ import app
+from model.unit_of_work import commit
 from api.jwt_authorize import token_required
 
 
@@ -17,20 +22,17 @@ def create_deck():
 
     if not title or not user_id:
         return jsonify({"error": "Deck title and user ID are required."}), 400
-
-    # Create the deck
-    deck = Deck(title=title, user_id=user_id)
-    deck.create()
-
-    # Add flashcards to the deck
-    for card in cards:
-        flashcard = Flashcard(
-            title=card['question'],
-            content=card['answer'],
-            user_id=user_id,
-            deck_id=deck.id
-        )
-        flashcard.create()
+    if not isinstance(cards, list):
+        return jsonify({"error": "Cards must be a list."}), 400
+
+    # Create the deck and its flashcards in one transaction, nothing is written if any card is invalid
+    cards = [
+        {'title': card.get('question'), 'content': card.get('answer')} if isinstance(card, dict) else card
+        for card in cards
+    ]
+    deck, errors = Deck.create_with_cards(title, user_id, cards)
+    if deck is None:
+        return jsonify({"error": "Invalid flashcards, no deck was created.", "errors": errors}), 400
 
     return jsonify(deck.read()), 201
 
@@ -82,5 +84,137 @@ def update_deck(deck_id):
         return jsonify({'error': 'Deck not found'}), 404
 
     deck.title = data['title']  # Update the deck title
-    db.session.commit()  # Save changes to the database
+    commit()  # Save changes to the database
     return jsonify(deck.read()), 200
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+def _export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['title', 'content'])
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _export_ndjson(rows):
+    lines = []
+    for title, content in rows:
+        lines.append(json.dumps({'title': title, 'content': content}))
+        if len(lines) >= 1000:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _read_csv(lines):
+    """
+    Yields card dictionaries from CSV lines with a title,content header.
+    """
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield {'title': row.get('title'), 'content': row.get('content')}
+
+
+def _read_ndjson(lines):
+    """
+    Yields card dictionaries from NDJSON lines, unreadable lines are yielded as errors.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON line: {e}")
+
+
+@deck_api.route('/<int:deck_id>/export', methods=['GET'])
+@token_required()
+def export_deck(deck_id):
+    """
+    Stream a deck's cards as CSV or NDJSON (?format=csv|ndjson) without building the deck in memory.
+    """
+    format = request.args.get('format', 'csv')
+    if format not in EXPORT_FORMATS:
+        return jsonify({'error': 'Format must be csv or ndjson'}), 400
+    deck = Deck.query.get(deck_id)
+    if not deck:
+        return jsonify({'error': 'Deck not found'}), 404
+    if deck.user_id != g.current_user.id and g.current_user.role != 'Admin':
+        return jsonify({'error': 'Deck not found or unauthorized'}), 404
+
+    rows = Flashcard.stream_deck(deck_id)
+    body = _export_csv(rows) if format == 'csv' else _export_ndjson(rows)
+    resp = Response(stream_with_context(body), mimetype=EXPORT_FORMATS[format])
+    resp.headers['Content-Disposition'] = f'attachment; filename="deck-{deck_id}.{format}"'
+    return resp
+
+
+@deck_api.route('/import', methods=['POST'])
+@token_required()
+def import_deck():
+    """
+    Create a deck for the current user from a CSV or NDJSON upload, parsed as it streams in.
+
+    The file is either the raw request body or a multipart "file" field. Query parameters:
+    - format: csv or ndjson, defaults from the upload's content type
+    - title: title of the new deck
+    """
+    request.max_content_length = app.config['DECK_IMPORT_MAX_LENGTH']
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({'error': 'Missing file field'}), 400
+        stream, mimetype = upload.stream, upload.mimetype
+    else:
+        stream, mimetype = request.stream, request.mimetype
+    format = request.args.get('format') or ('ndjson' if 'json' in (mimetype or '') else 'csv')
+    if format not in EXPORT_FORMATS:
+        return jsonify({'error': 'Format must be csv or ndjson'}), 400
+
+    title = request.args.get('title') or 'Imported Deck'
+    created = []
+
+    def create_deck():
+        # Called on the first valid batch, an upload without cards leaves no deck behind
+        deck = Deck(title=title, user_id=g.current_user.id).create()
+        if deck is None:
+            raise RuntimeError('Failed to create deck')
+        created.append(deck)
+        return deck.id
+
+    lines = codecs.getreader('utf-8')(stream, errors='replace')
+    cards = _read_csv(lines) if format == 'csv' else _read_ndjson(lines)
+    try:
+        imported, error_count, errors = Flashcard.import_stream(cards, g.current_user.id, create_deck)
+    except Exception as e:
+        # Malformed CSV, a body over the size limit or a failed insert, drop the partial deck
+        for deck in created:
+            deck.purge()
+        if isinstance(e, csv.Error):
+            return jsonify({'error': f'Invalid CSV: {e}'}), 400
+        if isinstance(e, RuntimeError) and not created:
+            return jsonify({'error': str(e)}), 400
+        raise e
+    if not created:
+        return jsonify({'error': 'No valid cards to import', 'error_count': error_count, 'errors': errors}), 400
+    deck = created[0]
+
+    return jsonify({
+        'deck': deck.read(),
+        'imported': imported,
+        'error_count': error_count,
+        'errors': errors
+    }), 201
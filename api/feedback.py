@@ -51,8 +51,8 @@ class FeedbackAPI:
             post_id = data['id']
             # Find all the feedbacks by the current user
             feedbacks = Feedback.query.filter(Feedback._post_id == data['id']).all()
-            # Prepare a JSON list of all the feedbacks, uses for loop shortcut called list comprehension
-            json_ready = [feedback.read() for feedback in feedbacks]
+            # Prepare a JSON list of all the feedbacks, user names and post titles are resolved in one pass
+            json_ready = Feedback.read_many(feedbacks)
             # Return a JSON list, converting Python dictionaries to JSON format
             return jsonify(json_ready)
 
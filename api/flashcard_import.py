@@ -1,8 +1,8 @@
-import requests
 from flask import Blueprint, jsonify, request
 from model.flashcard import Flashcard
 from model.deck import Deck  # Import Deck model
 from __init__ import db
+from api.http_client import http_client, ProviderError, ProviderUnavailable
 
 flashcard_import_api = Blueprint('flashcard_import_api', __name__, url_prefix='/api')
 
@@ -14,17 +14,16 @@ def import_flashcards():
         difficulty = request.args.get('difficulty', default='medium', type=str)  # Default to medium
         category = request.args.get('category', default=None, type=str)  # Default to None
 
-        # Construct the API URL dynamically
-        api_url = f"https://opentdb.com/api.php?amount={amount}&difficulty={difficulty}"
-        if category:  # Add the category parameter only if it is provided and valid
-            api_url += f"&category={category}"
+        # Fetch data from Open Trivia Database through the shared client, identical imports hit its cache
+        try:
+            trivia_data = http_client.get_json('opentdb', '/api.php', params={
+                'amount': amount, 'difficulty': difficulty, 'category': category or None
+            })
+        except ProviderUnavailable as e:
+            return jsonify({"error": str(e)}), 503
+        except ProviderError:
+            return jsonify({"error": "Failed to fetch data from external API"}), 502
 
-        # Fetch data from Open Trivia Database
-        response = requests.get(api_url)
-        if response.status_code != 200:
-            return jsonify({"error": "Failed to fetch data from external API"}), 500
-
-        trivia_data = response.json()
         results = trivia_data.get("results", [])
 
         if not results:
@@ -36,25 +35,18 @@ def import_flashcards():
             deck_title += f" - Category {category}"
 
         user_id = 1  # Replace with actual user_id if authentication is implemented
-        new_deck = Deck(title=deck_title, user_id=user_id)
-        db.session.add(new_deck)
-        db.session.commit()
-
-        flashcards = []
-        for item in results:
-            question = item.get("question")
-            answer = item.get("correct_answer")
-            if question and answer:
-                flashcard = Flashcard(
-                    title=question,
-                    content=answer,
-                    user_id=user_id,
-                    deck_id=new_deck.id  # Associate flashcard with the new deck
-                )
-                db.session.add(flashcard)
-                flashcards.append(flashcard.read())
-
-        db.session.commit()
+        cards = [
+            {"title": item.get("question"), "content": item.get("correct_answer")}
+            for item in results
+            if item.get("question") and item.get("correct_answer")
+        ]
+
+        # Create the deck and all flashcards in one transaction with a single batched insert
+        new_deck, errors = Deck.create_with_cards(deck_title, user_id, cards)
+        if new_deck is None:
+            return jsonify({"error": "Imported flashcards failed validation", "errors": errors}), 400
+
+        flashcards = [card.read() for card in Flashcard.query.filter_by(_deck_id=new_deck.id).order_by(Flashcard.id)]
         return jsonify({
             "message": f"{len(flashcards)} flashcards imported and added to deck '{deck_title}'!",
             "deck": {
@@ -0,0 +1,246 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+import requests
+from requests.adapters import HTTPAdapter
+from __init__ import app
+
+
+class ProviderError(RuntimeError):
+    """
+    Raised when an external provider could not be reached or answered with an error.
+    """
+
+
+class ProviderUnavailable(ProviderError):
+    """
+    Raised without a network call while a provider's circuit breaker is open.
+    """
+
+
+class ProviderNotConfigured(ProviderError):
+    """
+    Raised without a network call for a provider that lacks its settings, e.g. an API key.
+    """
+
+
+class Provider:
+    """
+    Settings for one external content provider.
+
+    Attributes:
+        name (str): Key used to look the provider up.
+        base_url (str): URL that request paths are joined to.
+        timeout (tuple): (connect, read) timeouts in seconds.
+        retries (int): Extra attempts after a failed one, with jittered exponential backoff.
+        backoff (float): Base delay in seconds before the first retry.
+        cache_ttl (int): Seconds a successful response is reused for the same URL and params, 0 disables.
+        failure_threshold (int): Consecutive failures that open the circuit breaker.
+        reset_timeout (int): Seconds the breaker stays open before one trial request is let through.
+        headers (dict): Headers sent with every request, e.g. API keys.
+        stub (callable): Returns canned JSON for (path, params) when stub mode is on.
+        configured (bool): False when a required setting is missing, calls then raise
+            ProviderNotConfigured, stub mode still answers.
+    """
+    def __init__(self, name, base_url, timeout=(3.05, 10), retries=2, backoff=0.25, cache_ttl=0,
+                 failure_threshold=5, reset_timeout=30, headers=None, stub=None, configured=True):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_ttl = cache_ttl
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.headers = headers or {}
+        self.stub = stub
+        self.configured = configured
+        # Circuit breaker state
+        self.failures = 0
+        self.opened_at = None
+
+
+class OutboundClient:
+    """
+    Shared client for calls to external content providers.
+
+    Each provider gets a keep-alive requests.Session with a bounded connection pool, so repeated
+    calls reuse TCP/TLS connections. Every call is bounded by the provider's timeouts and retry
+    budget, so a slow provider cannot park a worker indefinitely. Successful JSON responses are
+    cached per URL and params for the provider's TTL. After failure_threshold consecutive
+    failures, calls fail fast with ProviderUnavailable until reset_timeout has passed.
+
+    With stub mode on (OUTBOUND_HTTP_STUB) providers answer from their stub functions and no
+    network calls are made, for tests and benchmarks.
+    """
+    def __init__(self, cache_size=256, pool_size=10, stub=False):
+        self.cache_size = cache_size
+        self.pool_size = pool_size
+        self.stub = stub
+        self._providers = {}
+        self._sessions = {}
+        self._cache = OrderedDict()  # key -> (expires_at, data)
+        self._lock = threading.Lock()
+        self._metrics = {"requests": 0, "cache_hits": 0, "retries": 0, "failures": 0, "short_circuited": 0, "stubbed": 0}
+
+    def register(self, provider):
+        self._providers[provider.name] = provider
+        return provider
+
+    def get_json(self, provider_name, path='', params=None):
+        """
+        GETs a provider path and returns the decoded JSON body.
+
+        Args:
+            provider_name (str): A registered provider.
+            path (str): Path appended to the provider's base URL.
+            params (dict, optional): Query parameters.
+
+        Returns:
+            The decoded JSON response.
+
+        Raises:
+            ProviderUnavailable: The provider's circuit breaker is open.
+            ProviderNotConfigured: The provider lacks a required setting.
+            ProviderError: The provider failed on every attempt.
+        """
+        provider = self._providers[provider_name]
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        url = provider.base_url + path
+        key = url + '?' + urlencode(sorted(params.items()))
+
+        if self.stub and provider.stub is not None:
+            with self._lock:
+                self._metrics["stubbed"] += 1
+            return provider.stub(path, params)
+
+        if not provider.configured:
+            raise ProviderNotConfigured(f"{provider.name} is not configured")
+
+        if provider.cache_ttl:
+            with self._lock:
+                entry = self._cache.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    self._cache.move_to_end(key)
+                    self._metrics["cache_hits"] += 1
+                    return entry[1]
+
+        self._check_breaker(provider)
+        data = self._fetch(provider, url, params)
+
+        if provider.cache_ttl:
+            with self._lock:
+                self._cache[key] = (time.monotonic() + provider.cache_ttl, data)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return data
+
+    def stats(self):
+        """
+        Returns request, cache and retry counters plus the breaker state of each provider.
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["cache_size"] = len(self._cache)
+        metrics["providers"] = {
+            name: {"failures": provider.failures, "open": provider.opened_at is not None, "configured": provider.configured}
+            for name, provider in self._providers.items()
+        }
+        return metrics
+
+    def _session(self, provider):
+        session = self._sessions.get(provider.name)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(provider.headers)
+            self._sessions[provider.name] = session
+        return session
+
+    def _check_breaker(self, provider):
+        with self._lock:
+            if provider.opened_at is None:
+                return
+            if time.monotonic() - provider.opened_at < provider.reset_timeout:
+                self._metrics["short_circuited"] += 1
+                raise ProviderUnavailable(f"{provider.name} is unavailable, try again later")
+            # Half open, let this request through as a trial, others keep failing fast
+            provider.opened_at = time.monotonic()
+
+    def _fetch(self, provider, url, params):
+        error = None
+        for attempt in range(provider.retries + 1):
+            if attempt:
+                with self._lock:
+                    self._metrics["retries"] += 1
+                time.sleep(random.uniform(0, provider.backoff * 2 ** attempt))  # full jitter
+            with self._lock:
+                self._metrics["requests"] += 1
+            try:
+                response = self._session(provider).get(url, params=params, timeout=provider.timeout)
+            except requests.RequestException as e:
+                error = f"{type(e).__name__}: {e}"
+                continue
+            if response.status_code == 429 or response.status_code >= 500:
+                error = f"HTTP {response.status_code}"
+                continue
+            if response.status_code != 200:
+                # Client errors will not improve with a retry and do not mean the provider is down
+                raise ProviderError(f"{provider.name} answered HTTP {response.status_code}")
+            try:
+                data = response.json()
+            except ValueError:
+                error = "invalid JSON"
+                continue
+            with self._lock:
+                provider.failures = 0
+                provider.opened_at = None
+            return data
+
+        with self._lock:
+            self._metrics["failures"] += 1
+            provider.failures += 1
+            if provider.failures >= provider.failure_threshold:
+                provider.opened_at = time.monotonic()
+        print(f"Outbound request to {provider.name} failed: {error}")  # Debugging log
+        raise ProviderError(f"{provider.name} request failed: {error}")
+
+
+def _stub_opentdb(path, params):
+    amount = int(params.get('amount', 10))
+    difficulty = params.get('difficulty', 'medium')
+    return {
+        "response_code": 0,
+        "results": [{
+            "category": "Stub",
+            "type": "multiple",
+            "difficulty": difficulty,
+            "question": f"Stub question {index + 1}?",
+            "correct_answer": f"Stub answer {index + 1}",
+            "incorrect_answers": ["A", "B", "C"]
+        } for index in range(amount)]
+    }
+
+
+def _stub_trivia(path, params):
+    return [{"category": params.get('category', ''), "question": "Stub trivia question?", "answer": "Stub"}]
+
+
+http_client = OutboundClient(
+    cache_size=app.config['OUTBOUND_HTTP_CACHE_SIZE'],
+    stub=app.config['OUTBOUND_HTTP_STUB']
+)
+
+http_client.register(Provider(
+    'opentdb', 'https://opentdb.com', timeout=(3.05, 5), retries=2, cache_ttl=300, stub=_stub_opentdb
+))
+http_client.register(Provider(
+    'api_ninjas', 'https://api.api-ninjas.com', timeout=(3.05, 5), retries=1,  # random trivia, not cached
+    headers={'X-Api-Key': app.config['API_NINJAS_KEY']} if app.config['API_NINJAS_KEY'] else {}, stub=_stub_trivia,
+    configured=bool(app.config['API_NINJAS_KEY'])
+))
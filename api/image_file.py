@@ -0,0 +1,216 @@
+import base64
+import codecs
+import json
+import os
+import re
+from flask import redirect, request, send_file
+from __init__ import app
+from model.blob import UPLOAD_CHUNK_SIZE, blob_key, is_blob_name
+from model.image import ImageRejected, ImageVariant, decode_base64, image_version
+from model.storage import storage
+
+# Bytes of a JSON upload body outside the image string, other fields are small
+MAX_JSON_FIELDS_LENGTH = 64 * 1024
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+def send_image(path, version=None):
+    """
+    Streams an image file as a binary response.
+
+    The file goes out through send_file, so gunicorn can use sendfile, with its Content-Type,
+    Last-Modified and a strong ETag, and a matching If-None-Match or If-Modified-Since gets a
+    304. Requests carrying ?v=<version> are versioned URLs and may be cached for a year, others
+    are cached privately but revalidated every time.
+
+    Args:
+        path (str): The image file.
+        version (str, optional): Version a ?v= must match, defaults to the file's own version.
+    """
+    etag = image_version(path)
+    resp = send_file(path, conditional=True, etag=etag, max_age=0)
+    if request.args.get('v') == (version or etag):
+        resp.headers['Cache-Control'] = f"private, max-age={app.config['IMAGE_CACHE_MAX_AGE']}, immutable"
+    else:
+        resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
+
+
+def accepts_webp():
+    """
+    Tells whether the client listed image/webp in its Accept header, as browsers do for images.
+    """
+    return any(value == 'image/webp' and quality > 0 for value, quality in request.accept_mimetypes)
+
+
+def image_response(source, legacy_path=None, base64_key=None):
+    """
+    Answers with an uploaded image, as the smallest variant that is at least ?size= pixels on
+    its longest side, or the full size variant without ?size=. WebP variants go to clients that
+    accept them. A blob's content never changes, so its variants are immutable under
+    ?v=<first 20 characters of the blob name>. An upload whose variants are not made yet, or a
+    file from before the blob store, is sent as it is and never marked immutable.
+
+    When the storage backend hands out presigned URLs, e.g. S3, the answer is a redirect to the
+    object and the bytes never pass through the app. Versioned redirects are cached for a
+    quarter of the URL's lifetime, and the backend reuses a URL for half of it, so browsers keep
+    hitting their cached copy of the image.
+
+    With a base64_key the image is returned in the older JSON form {base64_key: <base64>},
+    using the JPEG or PNG variant, read through the app whatever the backend.
+
+    Args:
+        source (str): Blob name, or filename of a picture from before the blob store.
+        legacy_path (str, optional): The file of a picture from before the blob store.
+        base64_key (str, optional): Key of the older JSON form.
+    """
+    size = request.args.get('size', type=int)
+    key, version = None, 'unprocessed'  # never matches a ?v=, the upload is revalidated until its variants exist
+    if is_blob_name(source):
+        variant = ImageVariant.best(source, size, webp=not base64_key and accepts_webp())
+        key, version = (variant.key, source[:20]) if variant else (blob_key(source), version)
+    elif not legacy_path:
+        return {'message': 'Image file not found.'}, 404
+
+    if base64_key:
+        try:
+            with (storage.open(key) if key else open(legacy_path, 'rb')) as img_file:
+                return {base64_key: base64.b64encode(img_file.read()).decode('utf-8')}, 200
+        except Exception as e:
+            print(f'An error occurred while reading the image: {str(e)}')
+            return {'message': 'An error occurred while reading the picture.'}, 500
+
+    url = storage.url(key) if key else None
+    if url:
+        resp = redirect(url, 302)
+        if request.args.get('v') == version:
+            resp.headers['Cache-Control'] = f"private, max-age={storage.expires // 4}"
+        else:
+            resp.headers['Cache-Control'] = 'private, no-cache'
+    else:
+        path = storage.path(key) if key else legacy_path
+        if not os.path.isfile(path):
+            return {'message': 'Image file not found.'}, 404
+        resp = send_image(path, version=version)
+    resp.vary.add('Accept')
+    return resp
+
+
+def _read_chunks(stream):
+    return iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b'')
+
+
+def _json_string_stream(stream, key, fields):
+    """
+    Scans a JSON object body in chunks and yields the text of the top level string under key
+    piece by piece, so the body is never held whole. The rest of the object, with that string
+    emptied, is parsed into fields once the body has been read.
+
+    Raises:
+        ImageRejected: The body is not a JSON object or its other fields are too long.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    skeleton = []  # the body outside the streamed string
+    skeleton_length = 0
+    depth, in_string, escape, after_colon, streaming, streaming_escape = 0, False, False, False, False, False
+    current, last_key = [], None
+    for raw in _read_chunks(stream):
+        text = decoder.decode(raw)
+        i, n = 0, len(text)
+        while i < n:
+            if streaming:
+                if streaming_escape:
+                    if text[i] == '/':
+                        yield '/'
+                    elif text[i] not in 'nrt':
+                        raise ImageRejected("Image data is not valid base64")
+                    streaming_escape = False
+                    i += 1
+                    continue
+                match = _STRING_SPECIAL.search(text, i)
+                end = match.start() if match else n
+                if end > i:
+                    yield text[i:end]
+                if not match:
+                    break
+                if text[end] == '\\':
+                    streaming_escape = True
+                else:
+                    streaming = False
+                    skeleton.append('"')
+                i = end + 1
+                continue
+
+            char = text[i]
+            i += 1
+            skeleton.append(char)
+            skeleton_length += 1
+            if skeleton_length > MAX_JSON_FIELDS_LENGTH:
+                raise ImageRejected("Request fields are too long")
+            if in_string:
+                if escape:
+                    escape = False
+                elif char == '\\':
+                    escape = True
+                elif char == '"':
+                    in_string = False
+                    if depth == 1 and not after_colon:
+                        last_key = ''.join(current)
+                else:
+                    current.append(char)
+            elif char == '"':
+                if depth == 1 and after_colon and last_key == key:
+                    streaming = True
+                else:
+                    in_string, current = True, []
+            elif char in '{[':
+                depth += 1
+            elif char in '}]':
+                depth -= 1
+            elif depth == 1 and char == ':':
+                after_colon = True
+            elif depth == 1 and char == ',':
+                after_colon = False
+    try:
+        parsed = json.loads(''.join(skeleton) + decoder.decode(b'', final=True))
+    except ValueError:
+        raise ImageRejected("Request body is not valid JSON")
+    if not isinstance(parsed, dict) or streaming:
+        raise ImageRejected("Request body must be a JSON object")
+    fields.update(parsed)
+
+
+def is_json_upload():
+    """
+    Whether read_upload reads the request as a JSON body, whose other fields are only known
+    once the image is read. Raw and multipart bodies have them up front.
+    """
+    mimetype = request.mimetype or ''
+    return not (mimetype == 'multipart/form-data' or mimetype.startswith('image/') or mimetype == 'application/octet-stream')
+
+
+def read_upload(image_key):
+    """
+    Returns an image upload from the request as chunks of bytes, without reading it into memory.
+
+    Accepted bodies:
+    - raw image bytes, with an image/* or application/octet-stream content type, other fields
+      come from the query string
+    - multipart/form-data with the image in an image_key or "file" field, werkzeug spools
+      large files to disk
+    - JSON with the base64 encoded image under image_key, as clients have always sent it. The
+      body is scanned and decoded as it streams in.
+
+    Returns:
+        tuple: (chunks, fields). The chunks are read once, by whoever stores the upload. fields
+            holds the other request fields, for JSON bodies it is filled once the chunks are
+            consumed.
+    """
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get(image_key) or request.files.get('file')
+        fields = request.form.to_dict()
+        return (_read_chunks(upload.stream) if upload else iter(())), fields
+    if not is_json_upload():
+        return _read_chunks(request.stream), request.args.to_dict()
+    fields = {}
+    return decode_base64(_json_string_stream(request.stream, image_key, fields)), fields
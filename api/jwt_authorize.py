@@ -1,9 +1,188 @@
 from flask import request
 from flask import current_app, g
 from functools import wraps
+from collections import OrderedDict
+import threading
+import time
 import jwt
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from werkzeug.exceptions import Unauthorized
+from __init__ import app, db
 from model.user import User
 
+
+class AuthenticatedUser:
+    """
+    Lightweight stand-in for the User behind a verified token.
+
+    The id, uid and role come from the identity cache, so guarded endpoints that only need
+    those values never touch the users table. Any other attribute (read, update, pfp, ...)
+    loads the full User row on first use and delegates to it, assignments included. A user
+    deleted since the identity was cached answers 401 and drops the cached tokens.
+    """
+    _OWN = ('id', '_uid', '_role', '_user')
+
+    def __init__(self, id, uid, role):
+        self.id = id
+        self._uid = uid
+        self._role = role
+        self._user = None
+
+    @property
+    def uid(self):
+        return self._uid
+
+    @property
+    def role(self):
+        return self._role
+
+    def is_admin(self):
+        return self._role == "Admin"
+
+    def __getattr__(self, name):
+        # Only called for attributes not defined above, fall through to the real User
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        if name in self._OWN:
+            self.__dict__[name] = value
+            return
+        user = self._load()
+        setattr(user, name, value)
+        # Keep the cached values in step when uid or role are set through the proxy
+        self.__dict__['_uid'], self.__dict__['_role'] = user._uid, user._role
+
+    def _load(self):
+        user = self.__dict__.get('_user')
+        if user is None:
+            user = db.session.get(User, self.__dict__['id'])
+            if user is None:
+                identity_cache.invalidate(self.__dict__['_uid'])
+                raise Unauthorized("User not found")
+            self.__dict__['_user'] = user
+        return user
+
+
+class IdentityCache:
+    """
+    Bounded, TTL based cache of verified JWT identities.
+
+    Entries are keyed by the raw token and hold the resolved user id, uid and role. Entries
+    are dropped when they expire, when the cache is full (least recently used first), or when
+    a commit in this worker changes or deletes the User they belong to.
+
+    The cache lives in each worker process and invalidation does not cross processes. A user
+    demoted or deleted through another gunicorn worker keeps their cached identity here for up
+    to ttl seconds, which bounds how long such a change takes to reach every worker.
+    """
+    def __init__(self, max_size=1024, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # token -> (expires_at, AuthenticatedUser fields)
+        self._tokens_by_uid = {}  # uid -> set of tokens, used for invalidation
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, token):
+        """
+        Returns the cached (id, uid, role) tuple for a token, or None on a miss.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token, user):
+        """
+        Stores the identity resolved from the database for a token.
+        """
+        identity = (user.id, user._uid, user._role)
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (time.monotonic() + self.ttl, identity)
+            self._tokens_by_uid.setdefault(identity[1], set()).add(token)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, uid):
+        """
+        Drops every cached token that resolved to the given uid.
+        """
+        with self._lock:
+            for token in self._tokens_by_uid.pop(uid, ()):
+                self._entries.pop(token, None)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_uid.clear()
+
+    def stats(self):
+        """
+        Returns hit/miss counters, useful to confirm hot users skip the users table.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl
+            }
+
+    def _remove(self, token):
+        _, identity = self._entries.pop(token)
+        tokens = self._tokens_by_uid.get(identity[1])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_uid[identity[1]]
+
+
+identity_cache = IdentityCache(
+    max_size=app.config['JWT_IDENTITY_CACHE_SIZE'],
+    ttl=app.config['JWT_IDENTITY_CACHE_TTL']
+)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_user_changes(session, flush_context):
+    """
+    Remembers the uids of users changed or deleted in this transaction, including the old uid
+    when set_uid renamed a user, so their cached identities can be dropped on commit.
+    """
+    uids = session.info.setdefault('identity_cache_uids', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            history = inspect(obj).attrs._uid.history
+            uids.update(uid for uid in history.deleted if uid)
+            uids.add(obj._uid)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_user_changes(session):
+    for uid in session.info.pop('identity_cache_uids', ()):
+        identity_cache.invalidate(uid)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_changes(session):
+    session.info.pop('identity_cache_uids', None)
+
+
 def token_required(roles=None):
     def decorator(func_to_guard):
         @wraps(func_to_guard)
@@ -18,19 +197,26 @@ def token_required(roles=None):
                 }, 401
 
             try:
-                # Decode the token
+                # Decode the token, the signature is always verified and exp only when present, login tokens carry no exp so they never expire
                 data = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
                 print(f"Decoded Token: {data}")  # Debugging log
 
-                # Find the user in the database
-                current_user = User.query.filter_by(_uid=data["_uid"]).first()
-                if not current_user:
-                    print("User not found in database")  # Debugging log
-                    return {
-                        "message": "User not found",
-                        "error": "Unauthorized",
-                        "data": data
-                    }, 401
+                # Resolve the user from the identity cache, falling back to the database
+                identity = identity_cache.get(token)
+                if identity is None:
+                    user = User.query.filter_by(_uid=data["_uid"]).first()
+                    if not user:
+                        print("User not found in database")  # Debugging log
+                        return {
+                            "message": "User not found",
+                            "error": "Unauthorized",
+                            "data": data
+                        }, 401
+                    identity_cache.put(token, user)
+                    current_user = AuthenticatedUser(user.id, user._uid, user._role)
+                    current_user._user = user
+                else:
+                    current_user = AuthenticatedUser(*identity)
 
                 # Check roles if specified
                 if roles and current_user.role not in roles:
@@ -43,7 +229,7 @@ def token_required(roles=None):
 
                 # Set the authenticated user
                 g.current_user = current_user
-                print(f"Authenticated User: {current_user._uid}, Role: {current_user.role}")  # Debugging log
+                print(f"Authenticated User: {current_user.uid}, Role: {current_user.role}")  # Debugging log
             except jwt.ExpiredSignatureError:
                 print("Token has expired")  # Debugging log
                 return {
@@ -2,8 +2,9 @@ import jwt
 from flask import Blueprint, request, jsonify, Response, g
 from flask_restful import Api, Resource  # Used for REST API building
 from __init__ import app  # Import the Flask app instance
+from model.unit_of_work import commit
 from api.jwt_authorize import token_required  # Import custom decorator for token authorization
-from model.leaderboard import LeaderboardEntry  # Import the LeaderboardEntry model
+from model.leaderboard import LeaderboardEntry, WINDOWS, leaderboard  # Import the LeaderboardEntry model and ranked view
 
 # Create a Blueprint for the leaderboard API
 leaderboard_api = Blueprint('leaderboard_api', __name__, url_prefix='/api')
@@ -11,6 +12,9 @@ leaderboard_api = Blueprint('leaderboard_api', __name__, url_prefix='/api')
 # Initialize the API object and attach it to the Blueprint
 api = Api(leaderboard_api)
 
+MAX_TOP = 100  # most entries returned by one leaderboard call
+MAX_WINDOW = 25  # most neighbours returned on each side of a player
+
 
 class LeaderboardAPI:
     """
@@ -37,13 +41,14 @@ class LeaderboardAPI:
 
         def get(self):
             """
-            Retrieve all leaderboard entries, ordered by score descending.
+            Retrieve the best leaderboard entries (?k=, default and maximum 100), ordered by score descending.
             """
+            k = min(max(request.args.get('k', default=MAX_TOP, type=int), 1), MAX_TOP)
             try:
-                entries = LeaderboardEntry.query.order_by(LeaderboardEntry.score.desc()).all()
+                entries = leaderboard.top(k)
                 if not entries:
                     return jsonify({'message': 'No leaderboard entries found'}), 404
-                return jsonify([entry.read() for entry in entries]), 200
+                return jsonify(entries), 200
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
 
@@ -80,8 +85,54 @@ class LeaderboardAPI:
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
 
+    class _Top(Resource):
+        def get(self):
+            """
+            Retrieve the k best entries with their rank, e.g. /api/leaderboard/top?k=10.
+            With window=day or window=week, the k best players of the current day or week.
+            """
+            k = request.args.get('k', default=10, type=int)
+            window = request.args.get('window', 'all')
+            if k < 1 or k > MAX_TOP:
+                return {'message': f'k must be between 1 and {MAX_TOP}'}, 400
+            if window != 'all' and window not in WINDOWS:
+                return {'message': 'window must be all, day or week'}, 400
+            return jsonify(leaderboard.top(k, window=None if window == 'all' else window))
+
+    class _Rank(Resource):
+        def get(self):
+            """
+            Retrieve the rank and percentile of a player's best entry, e.g. /api/leaderboard/rank?name=Alice.
+            """
+            name = request.args.get('name')
+            if not name:
+                return {'message': 'Missing required parameter: name'}, 400
+            result = leaderboard.rank(name)
+            if result is None:
+                return {'message': f'No leaderboard entries for {name}'}, 404
+            return jsonify(result)
+
+    class _Around(Resource):
+        def get(self):
+            """
+            Retrieve the entries ranked around a player's best entry, e.g. /api/leaderboard/around?name=Alice&window=5.
+            """
+            name = request.args.get('name')
+            window = request.args.get('window', default=5, type=int)
+            if not name:
+                return {'message': 'Missing required parameter: name'}, 400
+            if window < 0 or window > MAX_WINDOW:
+                return {'message': f'window must be between 0 and {MAX_WINDOW}'}, 400
+            entries = leaderboard.around(name, window)
+            if entries is None:
+                return {'message': f'No leaderboard entries for {name}'}, 404
+            return jsonify(entries)
+
     # Register CRUD endpoints with a unique name
     api.add_resource(CRUD, '/leaderboard', endpoint='leaderboard_crud')
+    api.add_resource(_Top, '/leaderboard/top')
+    api.add_resource(_Rank, '/leaderboard/rank')
+    api.add_resource(_Around, '/leaderboard/around')
 
 
 def initLeaderboard():
@@ -103,7 +154,7 @@ def initLeaderboard():
             for entry_data in default_entries:
                 entry = LeaderboardEntry(name=entry_data['name'], score=entry_data['score'])
                 db.session.add(entry)  # Add entry to the session
-            db.session.commit()  # Commit all entries to the database
+            commit()  # Commit all entries to the database
             print("Default leaderboard entries added.")
         else:
             print("Leaderboard table already initialized with data.")
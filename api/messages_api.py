@@ -1,8 +1,7 @@
 # by P5 G1
 from flask import Blueprint, request, jsonify
 from flask_restful import Api, Resource
-import requests
-import json
+from api.http_client import http_client, ProviderError, ProviderNotConfigured
 
 # Create a Blueprint for the messages API
 messages_api = Blueprint('messages_api', __name__, url_prefix='/api')
@@ -11,9 +10,8 @@ api = Api(messages_api)
 # Path for the messages file
 MESSAGE_FILE_PATH = 'Period-5/aaak/messages.txt'
 
-# API Key and URL template for the trivia API
-API_KEY = 'LUDk78PjUOELr1cvaaQuEA==t3yAhXp37UD4j6P9'
-TRIVIA_API_URL = 'https://api.api-ninjas.com/v1/trivia?category={}'
+# Path of the trivia API, the key and base URL are set on the api_ninjas provider in api/http_client.py
+TRIVIA_API_PATH = '/v1/trivia'
 
 class MessagesAPI:
     # Define the API CRUD endpoints for the messages file.
@@ -50,7 +48,10 @@ class MessagesAPI:
         def get(self):
             """Fetch a trivia question and append it to messages.txt."""
             topic = request.args.get('topic', '')  # Get topic from query parameters
-            question = get_trivia_question(topic)
+            try:
+                question = get_trivia_question(topic)
+            except ProviderNotConfigured:
+                return {"error": "Trivia is not configured, set API_NINJAS_KEY"}, 503
 
             if question:
                 with open(MESSAGE_FILE_PATH, 'a') as file:
@@ -64,11 +65,11 @@ class MessagesAPI:
 
 def get_trivia_question(topic):
     """Fetch a trivia question from the API."""
-    api_url = TRIVIA_API_URL.format(topic)
-    response = requests.get(api_url, headers={'X-Api-Key': API_KEY})
-    if response.status_code == requests.codes.ok:
-        question = json.loads(response.text)[0]['question']
-        return question
-    else:
-        print("Error:", response.status_code, response.text)
+    try:
+        data = http_client.get_json('api_ninjas', TRIVIA_API_PATH, params={'category': topic})
+        return data[0]['question']
+    except ProviderNotConfigured:
+        raise
+    except (ProviderError, IndexError, KeyError, TypeError) as e:
+        print("Error:", e)
         return None
@@ -1,101 +1,134 @@
+import os
 from flask import Blueprint, g, request
 from flask_restful import Api, Resource
 from api.jwt_authorize import token_required
 from model.nestPost import NestPost
-from model.nestImg import nestImg_base64_decode, nestImg_base64_upload
+from model.user import User
+from model.nestImg import nestImg_upload, nestImg_file_path
+from model.blob import is_blob_name
+from model.image import ImageRejected
+from api.image_file import image_response, is_json_upload, read_upload
 
 nestImg_api = Blueprint('nestImg_api', __name__, url_prefix='/api/id')
 api = Api(nestImg_api)
 
-class _NestImage(Resource):
+def nestImg_response(post_id, base64_mode):
+    """
+    Answers with a post's picture as the image file itself, resized with ?size=, or with the older
+    JSON form {'postImg': <base64>} in base64 mode. Pictures from before the blob store are read
+    from the post author's upload folder.
+    """
+    current_nestPost = NestPost.query.filter_by(id=post_id).first()
+    if not current_nestPost or not current_nestPost._image_url:
+        return {'message': 'There was an error accessing the image.'}, 404
+    author = User.query.get(current_nestPost._user_id)
+    if not author:
+        return {'message': 'There was an error accessing the image.'}, 404
+
+    img_path = None if is_blob_name(current_nestPost._image_url) else nestImg_file_path(author.uid, current_nestPost._image_url)
+    return image_response(current_nestPost._image_url, img_path, 'postImg' if base64_mode else None)
+
+
+def editable_post(post_id, user):
     """
-    Retrieves the current user's profile picture as a base64 encoded string.
+    Returns (post, None) if the user may change the post's picture, else (None, response).
+    """
+    current_nestPost = NestPost.query.filter_by(id=post_id).first()
+    if not current_nestPost:
+        return None, ({'message': 'Post not found.'}, 404)
+    if current_nestPost._user_id != user.id:
+        return None, ({'message': 'Only the author may change the post picture.'}, 403)
+    return current_nestPost, None
 
-    This endpoint allows users to fetch their profile picture. The profile picture is returned as a base64 encoded string,
-    which can be directly used in the src attribute of an img tag on the client side. This method ensures that only the
-    authenticated user can access their profile picture.
 
-    The process involves:
-    1. Verifying the user's authentication and retrieving the current user object.
-    2. Checking if the current user has a profile picture set.
-    3. If a profile picture is set, the image file is read, and its content is base64 encoded.
-    4. The base64 encoded string of the image is returned in the response.
+class _NestImage(Resource):
+    """
+    Older base64 interface to post pictures, kept for compatibility. New clients should use
+    GET /api/id/nestImg/<post_id>, which sends the image file itself and can be cached.
 
     Returns:
-    - A JSON object containing the base64 encoded string of the profile picture under the key 'pfp' if the operation is successful.
-    - HTTP status code 200 if the  picture is successfully retrieved.
-    - HTTP status code 404 if the  picture is not set for the current post.
+    - A JSON object containing the base64 encoded picture under the key 'postImg'.
+    - HTTP status code 404 if the post or its picture is not found.
     - HTTP status code 500 if an error occurs while reading the post picture from the server.
     """
     @token_required()
     def get(self):
-        current_user = g.current_user
-        # Doesn't work since you can't add a body to a GET
-        data = request.get_json()
-        current_nestPost = NestPost.query.filter_by(id=data["imageID"]).first()
-
-        if current_nestPost._image_url:
-            base64_encode = nestImg_base64_decode(current_user.uid, current_nestPost._image_url)
-            if not base64_encode:
-                return {'message': 'An error occurred while reading the picture.'}, 500
-            return {'postImg': base64_encode}, 200
-        else:
-            return {'message': 'There was an error accessing the image.'}, 404
+        # A GET cannot reliably carry a body, the post id may also be given as ?imageID=
+        image_id = request.args.get('imageID') or (request.get_json(silent=True) or {}).get("imageID")
+        return nestImg_response(image_id, base64_mode=True)
 
     @token_required()
     def post(self):
-        current_user = g.current_user
-        data = request.get_json()
-        current_nestPost = NestPost.query.filter_by(id=data["imageID"]).first()
-
-        if current_nestPost._image_url:
-            base64_encode = nestImg_base64_decode(current_user.uid, current_nestPost._image_url)
-            if not base64_encode:
-                return {'message': 'An error occurred while reading the picture.'}, 500
-            return {'postImg': base64_encode}, 200
-        else:
-            return {'message': 'There was an error accessing the image.'}, 404
+        data = request.get_json(silent=True) or {}
+        return nestImg_response(data.get("imageID"), base64_mode=True)
 
     @token_required()
     def put(self):
         """
-        Updates the user's profile picture with a new image provided as base64 encoded data.
+        Updates a post's picture with a new image.
 
-        This endpoint allows users to update their profile picture by sending a PUT request with base64 encoded image data.
-        The image is decoded and saved to a secure location on the server, and the user's profile information is updated
-        to reference the new image file.
-
-        The function requires a valid authentication token and expects the base64 image data to be included in the request's JSON body
-        under the key 'pfp'. If the image data is not provided, or if any error occurs during the upload process or while updating
-        the user's profile in the database, an appropriate error message and status code are returned.
+        The function requires a valid authentication token, the post id under 'imageID' and the image, either as the raw body
+        (Content-Type image/*, imageID in the query string), as a multipart 'nestImg' or 'file' field, or base64 encoded under
+        'nestImg' in a JSON body. The image is written to the server as it streams in, never held whole in memory. Raw and
+        multipart bodies give imageID up front and the post is checked before the image is read; a JSON body's imageID is
+        only known once the image is stored, an upload to a post the user may not change is then left unreferenced for
+        gc_uploads. Only the post's author may change its picture. The image is checked, stored in the blob
+        store and its resized variants are made in the background.
 
         Returns:
         - A JSON object with a message indicating the success or failure of the operation.
-        - HTTP status code 200 if the profile picture was updated successfully.
-        - HTTP status code 400 if the base64 image data is missing from the request.
+        - HTTP status code 200 if the post picture was updated successfully.
+        - HTTP status code 400 if the image data is missing or is not a supported image.
+        - HTTP status code 403 if the current user is not the post's author.
+        - HTTP status code 404 if the post is not found.
+        - HTTP status code 413 if the upload is larger than MAX_CONTENT_LENGTH.
         - HTTP status code 500 if an error occurs during the upload process or while updating the database.
         """
         current_user = g.current_user
-        # Grabs information and plugs it into NestPost table to get image information
-        data = request.get_json()
-        current_nestPost = NestPost.query.filter_by(id=data["imageID"]).first()
-        
-        # Obtain the base64 image data from the request
-        if 'nestImg' not in request.json:
-            return {'message': 'Base64 image data required.'}, 400
-        base64_image = request.json['nestImg']
-       
-        # Make an image file from the base64 data 
-        filename = nestImg_base64_upload(base64_image, current_user.uid)
+
+        # Make an image file from the request as it streams in
+        chunks, fields = read_upload('nestImg')
+        # Raw and multipart bodies give imageID up front, nothing is stored for a post the user may not change
+        if not is_json_upload():
+            current_nestPost, error = editable_post(fields.get("imageID"), current_user)
+            if error:
+                return error
+        try:
+            filename = nestImg_upload(chunks)
+        except ImageRejected as e:
+            return {'message': str(e)}, 400
         if not filename:
             return {'message': 'An error occurred while uploading the post picture'}, 500
-        
-        # Update the user's profile picture to the uploaded file
+
+        # A JSON body's imageID follows the image, it is only known now
+        if is_json_upload():
+            current_nestPost, error = editable_post(fields.get("imageID"), current_user)
+            if error:
+                return error
+
+        # Update the post's picture to the uploaded file
         try:
+            previous = current_nestPost._image_url
             # write the filename reference to the database
-            current_nestPost.update({"nestImg": filename})
+            current_nestPost._image_url = filename
+            current_nestPost.update()
+            if previous and previous != filename and not is_blob_name(previous):
+                # Files from before the blob store are removed, blobs are released by the update
+                previous_path = nestImg_file_path(current_user.uid, previous)
+                if previous_path:
+                    os.remove(previous_path)
             return {'message': 'Post picture updated successfully'}, 200
         except Exception as e:
             return {'message': f'A database error occurred while assigning post picture: {str(e)}'}, 500
         
+class _NestImageFile(Resource):
+    """
+    Retrieves a post's picture, e.g. /api/id/nestImg/<post_id>, as the image file itself.
+    Adding ?format=base64 returns the older JSON form.
+    """
+    @token_required()
+    def get(self, post_id):
+        return nestImg_response(post_id, base64_mode=request.args.get('format') == 'base64')
+
 api.add_resource(_NestImage, '/nestImg')
+api.add_resource(_NestImageFile, '/nestImg/<int:post_id>')
@@ -50,8 +50,8 @@ class NestPostAPI:
             current_user = g.current_user
             # Find all the posts by the current user
             posts = NestPost.query.filter(NestPost._user_id == current_user.id).all()
-            # Prepare a JSON list of all the posts, uses for loop shortcut called list comprehension
-            json_ready = [post.read() for post in posts]
+            # Prepare a JSON list of all the posts, user and group names are resolved in one pass
+            json_ready = NestPost.read_many(posts)
             # Return a JSON list, converting Python dictionaries to JSON format
             return jsonify(json_ready)
 
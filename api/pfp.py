@@ -2,42 +2,41 @@ from flask import Blueprint, g, request
 from flask_restful import Api, Resource
 from api.jwt_authorize import token_required
 from model.user import User
-from model.pfp import pfp_base64_decode, pfp_base64_upload, pfp_file_delete
+from model.pfp import pfp_upload, pfp_file_delete, pfp_file_path
+from model.blob import is_blob_name
+from model.image import ImageRejected
+from api.image_file import image_response, read_upload
 
 pfp_api = Blueprint('pfp_api', __name__, url_prefix='/api/id')
 api = Api(pfp_api)
 
-class _PFP(Resource):
+def pfp_response(user_uid, user_pfp):
+    """
+    Answers with a user's profile picture as the image file itself, resized with ?size=, or with
+    the older JSON form {'pfp': <base64>} when the request asks for ?format=base64.
     """
-    Retrieves the current user's profile picture as a base64 encoded string.
+    if not user_pfp:
+        return {'message': 'Profile picture is not set.'}, 404
+    img_path = None if is_blob_name(user_pfp) else pfp_file_path(user_uid, user_pfp)
+    return image_response(user_pfp, img_path, 'pfp' if request.args.get('format') == 'base64' else None)
 
-    This endpoint allows users to fetch their profile picture. The profile picture is returned as a base64 encoded string,
-    which can be directly used in the src attribute of an img tag on the client side. This method ensures that only the
-    authenticated user can access their profile picture.
 
-    The process involves:
-    1. Verifying the user's authentication and retrieving the current user object.
-    2. Checking if the current user has a profile picture set.
-    3. If a profile picture is set, the image file is read, and its content is base64 encoded.
-    4. The base64 encoded string of the image is returned in the response.
+class _PFP(Resource):
+    """
+    Retrieves the current user's profile picture.
+
+    The picture is sent as the image file itself, so it can be used directly as the src of an img tag and cached by the
+    browser, see send_image. With S3 storage the answer is a redirect to a presigned URL of the image in the bucket. ?size=64 picks the smallest resized variant of at least 64 pixels. Adding ?format=base64 returns the older JSON form with the base64 encoded image under 'pfp'.
 
     Returns:
-    - A JSON object containing the base64 encoded string of the profile picture under the key 'pfp' if the operation is successful.
-    - HTTP status code 200 if the profile picture is successfully retrieved.
+    - The image with HTTP status code 200, or 304 when the browser's cached copy is still current.
     - HTTP status code 404 if the profile picture is not set for the current user.
     - HTTP status code 500 if an error occurs while reading the profile picture from the server.
     """
     @token_required()
     def get(self):
         current_user = g.current_user
-
-        if current_user.pfp:
-            base64_encode = pfp_base64_decode(current_user.uid, current_user.pfp)
-            if not base64_encode:
-                return {'message': 'An error occurred while reading the profile picture.'}, 500
-            return {'pfp': base64_encode}, 200
-        else:
-            return {'message': 'Profile picture is not set.'}, 404
+        return pfp_response(current_user.uid, current_user.pfp)
 
     @token_required()
     def delete(self):
@@ -92,40 +91,59 @@ class _PFP(Resource):
     @token_required()
     def put(self):
         """
-        Updates the user's profile picture with a new image provided as base64 encoded data.
+        Updates the user's profile picture with a new image.
 
-        This endpoint allows users to update their profile picture by sending a PUT request with base64 encoded image data.
-        The image is decoded and saved to a secure location on the server, and the user's profile information is updated
-        to reference the new image file.
+        This endpoint allows users to update their profile picture by sending a PUT request with the image as the raw body
+        (Content-Type image/*), as a multipart 'pfp' or 'file' field, or base64 encoded under the key 'pfp' of a JSON body.
+        The image is written to the server as it streams in, never held whole in memory, and the user's profile information
+        is updated to reference the new image file.
 
-        The function requires a valid authentication token and expects the base64 image data to be included in the request's JSON body
-        under the key 'pfp'. If the image data is not provided, or if any error occurs during the upload process or while updating
-        the user's profile in the database, an appropriate error message and status code are returned.
+        If the image data is not provided, or if any error occurs during the upload process or while updating the user's
+        profile in the database, an appropriate error message and status code are returned.
 
         Returns:
         - A JSON object with a message indicating the success or failure of the operation.
         - HTTP status code 200 if the profile picture was updated successfully.
-        - HTTP status code 400 if the base64 image data is missing from the request.
+        - HTTP status code 400 if the image data is missing or is not a supported image.
+        - HTTP status code 413 if the upload is larger than MAX_CONTENT_LENGTH.
         - HTTP status code 500 if an error occurs during the upload process or while updating the database.
         """
         current_user = g.current_user
 
-        # Obtain the base64 image data from the request
-        if 'pfp' not in request.json:
-            return {'message': 'Base64 image data required.'}, 400
-        base64_image = request.json['pfp']
-       
-        # Make an image file from the base64 data 
-        filename = pfp_base64_upload(base64_image, current_user.uid)
+        # Make an image file from the request as it streams in
+        chunks, _ = read_upload('pfp')
+        try:
+            filename = pfp_upload(chunks)
+        except ImageRejected as e:
+            return {'message': str(e)}, 400
         if not filename:
             return {'message': 'An error occurred while uploading the profile picture'}, 500
         
         # Update the user's profile picture to the uploaded file
         try:
+            previous = current_user.pfp
             # write the filename reference to the database
             current_user.update({"pfp": filename})
-            return {'message': 'Profile picture updated successfully'}, 200
+            if previous and previous != filename:
+                # Only files from before the blob store are removed, blobs are released by the update
+                pfp_file_delete(current_user.uid, previous)
+            # Versioned URL of the new picture, safe for clients to cache for a long time
+            url = f"/api/id/pfp/{current_user.uid}?v={filename[:20]}"
+            return {'message': 'Profile picture updated successfully', 'url': url}, 200
         except Exception as e:
             return {'message': f'A database error occurred while assigning profile picture: {str(e)}'}, 500
         
+class _UserPFP(Resource):
+    """
+    Retrieves any user's profile picture by uid, e.g. /api/id/pfp/<uid>?size=64, as the image file itself.
+    Adding ?format=base64 returns the older JSON form.
+    """
+    @token_required()
+    def get(self, uid):
+        user = User.query.filter_by(_uid=uid).first()
+        if not user:
+            return {'message': 'User not found'}, 404
+        return pfp_response(user.uid, user.pfp)
+
 api.add_resource(_PFP, '/pfp')
+api.add_resource(_UserPFP, '/pfp/<path:uid>')
@@ -126,15 +126,28 @@ class PostAPI:
         def get(self):
             """
             Retrieve all posts by the current user.
+
+            Pass ?limit= (and ?cursor= from the previous page) to page through the posts newest first.
             """
             # Obtain the current user
             current_user = g.current_user
-            # Find all the posts by the current user
-            posts = Post.query.filter(Post._user_id == current_user.id).all()
-            # Prepare a JSON list of all the posts, using list comprehension
-            json_ready = [post.read() for post in posts]
-            # Return a JSON list, converting Python dictionaries to JSON format
-            return jsonify(json_ready)
+            query = Post.query.filter(Post._user_id == current_user.id)
+            cursor = request.args.get('cursor')
+            limit = request.args.get('limit', type=int)
+            if cursor is None and limit is None:
+                # Find all the posts by the current user
+                posts = query.all()
+                # Prepare a JSON list of all the posts, user and channel names are resolved in one pass
+                json_ready = Post.read_many(posts)
+                # Return a JSON list, converting Python dictionaries to JSON format
+                return jsonify(json_ready)
+
+            # Keyset page served by the (_user_id, id) index
+            try:
+                posts, next_cursor = Post.paginate(query, cursor, limit or 20)
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            return jsonify({'posts': Post.read_many(posts), 'next_cursor': next_cursor})
 
     class _BULK_CRUD(Resource):
         def post(self):
@@ -168,11 +181,8 @@ class PostAPI:
             """
             # Find all the posts
             posts = Post.query.all()
-            # Prepare a JSON list of all the posts, using list comprehension
-            json_ready = []
-            for post in posts:
-                post_data = post.read()
-                json_ready.append(post_data)
+            # Prepare a JSON list of all the posts, user and channel names are resolved in one pass
+            json_ready = Post.read_many(posts)
             # Return a JSON list, converting Python dictionaries to JSON format
             return jsonify(json_ready)
 
@@ -181,6 +191,9 @@ class PostAPI:
         def post(self):
             """
             Retrieve all posts by channel ID and user ID.
+
+            Include "limit" (and "cursor" from the previous page) in the body to page through the
+            channel newest first, the response is then {"posts": [...], "next_cursor": ...}.
             """
             # Obtain and validate the request data sent by the RESTful client API
             data = request.get_json()
@@ -189,12 +202,25 @@ class PostAPI:
             if 'channel_id' not in data:
                 return {'message': 'Channel ID not found'}, 400
             
-            # Find all posts by channel ID and user ID
-            posts = Post.query.filter_by(_channel_id=data['channel_id']).all()
-            # Prepare a JSON list of all the posts, using list comprehension
-            json_ready = [post.read() for post in posts]
-            # Return a JSON list, converting Python dictionaries to JSON format
-            return jsonify(json_ready)
+            query = Post.query.filter_by(_channel_id=data['channel_id'])
+            cursor = data.get('cursor')
+            limit = data.get('limit')
+            if cursor is None and limit is None:
+                # Find all posts by channel ID and user ID
+                posts = query.all()
+                # Prepare a JSON list of all the posts, user and channel names are resolved in one pass
+                json_ready = Post.read_many(posts)
+                # Return a JSON list, converting Python dictionaries to JSON format
+                return jsonify(json_ready)
+
+            # Keyset page served by the (_channel_id, id) index
+            if limit is not None and not isinstance(limit, int):
+                return {'message': 'Limit must be an integer'}, 400
+            try:
+                posts, next_cursor = Post.paginate(query, cursor, limit or 20)
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            return jsonify({'posts': Post.read_many(posts), 'next_cursor': next_cursor})
 
     """
     Map the _CRUD, _USER, _BULK_CRUD, and _FILTER classes to the API endpoints for /post, /post/user, /posts, and /posts/filter.
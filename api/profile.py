@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_restful import Api, Resource
 from sqlalchemy.exc import IntegrityError
 from __init__ import db
+from model.unit_of_work import rollback
 from model.profiles import Profile
 
 # Blueprint setup
@@ -41,10 +42,10 @@ class ProfileAPI:
 
                 return jsonify(profile.read()), 201
             except IntegrityError:
-                db.session.rollback()
+                rollback()
                 return {'message': 'Profile with the same name already exists'}, 400
             except Exception as e:
-                db.session.rollback()
+                rollback()
                 return {'message': f"An unexpected error occurred: {str(e)}"}, 500
 
         def put(self):
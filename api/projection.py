@@ -0,0 +1,31 @@
+from flask import Blueprint, request, jsonify
+from flask_restful import Api, Resource
+from api.jwt_authorize import token_required
+from model.projection import GradeProjection
+
+# Blueprint and API
+projection_api = Blueprint('projection_api', __name__, url_prefix='/api/projections')
+api = Api(projection_api)
+
+
+class ProjectionAPI:
+    class _Class(Resource):
+        @token_required(["Admin", "Teacher"])
+        def get(self):
+            """
+            Get the projected end-of-term grades of a subject for the whole class, or for the
+            students listed in user_ids, e.g. /api/projections?subject=Math&user_ids=3,4,5.
+
+            Projections are precomputed by the custom project_grades command.
+            """
+            subject = request.args.get('subject')
+            if not subject:
+                return {"message": "Subject is required"}, 400
+            user_ids = request.args.get('user_ids')
+            try:
+                user_ids = [int(user_id) for user_id in user_ids.split(',')] if user_ids else None
+            except ValueError:
+                return {"message": "user_ids must be a comma separated list of integers"}, 400
+            return jsonify(GradeProjection.for_class(subject, user_ids))
+
+    api.add_resource(_Class, '')
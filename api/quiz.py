@@ -0,0 +1,32 @@
+from flask import Blueprint, request, jsonify
+from model.question import question_index
+from model.leaderboard import LeaderboardEntry
+
+quiz_api = Blueprint('quiz_api', __name__, url_prefix='/api/quiz')
+
+MAX_QUIZ_SIZE = 50
+
+# Route to fetch random questions of a subject from the question bank, e.g. /api/quiz/apush
+@quiz_api.route('/<subject>', methods=['GET'])
+def get_questions(subject):
+    count = request.args.get('count', default=10, type=int)
+    difficulty = request.args.get('difficulty')
+    if count < 1 or count > MAX_QUIZ_SIZE:
+        return jsonify({"error": f"Count must be between 1 and {MAX_QUIZ_SIZE}"}), 400
+    questions = question_index.sample(subject, count=count, difficulty=difficulty)  # answers are never in the index's question lists
+    if questions is None:
+        return jsonify({"error": f"No questions for subject {subject}"}), 404
+    return jsonify(questions), 200
+
+# Route to handle quiz submissions
+@quiz_api.route('/<subject>/submit', methods=['POST'])
+def submit_quiz(subject):
+    data = request.get_json(silent=True) or {}
+    answers = data.get('answers', [])  # Get the user's answers or an empty list if none provided.
+    user_name = data.get('name', 'Anonymous')  # Get the user's name or default to "Anonymous".
+    if not isinstance(answers, list):
+        return jsonify({"error": "Answers must be a list"}), 400
+
+    score = question_index.grade(subject, answers)  # one dictionary lookup per answer
+    LeaderboardEntry(name=user_name, score=score).create()  # Save the user's score to the database.
+    return jsonify({"name": user_name, "score": score}), 200
@@ -0,0 +1,43 @@
+from flask import Blueprint, request, jsonify, g
+from flask_restful import Api, Resource
+from api.jwt_authorize import token_required
+from model.review import ReviewState, MAX_PAGE_SIZE
+
+review_api = Blueprint('review_api', __name__, url_prefix='/api')
+api = Api(review_api)
+
+class ReviewAPI:
+    class _NEXT(Resource):
+        @token_required()
+        def get(self):
+            """
+            Get the current user's due cards, most overdue first.
+
+            Query parameters:
+            - deck_id: only cards from this deck
+            - limit: number of cards, default 20, at most 100
+            """
+            deck_id = request.args.get('deck_id', type=int)
+            limit = request.args.get('limit', default=20, type=int)
+            if limit < 1 or limit > MAX_PAGE_SIZE:
+                return {'message': f'Limit must be between 1 and {MAX_PAGE_SIZE}'}, 400
+            return jsonify(ReviewState.next_due(g.current_user.id, deck_id=deck_id, limit=limit))
+
+    class _CRUD(Resource):
+        @token_required()
+        def post(self):
+            """
+            Record a batch of graded reviews, e.g. [{"flashcard_id": 1, "grade": 4}, ...].
+
+            Grades run from 0 (no recall) to 5 (perfect recall). Invalid entries are reported in
+            errors and skipped, the rest are saved in one transaction.
+            """
+            data = request.get_json()
+            results = data.get('results') if isinstance(data, dict) else data
+            if not isinstance(results, list) or not results:
+                return {'message': 'Expected a non-empty list of review results'}, 400
+            updated, errors = ReviewState.record(g.current_user.id, results)
+            return jsonify({'updated': updated, 'errors': errors})
+
+api.add_resource(ReviewAPI._NEXT, '/review/next')
+api.add_resource(ReviewAPI._CRUD, '/review')
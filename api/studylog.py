@@ -1,8 +1,9 @@
 import jwt
 from flask import Blueprint, request, jsonify, current_app, Response, g
 from flask_restful import Api, Resource
-from datetime import datetime
+from datetime import datetime, timedelta
 from __init__ import app, db
+from model.unit_of_work import commit, rollback
 from api.jwt_authorize import token_required
 from model.studylog import StudyLog
 import json
@@ -21,20 +22,50 @@ class StudyLogAPI:
     """
     class CRUD(Resource):
 
-        # GET: Read all study logs from the database
+        # GET: Read the current user's study logs
         @token_required()
         def get(self):
-            # Query all StudyLog records from database
-            all_studylogs = StudyLog.query.all()
+            """
+            Retrieve the current user's study logs, newest first.
 
-            # Prepare a list to hold each study log's data
-            studylogs = []
-            for log in all_studylogs:
-                # Convert the study log object into a dictionary
-                studylogs.append(log.read())
+            Query parameters, all optional:
+            - subject: only logs of this subject
+            - from, to: only logs dated from the first day up to and including the second (YYYY-MM-DD)
+            - limit, cursor: page through the logs, the response is then {"studylogs": [...], "next_cursor": ...}
+            - user_id: admins only, another user's logs, or "all" for every user
+            """
+            current_user = g.current_user
+            user_id = current_user.id
+            requested = request.args.get('user_id')
+            if requested is not None and requested != str(current_user.id):
+                if current_user.role != 'Admin':
+                    return {'message': 'Only admins can read other users\' study logs'}, 403
+                if requested == 'all':
+                    user_id = None
+                elif requested.isdigit():
+                    user_id = int(requested)
+                else:
+                    return {'message': 'user_id must be an integer or all'}, 400
 
-            # Return all study logs as JSON
-            return jsonify(studylogs)
+            try:
+                start = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+                end = datetime.fromisoformat(request.args['to']) + timedelta(days=1) if request.args.get('to') else None
+            except ValueError:
+                return {'message': 'from and to must be dates formatted YYYY-MM-DD'}, 400
+
+            # Filters run in SQL on the (user_id, date, id) index
+            query = StudyLog.filtered(user_id=user_id, subject=request.args.get('subject'), start=start, end=end)
+            cursor = request.args.get('cursor')
+            limit = request.args.get('limit', type=int)
+            if cursor is None and limit is None:
+                logs = query.order_by(StudyLog.user_id, StudyLog.date.desc(), StudyLog.id.desc()).all()
+                return jsonify([log.read() for log in logs])
+
+            try:
+                logs, next_cursor = StudyLog.paginate(query, cursor, limit or 50)
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            return jsonify({'studylogs': [log.read() for log in logs], 'next_cursor': next_cursor})
 
         # POST: Create a new study log
         @token_required()
@@ -120,12 +151,12 @@ class StudyLogAPI:
                 studylog.notes = data.get('notes', studylog.notes)
 
                 # Commit the changes to the database
-                db.session.commit()
+                commit()
 
                 return {'message': 'StudyLog updated successfully'}, 200
 
             except Exception as e:
-                db.session.rollback()
+                rollback()
                 return {'message': f"An error occurred: {str(e)}"}, 500
 
         # DELETE: Remove an existing study log from the database
@@ -149,7 +180,7 @@ class StudyLogAPI:
 
                 # Delete the record
                 db.session.delete(studylog)
-                db.session.commit()
+                commit()
 
                 # Return success message
                 return {'message': 'StudyLog deleted successfully'}, 200
@@ -184,7 +215,7 @@ class StudyLogAPI:
                 studylog.create()
             
             # Commit the changes after each entry is processed
-            db.session.commit()
+            commit()
 
     # Add the CRUD resource to the API, mapping to the '/studylognew' endpoint
     api.add_resource(CRUD, '/studylognew')
\ No newline at end of file
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import threading
+import time
+from flask import Blueprint, request, Response
+from flask_restful import Api, Resource  # used for REST API building
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from __init__ import app, db
+from model.section import Section
+from model.group import Group, group_moderators
+from model.channel import Channel
+
+"""
+This Blueprint object is used to define the navigation tree API.
+- Blueprint is used to modularize application files.
+- This Blueprint is registered to the Flask app in main.py.
+"""
+tree_api = Blueprint('tree_api', __name__, url_prefix='/api')
+
+api = Api(tree_api)
+
+# Tables whose changes alter the tree
+TREE_TABLES = {'sections', 'groups', 'channels', 'group_moderators'}
+
+
+def build_tree():
+    """
+    Builds the Section -> Group -> Channel hierarchy with three queries.
+
+    Groups are read joined to group_moderators rather than through the moderators
+    relationship, so no User rows are loaded.
+
+    Returns:
+        list: Section dictionaries, each with its groups and their channels.
+    """
+    sections = db.session.execute(
+        select(Section.id, Section._name, Section._theme).order_by(Section.id)
+    ).all()
+    groups = db.session.execute(
+        select(Group.id, Group._name, Group._section_id, group_moderators.c.user_id)
+        .outerjoin(group_moderators, group_moderators.c.group_id == Group.id)
+        .order_by(Group.id)
+    ).all()
+    channels = db.session.execute(
+        select(Channel.id, Channel._name, Channel._attributes, Channel._group_id).order_by(Channel.id)
+    ).all()
+
+    groups_by_id = {}
+    for group_id, name, section_id, moderator_id in groups:
+        group = groups_by_id.get(group_id)
+        if group is None:
+            group = groups_by_id[group_id] = {
+                'id': group_id, 'name': name, 'section_id': section_id, 'moderators': [], 'channels': []
+            }
+        if moderator_id is not None:
+            group['moderators'].append(moderator_id)
+    for channel_id, name, attributes, group_id in channels:
+        group = groups_by_id.get(group_id)
+        if group is not None:
+            group['channels'].append({'id': channel_id, 'name': name, 'attributes': attributes, 'group_id': group_id})
+
+    tree = [{'id': section_id, 'name': name, 'theme': theme, 'groups': []} for section_id, name, theme in sections]
+    sections_by_id = {section['id']: section for section in tree}
+    for group in groups_by_id.values():
+        section = sections_by_id.get(group['section_id'])
+        if section is not None:
+            section['groups'].append(group)
+    return tree
+
+
+class TreeCache:
+    """
+    Versioned in-process cache of the serialized navigation tree.
+
+    The cached entry holds the JSON body and an ETag derived from its content, so every worker
+    hands out the same ETag for the same tree. Commits touching the tree tables bump the
+    version and drop the entry, and entries older than the TTL are rebuilt to pick up changes
+    committed by other workers.
+    """
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self.version = 0
+        self._entry = None  # (expires_at, body, etag)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def get(self):
+        """
+        Returns the (body, etag) pair, building it when missing, invalidated or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._entry is not None and self._entry[0] > now:
+                self.hits += 1
+                return self._entry[1], self._entry[2]
+            version = self.version
+        body = json.dumps(build_tree(), separators=(',', ':'))
+        etag = hashlib.sha1(body.encode('utf-8')).hexdigest()
+        with self._lock:
+            self.builds += 1
+            # A commit during the build may have changed the tree, serve it but do not keep it
+            if version == self.version:
+                self._entry = (now + self.ttl, body, etag)
+        return body, etag
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._entry = None
+
+
+tree_cache = TreeCache(ttl=app.config['NAV_TREE_CACHE_TTL'])
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_tree_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Section, Group, Channel)):
+            session.info['tree_changed'] = True
+            return
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_tree_statements(orm_execute_state):
+    # Statement level writes (bulk insert/update/delete) skip the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if getattr(table, 'name', None) in TREE_TABLES:
+            orm_execute_state.session.info['tree_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_tree(session):
+    if session.info.pop('tree_changed', False):
+        tree_cache.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_tree_changes(session):
+    session.info.pop('tree_changed', None)
+
+
+class TreeAPI:
+    """
+    Define the navigation tree endpoint, the whole Section -> Group -> Channel hierarchy in one call.
+    """
+    class _TREE(Resource):
+        def get(self):
+            """
+            Retrieve the navigation tree, answering 304 when the client's ETag still matches.
+            """
+            body, etag = tree_cache.get()
+            resp = Response(body, mimetype='application/json')
+            resp.set_etag(etag)
+            resp.headers['Cache-Control'] = 'no-cache'  # always revalidate, a 304 is cheap
+            return resp.make_conditional(request)
+
+    api.add_resource(_TREE, '/tree')
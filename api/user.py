@@ -3,8 +3,10 @@ from flask import Blueprint, request, jsonify, current_app, Response, g
 from flask_restful import Api, Resource  # used for REST API building
 from datetime import datetime
 from __init__ import app
-from api.jwt_authorize import token_required
+from api.jwt_authorize import token_required, identity_cache
 from model.user import User
+from model.password import password_hasher, HashingOverloaded
+from api.http_client import http_client
 
 # Create a Blueprint for the user API
 user_api = Blueprint('user_api', __name__, url_prefix='/api')
@@ -23,7 +25,7 @@ class UserAPI:
 
         def post(self):
             """
-            Handle bulk user creation by sending POST requests to the single user endpoint.
+            Handle bulk user creation with a single validation pass and batched inserts.
             """
             users = request.get_json()
 
@@ -32,41 +34,62 @@ class UserAPI:
 
             results = {'errors': [], 'success_count': 0, 'error_count': 0}
 
-            with current_app.test_client() as client:
-                for user in users:
+            # Validate every row up front with the same rules as the single user endpoint
+            rows = []
+            for user in users:
+                name = user.get('name') if isinstance(user, dict) else None
+                uid = user.get('uid') if isinstance(user, dict) else None
+                if name is None or len(name) < 2:
+                    results['errors'].append({'message': 'Name is missing, or is less than 2 characters'})
+                elif uid is None or len(uid) < 2:
+                    results['errors'].append({'message': 'User ID is missing, or is less than 2 characters'})
+                else:
                     # Set a default password as we don't have it for bulk creation
-                    user["password"] = app.config['DEFAULT_PASSWORD']
+                    rows.append({'name': name, 'uid': uid, 'password': app.config['DEFAULT_PASSWORD'], 'pfp': user.get('pfp', '')})
 
-                    # Simulate a POST request to the single user creation endpoint
-                    response = client.post('/api/user', json=user)
-
-                    if response.status_code == 200:
-                        results['success_count'] += 1
-                    else:
-                        results['errors'].append(response.get_json())
-                        results['error_count'] += 1
+            created, errors = User.bulk_create(rows)
+            results['success_count'] = created
+            results['errors'].extend(errors)
+            results['error_count'] = len(results['errors'])
 
             return jsonify(results)
         
         @token_required()
         def get(self):
             """
-            Retrieve all users.
+            Retrieve users, optionally one keyset page at a time.
+
+            Query parameters:
+            - after_id: only return users with a greater id
+            - limit: page size, when present the response also carries next_after_id
+            - fields: comma separated keys to return, e.g. "uid,name" skips the class lookup
             """
             current_user = g.current_user
-            users = User.query.all()  # extract all users from the database
+            after_id = request.args.get('after_id', type=int)
+            limit = request.args.get('limit', type=int)
+            fields = request.args.get('fields')
+            fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+            if limit is not None and limit < 1:
+                return {'message': 'Limit must be a positive integer'}, 400
+
+            # Access control needs the id even when the caller did not ask for it
+            read_fields = fields if fields is None or 'id' in fields else ['id'] + fields
+            users, next_after_id = User.read_page(after_id=after_id, limit=limit, fields=read_fields)
 
             # Prepare a JSON list of user dictionaries
             json_ready = []
-            for user in users:
-                user_data = user.read()
-                if current_user.role == 'Admin' or current_user.id == user.id:
+            for user_data in users:
+                if current_user.role == 'Admin' or current_user.id == user_data['id']:
                     user_data['access'] = ['rw']  # read-write access control
                 else:
                     user_data['access'] = ['ro']  # read-only access control
+                if read_fields is not fields:
+                    user_data.pop('id')
                 json_ready.append(user_data)
 
-            return jsonify(json_ready)
+            if after_id is None and limit is None:
+                return jsonify(json_ready)
+            return jsonify({'users': json_ready, 'next_after_id': next_after_id})
 
     class _CRUD(Resource):
         """
@@ -89,8 +112,8 @@ class UserAPI:
             if uid is None or len(uid) < 2:
                 return {'message': 'User ID is missing, or is less than 2 characters'}, 400
 
-            # Setup minimal USER OBJECT
-            user_obj = User(name=name, uid=uid)
+            # Setup minimal USER OBJECT, the password is hashed once here rather than again in update
+            user_obj = User(name=name, uid=uid, password=body.pop('password', ''))
 
             # Add user to database
             user = user_obj.create(body)  # pass the body elements to be saved in the database
@@ -212,6 +235,11 @@ class UserAPI:
                     samesite='None'
                 )
                 return resp
+            except HashingOverloaded as e:
+                return {
+                    "error": "Service Unavailable",
+                    "message": str(e)
+                }, 503
             except Exception as e:
                 return {
                     "error": "Something went wrong",
@@ -244,6 +272,22 @@ class UserAPI:
             except Exception as e:
                 return {"message": "Failed to invalidate token", "error": str(e)}, 500
 
+    class _METRICS(Resource):
+        """
+        Authentication and outbound HTTP metrics for this worker process.
+        """
+        @token_required("Admin")
+        def get(self):
+            """
+            Return identity cache hit/miss counters, password hashing latency and queue wait, and
+            outbound HTTP cache/retry/breaker counters.
+            """
+            return jsonify({
+                "identity_cache": identity_cache.stats(),
+                "password_hashing": password_hasher.stats(),
+                "outbound_http": http_client.stats()
+            })
+
     class _ID(Resource):  # Individual identification API operation
         @token_required()
         def get(self):
@@ -256,3 +300,4 @@ api.add_resource(UserAPI._BULK_CRUD, '/users')
 api.add_resource(UserAPI._CRUD, '/user')
 api.add_resource(UserAPI._LEADERBOARD, '/leaderboard')  # NEW Leaderboard endpoint
 api.add_resource(UserAPI._Security, '/authenticate')
+api.add_resource(UserAPI._METRICS, '/user/metrics')
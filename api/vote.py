@@ -2,10 +2,10 @@ import jwt
 from flask import Blueprint, request, jsonify, g
 from flask_restful import Api, Resource  # used for REST API building
 from datetime import datetime
-from __init__ import app
+from __init__ import app, db
 from api.jwt_authorize import token_required
 from model.post import Post
-from model.vote import Vote
+from model.vote import Vote, PostVoteCount
 
 # Define the Blueprint for the Vote API
 vote_api = Blueprint('vote_api', __name__, url_prefix='/api')
@@ -24,6 +24,8 @@ class VoteAPI:
         def post(self):
             """
             Create or update a vote (upvote or downvote) for a post.
+
+            Pass "toggle": true to remove the vote when the same type is sent again.
             """
             # Get current user from the token
             current_user = g.current_user
@@ -38,20 +40,19 @@ class VoteAPI:
             if 'vote_type' not in data or data['vote_type'] not in ['upvote', 'downvote']:
                 return {'message': 'Vote type must be "upvote" or "downvote"'}, 400
 
-            # Check if the vote already exists for the user on the post
-            existing_vote = Vote.query.filter_by(_post_id=data['post_id'], _user_id=current_user.id).first()
-            if existing_vote:
-                # Update the existing vote type
-                existing_vote._vote_type = data['vote_type']
-                existing_vote.create()  # This will commit the update
-                return jsonify(existing_vote.read())
-
-            # Create a new vote object
-            vote = Vote(data['vote_type'], current_user.id, data['post_id'])
-            # Save the vote using the ORM method
-            vote.create()
-            # Return the saved vote in JSON format
-            return jsonify(vote.read())
+            # INSERT IGNORE turns a missing post into a warning on MySQL, so check it first
+            if db.session.query(Post.id).filter(Post.id == data['post_id']).first() is None:
+                return {'message': 'Post not found'}, 404
+
+            # Upsert on the (post, user) unique index, toggle removes a vote sent twice
+            toggle = data.get('toggle') in (True, 1, '1', 'true', 'True')
+            vote_type = Vote.cast(current_user.id, data['post_id'], data['vote_type'], toggle=toggle)
+            return jsonify({
+                "vote_type": vote_type,
+                "user_id": current_user.id,
+                "post_id": data['post_id'],
+                "removed": vote_type is None
+            })
 
         @token_required()
         def delete(self):
@@ -67,19 +68,17 @@ class VoteAPI:
             if not data or 'post_id' not in data:
                 return {'message': 'Post ID is required'}, 400
 
-            # Find the vote by user and post
-            vote = Vote.query.filter_by(_post_id=data['post_id'], _user_id=current_user.id).first()
-            if vote is None:
+            # Delete the vote by user and post
+            if not Vote.retract(current_user.id, data['post_id']):
                 return {'message': 'Vote not found'}, 404
-
-            # Delete the vote
-            vote.delete()
             return jsonify({"message": "Vote removed"})
 
     class _POST_VOTES(Resource):
         def get(self):
             """
             Retrieve all votes for a specific post, including counts of upvotes and downvotes.
+
+            Pass ?counts_only=1 to answer from the materialized counters without loading any votes.
             """
             # Attempt to get post_id from query parameters first
             post_id = request.args.get('post_id')
@@ -95,6 +94,13 @@ class VoteAPI:
             if not post_id:
                 return {'message': 'Post ID is required'}, 400
 
+            if request.args.get('counts_only') in ('1', 'true', 'True'):
+                try:
+                    post_id = int(post_id)
+                except (TypeError, ValueError):
+                    return {'message': 'Post ID must be an integer'}, 400
+                return jsonify(PostVoteCount.read_many([post_id])[0])
+
             # Get all votes for the post
             votes = Vote.query.filter_by(_post_id=post_id).all()
             upvotes = [vote.read() for vote in votes if vote._vote_type == 'upvote']
@@ -109,10 +115,28 @@ class VoteAPI:
             }
             return jsonify(result)
 
+    class _COUNTS(Resource):
+        def get(self):
+            """
+            Retrieve up/down vote counts for many posts in one query, e.g. /api/vote/counts?post_ids=1,2,3
+            """
+            post_ids = request.args.get('post_ids', '')
+            try:
+                post_ids = [int(post_id) for post_id in post_ids.split(',') if post_id.strip()]
+            except ValueError:
+                return {'message': 'post_ids must be a comma separated list of integers'}, 400
+            if not post_ids:
+                return {'message': 'post_ids is required'}, 400
+            if len(post_ids) > 500:
+                return {'message': 'At most 500 post ids can be requested at once'}, 400
+            return jsonify(PostVoteCount.read_many(post_ids))
+
     """
     Map the _CRUD and _POST_VOTES classes to the API endpoints for /vote and /vote/post.
     - The _CRUD class defines the HTTP methods for voting (post and delete).
     - The _POST_VOTES class defines the endpoint for retrieving all votes for a specific post.
+    - The _COUNTS class defines the endpoint for retrieving vote counts for a list of posts.
     """
     api.add_resource(_CRUD, '/vote')
     api.add_resource(_POST_VOTES, '/vote/post')
+    api.add_resource(_COUNTS, '/vote/counts')
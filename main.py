@@ -14,12 +14,14 @@ from flask_login import current_user, login_required
 from flask import current_app
 from werkzeug.security import generate_password_hash
 import shutil
+import click
+from datetime import date, datetime, timedelta
+from sqlalchemy import inspect, text
 from flask_cors import CORS  # Import CORS
 from flask import Blueprint, jsonify
 from api.flashcard_import import flashcard_import_api
 from model.channel import Channel
 from api.deck import deck_api
-import random
 
 
 # import "objects" from "this" project
@@ -39,36 +41,50 @@ from api.flashcard import flashcard_api
 from api.vote import vote_api
 from api.studylog import studylog_api
 from api.gradelog import gradelog_api
+from api.analytics import analytics_api
+from api.projection import projection_api
 from api.profile import profile_api
 from api.tips import tips_api
 from api.leaderboard import leaderboard_api
+from api.tree import tree_api
+from api.review import review_api
+from api.quiz import quiz_api
 
 
 
 
 # database Initialization functions
+from model.password import HashingOverloaded
 from model.user import User, initUsers
 from model.section import Section, initSections
 from model.group import Group, initGroups
 from model.channel import Channel, initChannels
 from model.post import Post, initPosts
 from model.nestPost import NestPost, initNestPosts
-from model.vote import Vote, initVotes
+from model.vote import Vote, PostVoteCount, initVotes
 from model.flashcard import Flashcard, initFlashcards
 from model.studylog import StudyLog, initStudyLog
 from model.gradelog import initGradeLog
 from model.profiles import Profile, initProfiles
 from model.chatlog import ChatLog, initChatLogs
 from model.gradelog import GradeLog
+from model.analytics import initAnalytics
+from model.image import initImageVariants
+from model.blob import Blob, blob_key, blob_path, initBlobs, is_blob_name
+from model.storage import storage
+from model.projection import GradeProjection
 from model.deck import Deck, initDecks
+from model.review import initReviewStates
+from model.question import Question, initQuestions
 
-from model.leaderboard import LeaderboardEntry, initLeaderboard
+from model.leaderboard import LeaderboardEntry, LeaderboardRollup, WINDOWS, initLeaderboard, leaderboard
 # server only Views
 
 # register URIs for API endpoints
 app.register_blueprint(messages_api)
 app.register_blueprint(user_api)
 app.register_blueprint(pfp_api) 
+# post_api (/api/post, /api/posts, the /api/posts/filter and /api/post/user cursor feeds) is not served, scripts/check_post_feed.py registers it to test the feeds
 # app.register_blueprint(post_api)
 app.register_blueprint(channel_api)
 app.register_blueprint(group_api)
@@ -80,10 +96,15 @@ app.register_blueprint(flashcard_api)
 app.register_blueprint(flashcard_import_api)
 app.register_blueprint(studylog_api)
 app.register_blueprint(gradelog_api)
+app.register_blueprint(analytics_api)
+app.register_blueprint(projection_api)
 app.register_blueprint(profile_api)
 app.register_blueprint(tips_api)
 app.register_blueprint(deck_api)
 app.register_blueprint(leaderboard_api)
+app.register_blueprint(tree_api)
+app.register_blueprint(review_api)
+app.register_blueprint(quiz_api)
 
 
 
@@ -173,6 +194,10 @@ def get_grade_progress(user_id):
 def page_not_found(e):
     return render_template('404.html'), 404
 
+@app.errorhandler(HashingOverloaded)
+def hashing_overloaded(e):
+    return jsonify({'message': str(e), 'error': 'Service Unavailable'}), 503
+
 @app.route('/')
 def index():
     print("Home:", current_user)
@@ -181,17 +206,33 @@ def index():
 @app.route('/users/table')
 @login_required
 def utable():
-    users = User.query.all()
+    users, _ = User.read_page(
+        after_id=request.args.get('after_id', type=int),
+        limit=request.args.get('limit', type=int),
+        fields=['id', 'name', 'uid', 'role', 'pfp']
+    )
     return render_template("utable.html", user_data=users)
 
 @app.route('/users/table2')
 @login_required
 def u2table():
-    users = User.query.all()
+    users, _ = User.read_page(
+        after_id=request.args.get('after_id', type=int),
+        limit=request.args.get('limit', type=int),
+        fields=['id', 'uid', 'name', 'email', 'role', 'pfp']
+    )
     return render_template("u2table.html", user_data=users)
 
 @app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
+    # Pictures in the blob store are still linked as <uid>/<pfp>
+    name = os.path.basename(filename)
+    if is_blob_name(name):
+        url = storage.url(blob_key(name))
+        if url:
+            return redirect(url)
+        path = blob_path(name)
+        return send_from_directory(os.path.dirname(path), os.path.basename(path))
     return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
 
 @app.route('/users/delete/<int:user_id>', methods=['DELETE'])
@@ -240,6 +281,157 @@ def generate_data():
     initProfiles()
     initStudyLog()
     initLeaderboard()
+    initReviewStates()
+    initQuestions()
+
+
+@custom_cli.command('add_columns')
+def add_columns():
+    """
+    Adds columns declared on the models that are missing from existing tables, e.g.
+    leaderboard.created_at, db.create_all only creates whole tables. Run it before
+    create_indexes when upgrading a database, running it again changes nothing. Rows already
+    in the table get NULL in the new column.
+    """
+    with app.app_context():
+        inspector = inspect(db.engine)
+        tables = set(inspector.get_table_names())
+        with db.engine.begin() as connection:
+            quote = connection.dialect.identifier_preparer
+            for table in db.metadata.sorted_tables:
+                if table.name not in tables:
+                    continue  # db.create_all makes it whole
+                present = {column['name'] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in present:
+                        continue
+                    if not column.nullable and column.server_default is None:
+                        print(f"Column skipped: {table.name}.{column.name} is NOT NULL without a server default, add it by hand")
+                        continue
+                    column_type = column.type.compile(dialect=connection.dialect)
+                    connection.execute(text(
+                        f"ALTER TABLE {quote.format_table(table)} ADD COLUMN {quote.format_column(column)} {column_type}"
+                    ))
+                    print(f"Column added: {table.name}.{column.name}")
+
+
+@custom_cli.command('create_indexes')
+def create_indexes():
+    """
+    Creates indexes declared on the models that are missing from an existing database,
+    db.create_all only adds them when a table is first created. Run add_columns first, some
+    indexes cover columns added after their table was created.
+    """
+    with app.app_context():
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+                print(f"Index ensured: {index.name}")
+
+
+@custom_cli.command('reconcile_votes')
+def reconcile_votes():
+    """
+    Removes duplicate votes left from before the (post, user) unique index, then recomputes
+    the post_vote_counts counters from the votes table.
+    """
+    with app.app_context():
+        db.create_all()
+        removed = Vote.remove_duplicates()
+        print(f"Duplicate votes removed: {removed}")
+        count = PostVoteCount.reconcile()
+        print(f"Vote counters reconciled for {count} posts")
+
+
+@custom_cli.command('seed_reviews')
+def seed_reviews():
+    """
+    Schedules every flashcard without a review state, needed once for cards created before
+    the review queue existed.
+    """
+    initReviewStates()
+
+
+@custom_cli.command('rebuild_analytics')
+def rebuild_analytics():
+    """
+    Rebuilds the weekly and monthly study and grade rollups from the log tables, needed once for
+    logs written before the rollups existed.
+    """
+    initAnalytics()
+
+
+@custom_cli.command('process_images')
+def process_images():
+    """
+    Makes the resized variants of profile and post pictures that have none, needed once for
+    images uploaded before variants existed, and to catch up on jobs lost with a worker. Also
+    removes duplicate variant rows, run it before create_indexes when upgrading a database.
+    """
+    initImageVariants()
+
+
+@custom_cli.command('migrate_uploads')
+def migrate_uploads():
+    """
+    Moves profile and post pictures stored per user into the content-addressed blob store,
+    needed once for pictures uploaded before the blob store existed.
+    """
+    initBlobs()
+
+
+@custom_cli.command('gc_uploads')
+@click.option('--grace-hours', default=24, help='Keep unreferenced blobs uploaded in the last GRACE_HOURS hours.')
+def gc_uploads(grace_hours):
+    """
+    Recounts the references to every blob, then removes blobs that no user or post references
+    and stored objects left without a blob row.
+    """
+    with app.app_context():
+        db.create_all()
+        count = Blob.reconcile()
+        print(f"Blob references recounted: {count}")
+        removed, freed = Blob.collect(grace=timedelta(hours=grace_hours))
+        print(f"Unreferenced blobs removed: {removed} ({freed} bytes)")
+
+
+@custom_cli.command('project_grades')
+@click.option('--term-end', default=None, help='Project to this date (YYYY-MM-DD) instead of GRADE_TERM_END.')
+def project_grades(term_end):
+    """
+    Recomputes the projected end-of-term grade of every user and subject from grade_logs.
+    Scheduled by the projections service in docker-compose.yml.
+    """
+    with app.app_context():
+        db.create_all()
+        count = GradeProjection.compute(term_end=date.fromisoformat(term_end) if term_end else None)
+        print(f"Grade projections computed: {count}")
+
+
+@custom_cli.command('rollup_leaderboard')
+@click.option('--days', default=7, help='Fold in entries saved in the last DAYS days.')
+def rollup_leaderboard(days):
+    """
+    Folds recent leaderboard entries into the daily and weekly rollups, for entries written
+    without the model, e.g. with bulk inserts.
+    """
+    with app.app_context():
+        db.create_all()
+        count = LeaderboardRollup.rebuild(since=datetime.utcnow() - timedelta(days=days))
+        db.session.commit()
+        print(f"Leaderboard rollup rows written: {count}")
+
+
+@custom_cli.command('compact_leaderboard')
+@click.option('--days', default=30, help='Compact entries older than DAYS days.')
+def compact_leaderboard(days):
+    """
+    Rolls up leaderboard entries older than the cutoff and deletes all but each player's best.
+    """
+    with app.app_context():
+        db.create_all()
+        removed = LeaderboardEntry.compact(datetime.utcnow() - timedelta(days=days))
+        print(f"Leaderboard entries compacted: {removed}")
 
 
 def backup_database(db_uri, backup_uri):
@@ -432,104 +624,20 @@ def get_data():
     ]
     return jsonify(InfoDb)
 
-question_pool = [
-    {"id": 1, "text": "Who was the first President of the United States?", "options": ["George Washington", "Thomas Jefferson", "John Adams", "James Madison"], "correctAnswer": "George Washington"},
-    {"id": 2, "text": "What year did the American Revolutionary War end?", "options": ["1776", "1781", "1783", "1791"], "correctAnswer": "1783"},
-    {"id": 3, "text": "What was the primary purpose of the Declaration of Independence?", "options": ["To declare war on Britain", "To establish a federal government", "To explain the reasons for American independence", "To create a constitution"], "correctAnswer": "To explain the reasons for American independence"},
-    {"id": 4, "text": "Which battle is considered the turning point of the American Civil War?", "options": ["Battle of Antietam", "Battle of Gettysburg", "Battle of Fort Sumter", "Battle of Vicksburg"], "correctAnswer": "Battle of Gettysburg"},
-    {"id": 5, "text": "Who wrote the 'Star-Spangled Banner' during the War of 1812?", "options": ["Francis Scott Key", "Thomas Paine", "Paul Revere", "John Quincy Adams"], "correctAnswer": "Francis Scott Key"},
-    {"id": 6, "text": "What was the main reason for the Louisiana Purchase?", "options": ["To expand westward", "To secure navigation rights on the Mississippi River", "To establish trade with Mexico", "To claim Alaska"], "correctAnswer": "To secure navigation rights on the Mississippi River"},
-    {"id": 7, "text": "Which event marked the start of the Great Depression?", "options": ["Stock Market Crash of 1929", "World War I", "Dust Bowl", "New Deal"], "correctAnswer": "Stock Market Crash of 1929"},
-    {"id": 8, "text": "What was the purpose of the Emancipation Proclamation?", "options": ["To free slaves in Confederate states", "To end the Civil War", "To grant voting rights to African Americans", "To create a constitutional amendment"], "correctAnswer": "To free slaves in Confederate states"},
-    {"id": 9, "text": "What was the significance of the Seneca Falls Convention of 1848?", "options": ["It launched the women's suffrage movement", "It ended slavery in the United States", "It marked the beginning of the abolitionist movement", "It established labor unions"], "correctAnswer": "It launched the women's suffrage movement"},
-    {"id": 10, "text": "What was the main goal of the Marshall Plan?", "options": ["To rebuild European economies after World War II", "To contain communism in Asia", "To establish NATO", "To rebuild Japan's military"], "correctAnswer": "To rebuild European economies after World War II"},
-    {"id": 11, "text": "Which Supreme Court case established judicial review?", "options": ["Marbury v. Madison", "McCulloch v. Maryland", "Dred Scott v. Sandford", "Brown v. Board of Education"], "correctAnswer": "Marbury v. Madison"},
-    {"id": 12, "text": "What was the main cause of the Mexican-American War?", "options": ["Border disputes over Texas", "Annexation of California", "Desire to acquire New Mexico", "Clash over Oregon territory"], "correctAnswer": "Border disputes over Texas"},
-    {"id": 13, "text": "Which amendment abolished slavery in the United States?", "options": ["13th Amendment", "14th Amendment", "15th Amendment", "19th Amendment"], "correctAnswer": "13th Amendment"},
-    {"id": 14, "text": "What was the primary purpose of the Monroe Doctrine?", "options": ["To prevent European colonization in the Americas", "To establish trade agreements with Europe", "To create alliances in Asia", "To defend against Native American attacks"], "correctAnswer": "To prevent European colonization in the Americas"},
-    {"id": 15, "text": "Which territory was acquired as a result of the Spanish-American War?", "options": ["Puerto Rico", "Hawaii", "Alaska", "Texas"], "correctAnswer": "Puerto Rico"},
-    {"id": 16, "text": "Who was the President during the Louisiana Purchase?", "options": ["Thomas Jefferson", "James Madison", "John Adams", "George Washington"], "correctAnswer": "Thomas Jefferson"},
-    {"id": 17, "text": "What was the primary goal of the Freedmen's Bureau?", "options": ["To help former slaves and poor whites", "To establish segregation laws", "To create northern industries", "To rebuild the southern economy"], "correctAnswer": "To help former slaves and poor whites"},
-    {"id": 18, "text": "Which event led directly to the start of the American Revolution?", "options": ["Boston Tea Party", "Stamp Act", "Boston Massacre", "Intolerable Acts"], "correctAnswer": "Intolerable Acts"},
-    {"id": 19, "text": "What was the significance of the Battle of Yorktown?", "options": ["It ended the Revolutionary War", "It began the Civil War", "It was a turning point in World War I", "It marked the end of the French and Indian War"], "correctAnswer": "It ended the Revolutionary War"},
-    {"id": 20, "text": "Which President issued the New Deal during the Great Depression?", "options": ["Franklin D. Roosevelt", "Herbert Hoover", "Harry S. Truman", "Woodrow Wilson"], "correctAnswer": "Franklin D. Roosevelt"},
-    {"id": 21, "text": "What was the goal of the Sherman Antitrust Act?", "options": ["To prevent monopolies and promote competition", "To establish labor unions", "To regulate stock markets", "To create income taxes"], "correctAnswer": "To prevent monopolies and promote competition"},
-    {"id": 22, "text": "Who was the author of 'Common Sense'?", "options": ["Thomas Paine", "Benjamin Franklin", "John Locke", "Alexander Hamilton"], "correctAnswer": "Thomas Paine"},
-    {"id": 23, "text": "Which treaty ended the Mexican-American War?", "options": ["Treaty of Guadalupe Hidalgo", "Treaty of Paris", "Adams-Onís Treaty", "Jay Treaty"], "correctAnswer": "Treaty of Guadalupe Hidalgo"},
-    {"id": 24, "text": "Which President is associated with the Trail of Tears?", "options": ["Andrew Jackson", "Martin Van Buren", "James Monroe", "Zachary Taylor"], "correctAnswer": "Andrew Jackson"},
-    {"id": 25, "text": "Which war was fought between the U.S. and Britain in the early 19th century?", "options": ["War of 1812", "Mexican-American War", "Spanish-American War", "World War I"], "correctAnswer": "War of 1812"},
-
-    {"id": 26, "text": "Which treaty ended the Revolutionary War?", "options": ["Treaty of Paris", "Treaty of Versailles", "Jay's Treaty", "Treaty of Ghent"], "correctAnswer": "Treaty of Paris"},
-    {"id": 27, "text": "Who was the leader of the Confederate Army during the Civil War?", "options": ["Robert E. Lee", "Ulysses S. Grant", "Stonewall Jackson", "Jefferson Davis"], "correctAnswer": "Robert E. Lee"},
-    {"id": 28, "text": "What was the primary goal of the abolitionist movement?", "options": ["To end slavery", "To expand suffrage", "To promote industrialization", "To defend states' rights"], "correctAnswer": "To end slavery"},
-    {"id": 29, "text": "What was the significance of the Homestead Act of 1862?", "options": ["It provided free land to settlers in the West", "It ended Reconstruction", "It promoted the growth of railroads", "It abolished slavery"], "correctAnswer": "It provided free land to settlers in the West"},
-    {"id": 30, "text": "Which economic policy was promoted by Alexander Hamilton?", "options": ["A strong central bank", "Laissez-faire capitalism", "Agrarian-based economy", "Free trade with Britain"], "correctAnswer": "A strong central bank"},
-    {"id": 31, "text": "What was the primary purpose of the Gadsden Purchase?", "options": ["To build a southern transcontinental railroad", "To annex California", "To establish Texas' borders", "To acquire Oregon"], "correctAnswer": "To build a southern transcontinental railroad"},
-    {"id": 32, "text": "What was the main effect of the Compromise of 1850?", "options": ["It allowed California to enter as a free state", "It started the Civil War", "It ended Reconstruction", "It established popular sovereignty in the North"], "correctAnswer": "It allowed California to enter as a free state"},
-    {"id": 33, "text": "Who was the main author of the U.S. Constitution?", "options": ["James Madison", "Alexander Hamilton", "Thomas Jefferson", "George Washington"], "correctAnswer": "James Madison"},
-    {"id": 34, "text": "What was the significance of the Dred Scott v. Sandford case?", "options": ["It ruled that African Americans could not be U.S. citizens", "It ended segregation", "It granted voting rights to women", "It established judicial review"], "correctAnswer": "It ruled that African Americans could not be U.S. citizens"},
-    {"id": 35, "text": "What was the main purpose of the Federalist Papers?", "options": ["To promote the ratification of the Constitution", "To establish the Bill of Rights", "To outline states' rights", "To end the Revolutionary War"], "correctAnswer": "To promote the ratification of the Constitution"},
-    {"id": 36, "text": "What did the Kansas-Nebraska Act of 1854 do?", "options": ["Allowed popular sovereignty to decide slavery", "Ended slavery in the U.S.", "Granted voting rights to women", "Created new railroads"], "correctAnswer": "Allowed popular sovereignty to decide slavery"},
-    {"id": 37, "text": "What was the primary reason for the War of 1812?", "options": ["British impressment of American sailors", "U.S. expansion into Mexico", "Conflict over the Louisiana Purchase", "Spanish interference in trade"], "correctAnswer": "British impressment of American sailors"},
-    {"id": 38, "text": "Who were the main laborers on the Transcontinental Railroad?", "options": ["Chinese and Irish immigrants", "Slaves and Native Americans", "Freedmen and women", "Mexicans and Canadians"], "correctAnswer": "Chinese and Irish immigrants"},
-    {"id": 39, "text": "Which event is associated with the start of the women's suffrage movement?", "options": ["Seneca Falls Convention", "Montgomery Bus Boycott", "The New Deal", "The Great Migration"], "correctAnswer": "Seneca Falls Convention"},
-    {"id": 40, "text": "What was the purpose of the Proclamation of 1763?", "options": ["To limit colonial expansion west of the Appalachians", "To establish new taxes on tea", "To create a trade alliance with Spain", "To declare war on France"], "correctAnswer": "To limit colonial expansion west of the Appalachians"},
-    {"id": 41, "text": "What did the 19th Amendment achieve?", "options": ["Granted women the right to vote", "Abolished slavery", "Limited presidential terms", "Guaranteed freedom of speech"], "correctAnswer": "Granted women the right to vote"},
-    {"id": 42, "text": "Which President is known for the Square Deal?", "options": ["Theodore Roosevelt", "Franklin D. Roosevelt", "Woodrow Wilson", "William Taft"], "correctAnswer": "Theodore Roosevelt"},
-    {"id": 43, "text": "What was the goal of the Civilian Conservation Corps (CCC)?", "options": ["To create jobs during the Great Depression", "To end slavery", "To promote women's suffrage", "To build the Transcontinental Railroad"], "correctAnswer": "To create jobs during the Great Depression"},
-    {"id": 44, "text": "Which treaty ended World War I?", "options": ["Treaty of Versailles", "Treaty of Paris", "Treaty of Ghent", "Treaty of Guadalupe Hidalgo"], "correctAnswer": "Treaty of Versailles"},
-    {"id": 45, "text": "What was the purpose of the Fugitive Slave Act?", "options": ["To require the return of escaped slaves to their owners", "To abolish slavery in the North", "To create abolitionist societies", "To protect freed slaves in the South"], "correctAnswer": "To require the return of escaped slaves to their owners"},
-    {"id": 46, "text": "What was the primary goal of the Lewis and Clark Expedition?", "options": ["To explore the Louisiana Territory", "To establish settlements in Oregon", "To expand the railroad system", "To negotiate with Native American tribes"], "correctAnswer": "To explore the Louisiana Territory"},
-    {"id": 47, "text": "Who was the President during the Cuban Missile Crisis?", "options": ["John F. Kennedy", "Dwight D. Eisenhower", "Lyndon B. Johnson", "Richard Nixon"], "correctAnswer": "John F. Kennedy"},
-    {"id": 48, "text": "What was the main reason for the Salem Witch Trials?", "options": ["Religious hysteria and social tensions", "A Native American uprising", "Political corruption", "A lack of education"], "correctAnswer": "Religious hysteria and social tensions"},
-    {"id": 49, "text": "What was the purpose of the Social Security Act of 1935?", "options": ["To provide financial assistance to the elderly and unemployed", "To regulate labor unions", "To fund public education", "To establish a minimum wage"], "correctAnswer": "To provide financial assistance to the elderly and unemployed"},
-    {"id": 50, "text": "Which amendment gave African American men the right to vote?", "options": ["15th Amendment", "13th Amendment", "14th Amendment", "19th Amendment"], "correctAnswer": "15th Amendment"}
-]
 
    
-# Leaderboard data stored in memory
-leaderboard = []  # A list to store user names and their scores.
-
-# Route to fetch 10 random questions from the question pool
-@app.route('/api/quiz/apush', methods=['GET'])  # Endpoint to get APUSH quiz questions.
-def get_questions():
-    selected_questions = random.sample(question_pool, 10)  # Pick 10 random questions from the pool.
-    sanitized_questions = [  # Remove the correctAnswer field so users can't see the answers.
-        {key: value for key, value in q.items() if key != "correctAnswer"} 
-        for q in selected_questions
-    ]
-    return jsonify(sanitized_questions), 200  # Send sanitized questions as JSON with HTTP 200 (success).
-
-# Route to handle quiz submissions
-@app.route('/api/quiz/apush/submit', methods=['POST'])  # Endpoint to submit quiz answers.
-def submit_quiz():
-    data = request.json  # Get JSON data from the request.
-    answers = data.get('answers', [])  # Get the user's answers or an empty list if none provided.
-    user_name = data.get('name', 'Anonymous')  # Get the user's name or default to "Anonymous".
-
-    score = 0  # Initialize the user's score to zero.
-    for answer in answers:  # Loop through each answer submitted by the user.
-        question = next(  # Find the matching question in the question pool.
-            (q for q in question_pool if q["id"] == answer["questionId"]), 
-            None
-        )
-        if question and question["correctAnswer"] == answer["answer"]:  # Check if the answer is correct.
-            score += 1  # Add 1 to the score for each correct answer.
-
-    leaderboard.append({"name": user_name, "score": score})  # Add the user's name and score to the leaderboard.
-    LeaderboardEntry(name=user_name, score=score).create()  # Save the user's score to the database.
-    return jsonify({"name": user_name, "score": score}), 200  # Send the user's score as JSON with HTTP 200.
-
 # Route to fetch the leaderboard, sorted by score in descending order
 @app.route('/api/leaderboard/apush', methods=['GET'])  # Endpoint to get the APUSH leaderboard.
 def get_leaderboard():
-    db_leaderboard = []
-    for entry in LeaderboardEntry.query.all():
-        db_leaderboard.append({"name": entry.name, "score": entry.score, "id": entry.id})
-    sorted_leaderboard = sorted(  # Sort the leaderboard by score, highest first.
-       db_leaderboard, key=lambda x: x['score'], reverse=True
-    )
-    return jsonify(sorted_leaderboard), 200  # Send the sorted leaderboard as JSON with HTTP 200.
+    k = min(max(request.args.get('k', default=100, type=int), 1), 100)
+    window = request.args.get('window', 'all')  # all, day or week
+    if window != 'all' and window not in WINDOWS:
+        return jsonify({"error": "Window must be all, day or week"}), 400
+    if window == 'all':
+        top = [{"name": entry["name"], "score": entry["score"], "id": entry["id"]} for entry in leaderboard.top(k)]  # served from the ranked in-memory view
+    else:
+        top = [{"name": entry["name"], "score": entry["score"]} for entry in leaderboard.top(k, window=window)]  # best per player from the rollups
+    return jsonify(top), 200  # Send the sorted leaderboard as JSON with HTTP 200.
 
 
 def remove_duplicates():
@@ -557,6 +665,8 @@ if __name__ == "__main__":
                 initProfiles()
             if not Deck.query.first():  # Initialize decks only if none exist
                 initDecks()
+            if not Question.query.first():  # Initialize the question bank only if it is empty
+                initQuestions()
             remove_duplicates()
             if not ChatLog.query.first(): # Initialize chat logs only if none exist
                 initChatLogs
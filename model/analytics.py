@@ -0,0 +1,263 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import event, func, inspect, select
+from __init__ import app, db
+from model.unit_of_work import commit, rollback
+from model.studylog import StudyLog
+from model.gradelog import GradeLog
+from model.vote import upsert
+
+# Rollup periods, weeks start on Monday, both in UTC
+PERIODS = ('week', 'month')
+
+
+def period_start(period, when):
+    """
+    Returns the first day of the week or month containing when.
+    """
+    day = when.date()
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+class AnalyticsRollup(db.Model):
+    """
+    AnalyticsRollup Model
+
+    Study hours and grade totals of one user, per subject, per week and per month. Every
+    StudyLog and GradeLog write adds its difference to the two rows it falls in, in the same
+    transaction, so the analytics endpoint reads a few rows per period instead of every log.
+
+    Attributes:
+        user_id (db.Column): The user, part of the primary key.
+        period (db.Column): "week" or "month", part of the primary key.
+        period_start (db.Column): First day of the period, part of the primary key.
+        subject (db.Column): The subject, part of the primary key.
+        hours (db.Column): Hours studied.
+        sessions (db.Column): Number of study logs.
+        grade_sum (db.Column): Sum of the grades logged.
+        grade_count (db.Column): Number of grades logged.
+    """
+    __tablename__ = 'analytics_rollups'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    period = db.Column(db.String(8), primary_key=True)
+    period_start = db.Column(db.Date, primary_key=True)
+    subject = db.Column(db.String(100), primary_key=True)
+    hours = db.Column(db.Float, nullable=False, default=0)
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    grade_sum = db.Column(db.Float, nullable=False, default=0)
+    grade_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def apply(connection, user_id, subject, when, hours=0.0, sessions=0, grade_sum=0.0, grade_count=0):
+        """
+        Adds the given amounts, negative to take a log out, to the user's week and month rows
+        on the given connection. Logs without a date are skipped, as in rebuild.
+        """
+        if when is None:
+            return
+        table = AnalyticsRollup.__table__
+        for period in PERIODS:
+            values = {
+                'user_id': user_id, 'period': period, 'period_start': period_start(period, when), 'subject': subject,
+                'hours': hours, 'sessions': sessions, 'grade_sum': grade_sum, 'grade_count': grade_count
+            }
+            update = {
+                'hours': table.c.hours + hours, 'sessions': table.c.sessions + sessions,
+                'grade_sum': table.c.grade_sum + grade_sum, 'grade_count': table.c.grade_count + grade_count
+            }
+            connection.execute(upsert(connection, table, values, update, ['user_id', 'period', 'period_start', 'subject']))
+
+    @staticmethod
+    def rebuild(user_id=None):
+        """
+        Recomputes the rollups from the log tables and commits.
+
+        Logs are grouped by user, subject and day in SQL, the days are then rolled up to weeks
+        and months with pandas. Needed once for logs written before the rollups existed.
+
+        Args:
+            user_id (int, optional): Only rebuild this user's rows.
+
+        Returns:
+            int: Number of rollup rows written.
+        """
+        def daily(model, value):
+            day = func.date(model.date)
+            query = select(
+                model.user_id, model.subject, day.label('day'), func.sum(value), func.count()
+            ).where(model.date.is_not(None)).group_by(model.user_id, model.subject, day)
+            if user_id is not None:
+                query = query.where(model.user_id == user_id)
+            return pd.DataFrame(db.session.execute(query).all(), columns=['user_id', 'subject', 'day', 'total', 'count'])
+
+        study = daily(StudyLog, StudyLog.hours_studied).rename(columns={'total': 'hours', 'count': 'sessions'})
+        grades = daily(GradeLog, GradeLog.grade).rename(columns={'total': 'grade_sum', 'count': 'grade_count'})
+        days = pd.concat([study, grades], ignore_index=True)
+        columns = ['hours', 'sessions', 'grade_sum', 'grade_count']
+        days[columns] = days[columns].fillna(0)
+        days['day'] = pd.to_datetime(days['day'])
+
+        starts = {
+            'week': days['day'] - pd.to_timedelta(days['day'].dt.weekday, unit='D'),
+            'month': days['day'] - pd.to_timedelta(days['day'].dt.day - 1, unit='D')
+        }
+        rows = pd.concat([
+            days.assign(period=period, period_start=start.dt.date)
+            .groupby(['user_id', 'period', 'period_start', 'subject'], as_index=False)[columns].sum()
+            for period, start in starts.items()
+        ], ignore_index=True)
+        rows[['sessions', 'grade_count']] = rows[['sessions', 'grade_count']].astype(int)
+
+        table = AnalyticsRollup.__table__
+        try:
+            statement = table.delete()
+            if user_id is not None:
+                statement = statement.where(table.c.user_id == user_id)
+            db.session.execute(statement)
+            records = rows.to_dict('records')
+            for start in range(0, len(records), 1000):
+                db.session.execute(table.insert(), records[start:start + 1000])
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        return len(records)
+
+    @staticmethod
+    def summary(user_id, weeks=26, months=12, now=None):
+        """
+        Builds a user's study and grade analytics from the rollups with two indexed reads.
+
+        Args:
+            user_id (int): The user.
+            weeks (int): Weeks of weekly hours, including the current one.
+            months (int): Months of monthly hours, including the current one.
+            now (datetime, optional): Defaults to the current UTC time.
+
+        Returns:
+            dict: "hours" by week and by month as chart series per subject, zero filled, and
+                "grades" per subject with the all-time average, count and the weekly trend
+                slope (grade points per week, weighted least squares over weekly averages).
+        """
+        now = now or datetime.utcnow()
+        columns = ['period_start', 'subject', 'hours', 'sessions', 'grade_sum', 'grade_count']
+
+        def read(period, since=None):
+            query = select(
+                AnalyticsRollup.period_start, AnalyticsRollup.subject, AnalyticsRollup.hours,
+                AnalyticsRollup.sessions, AnalyticsRollup.grade_sum, AnalyticsRollup.grade_count
+            ).where(AnalyticsRollup.user_id == user_id, AnalyticsRollup.period == period)
+            if since is not None:
+                query = query.where(AnalyticsRollup.period_start >= since)
+            frame = pd.DataFrame(db.session.execute(query).all(), columns=columns)
+            frame['period_start'] = pd.to_datetime(frame['period_start'])
+            return frame
+
+        first_week = period_start('week', now) - timedelta(weeks=weeks - 1)
+        first_month = (pd.Timestamp(period_start('month', now)) - pd.DateOffset(months=months - 1)).date()
+        weekly = read('week', first_week)
+        monthly = read('month')  # all months, the grade averages are all-time
+
+        def series(frame, periods):
+            table = frame.pivot_table(index='period_start', columns='subject', values='hours', aggfunc='sum', fill_value=0)
+            table = table.reindex(periods, fill_value=0).round(2)
+            return {
+                "periods": [period.date().isoformat() for period in periods],
+                "subjects": {subject: table[subject].tolist() for subject in table.columns}
+            }
+
+        hours = {
+            "week": series(weekly, pd.date_range(first_week, periods=weeks, freq='7D')),
+            "month": series(monthly[monthly['period_start'] >= pd.Timestamp(first_month)], pd.date_range(first_month, periods=months, freq='MS'))
+        }
+
+        totals = monthly.groupby('subject')[['grade_sum', 'grade_count']].sum()
+        totals = totals[totals['grade_count'] > 0]
+        averages = (totals['grade_sum'] / totals['grade_count']).round(2)
+
+        # Weighted least squares slope of weekly average grade against weeks, for every subject at once
+        graded = weekly[weekly['grade_count'] > 0].copy()
+        graded['x'] = (graded['period_start'] - pd.Timestamp(first_week)).dt.days / 7.0
+        graded['y'] = graded['grade_sum'] / graded['grade_count']
+        graded['w'] = graded['grade_count'].astype(float)
+        graded['wx'] = graded['w'] * graded['x']
+        graded['wy'] = graded['w'] * graded['y']
+        graded['wxx'] = graded['wx'] * graded['x']
+        graded['wxy'] = graded['wx'] * graded['y']
+        sums = graded.groupby('subject')[['w', 'wx', 'wy', 'wxx', 'wxy']].sum()
+        denominator = sums['w'] * sums['wxx'] - sums['wx'] ** 2
+        slopes = ((sums['w'] * sums['wxy'] - sums['wx'] * sums['wy']) / denominator.where(denominator > 1e-9)).round(3)
+
+        grades = {}
+        for subject, average in averages.items():
+            slope = slopes.get(subject, np.nan)
+            grades[subject] = {
+                "average": float(average),
+                "count": int(totals.loc[subject, 'grade_count']),
+                "trend_per_week": None if pd.isna(slope) else float(slope)
+            }
+        return {"hours": hours, "grades": grades}
+
+
+def _old(target, name):
+    """
+    Returns the value an attribute had before the pending change.
+    """
+    history = inspect(target).attrs[name].history
+    return history.deleted[0] if history.deleted else getattr(target, name)
+
+
+def _changed(target, names):
+    return any(inspect(target).attrs[name].history.has_changes() for name in names)
+
+
+@event.listens_for(StudyLog, 'after_insert')
+def _add_study(mapper, connection, target):
+    AnalyticsRollup.apply(connection, target.user_id, target.subject, target.date, hours=target.hours_studied or 0, sessions=1)
+
+
+@event.listens_for(StudyLog, 'after_update')
+def _update_study(mapper, connection, target):
+    if not _changed(target, ('user_id', 'subject', 'date', 'hours_studied')):
+        return
+    AnalyticsRollup.apply(connection, _old(target, 'user_id'), _old(target, 'subject'), _old(target, 'date'),
+                          hours=-(_old(target, 'hours_studied') or 0), sessions=-1)
+    AnalyticsRollup.apply(connection, target.user_id, target.subject, target.date, hours=target.hours_studied or 0, sessions=1)
+
+
+@event.listens_for(StudyLog, 'after_delete')
+def _remove_study(mapper, connection, target):
+    AnalyticsRollup.apply(connection, target.user_id, target.subject, target.date, hours=-(target.hours_studied or 0), sessions=-1)
+
+
+@event.listens_for(GradeLog, 'after_insert')
+def _add_grade(mapper, connection, target):
+    AnalyticsRollup.apply(connection, target.user_id, target.subject, target.date, grade_sum=target.grade or 0, grade_count=1)
+
+
+@event.listens_for(GradeLog, 'after_update')
+def _update_grade(mapper, connection, target):
+    if not _changed(target, ('user_id', 'subject', 'date', 'grade')):
+        return
+    AnalyticsRollup.apply(connection, _old(target, 'user_id'), _old(target, 'subject'), _old(target, 'date'),
+                          grade_sum=-(_old(target, 'grade') or 0), grade_count=-1)
+    AnalyticsRollup.apply(connection, target.user_id, target.subject, target.date, grade_sum=target.grade or 0, grade_count=1)
+
+
+@event.listens_for(GradeLog, 'after_delete')
+def _remove_grade(mapper, connection, target):
+    AnalyticsRollup.apply(connection, target.user_id, target.subject, target.date, grade_sum=-(target.grade or 0), grade_count=-1)
+
+
+def initAnalytics():
+    """
+    Creates the analytics_rollups table and builds it from the existing logs.
+    """
+    with app.app_context():
+        db.create_all()
+        count = AnalyticsRollup.rebuild()
+        print(f"Analytics rollup rows created: {count}")
@@ -0,0 +1,335 @@
+import hashlib
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, inspect, select, update
+from __init__ import app, db
+from model.unit_of_work import commit, rollback
+from model.storage import storage
+from model.vote import upsert
+from model.user import User
+from model.nestPost import NestPost
+
+# Blob names are the SHA-256 of the content plus the extension of its image type
+BLOB_NAME = re.compile(r'^([0-9a-f]{64})(\.[a-z0-9]{1,8})$')
+BLOB_FOLDER = 'blobs'
+# Objects under blobs/ start with the hash of their blob: the blob, its variants and .gc copies
+OBJECT_HASH = re.compile(r'^([0-9a-f]{64})[.-]')
+UPLOAD_CHUNK_SIZE = 64 * 1024  # bytes read, hashed and written at a time
+
+
+def is_blob_name(name):
+    return bool(name and BLOB_NAME.match(name))
+
+
+def blob_key(name, filename=None):
+    """
+    Returns the storage key of a blob, or of filename stored next to it, sharded two levels
+    deep on the hash, e.g. blobs/ab/cd/<name>, so no folder grows past a few hundred entries.
+    """
+    return f"{BLOB_FOLDER}/{name[:2]}/{name[2:4]}/{filename or name}"
+
+
+def blob_path(name):
+    """
+    Returns the path of a blob on the server, or None if name is not a blob name or blobs are
+    not kept on the server's filesystem.
+    """
+    if not is_blob_name(name):
+        return None
+    return storage.path(blob_key(name))
+
+
+class BlobWriter:
+    """
+    Writes an upload chunk by chunk to a temporary file under UPLOAD_FOLDER/blobs while hashing
+    it, so an upload of any size costs one chunk of memory. Blob.store_temp then hands the file
+    to the storage backend, a rename for local storage, so readers and concurrent writers of the
+    same content never see a partial file.
+
+    Attributes:
+        path (str): The temporary file.
+        bytes (int): Bytes written so far.
+    """
+    def __init__(self):
+        directory = os.path.join(app.config['UPLOAD_FOLDER'], BLOB_FOLDER)
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        self._file = os.fdopen(fd, 'wb')
+        self._hash = hashlib.sha256()
+        self.bytes = 0
+
+    def write(self, chunk):
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        self.bytes += len(chunk)
+
+    def close(self):
+        """
+        Flushes the file to disk and returns the SHA-256 of the content.
+        """
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        return self._hash.hexdigest()
+
+    def discard(self):
+        """
+        Removes the temporary file unless it was moved into the store.
+        """
+        self._file.close()
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class Blob(db.Model):
+    """
+    Blob Model
+
+    One uploaded file in the content-addressed blob store, kept by the storage backend under
+    blobs/, shared by every user and post that uploaded the same bytes. User.pfp and NestPost image_url hold the blob
+    name, and refcount counts those references, kept in step by mapper events in the same
+    transaction. Unreferenced blobs are removed by the gc_uploads command.
+
+    Attributes:
+        sha256 (db.Column): SHA-256 of the content, the primary key.
+        extension (db.Column): File extension of the image type, e.g. ".jpg".
+        bytes (db.Column): File size.
+        refcount (db.Column): Users and posts referencing the blob.
+        stored_at (db.Column): Last time the content was uploaded, unreferenced blobs are kept for a grace period after it.
+    """
+    __tablename__ = 'blobs'
+    __table_args__ = (
+        db.Index('ix_blobs_refcount_stored_at', 'refcount', 'stored_at'),
+    )
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    extension = db.Column(db.String(8), nullable=False)
+    bytes = db.Column(db.Integer, nullable=False)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    stored_at = db.Column(db.DateTime, nullable=False)
+
+    @property
+    def name(self):
+        return self.sha256 + self.extension
+
+    @staticmethod
+    def store_temp(writer, extension):
+        """
+        Moves an upload written by a BlobWriter into the blob store. Content that is already
+        stored costs one row update, the temporary file is dropped. The row is committed on a
+        connection of its own, so it outlives a unit of work that is rolled back, like the
+        object does, and gc_uploads collects both.
+
+        Args:
+            writer (BlobWriter): The finished upload.
+            extension (str): File extension of its type, e.g. ".jpg".
+
+        Returns:
+            str: The blob name, to be saved on the referencing user or post.
+        """
+        sha256 = writer.close()
+        name = sha256 + extension
+        table = Blob.__table__
+        now = datetime.utcnow()
+        # The row goes first, so gc_uploads sees a fresh stored_at before the file is checked
+        values = {'sha256': sha256, 'extension': extension, 'bytes': writer.bytes, 'refcount': 0, 'stored_at': now}
+        with db.engine.begin() as connection:
+            connection.execute(upsert(connection, table, values, {'stored_at': now}, ['sha256']))
+        key = blob_key(name)
+        if not storage.exists(key):
+            storage.put_file(key, writer.path)
+            writer.path = None
+        return name
+
+    @staticmethod
+    def adjust(connection, name, delta):
+        """
+        Adds delta to a blob's refcount on the given connection, names of files outside the
+        blob store are ignored.
+        """
+        match = BLOB_NAME.match(name or '')
+        if match:
+            table = Blob.__table__
+            connection.execute(
+                update(table).where(table.c.sha256 == match.group(1)).values(refcount=table.c.refcount + delta)
+            )
+
+    @staticmethod
+    def reconcile():
+        """
+        Recomputes every refcount from users and nest posts in one statement, for references
+        written around the mapper events, e.g. by bulk inserts.
+
+        Returns:
+            int: Number of blobs.
+        """
+        table = Blob.__table__
+        name = table.c.sha256 + table.c.extension
+        users = select(func.count()).select_from(User.__table__).where(User.__table__.c._pfp == name).scalar_subquery()
+        posts = select(func.count()).select_from(NestPost.__table__).where(NestPost.__table__.c._image_url == name).scalar_subquery()
+        try:
+            result = db.session.execute(update(table).values(refcount=users + posts))
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        return result.rowcount
+
+    @staticmethod
+    def collect(grace=timedelta(hours=24), now=None):
+        """
+        Removes blobs that nothing references and that were not uploaded within the grace
+        period, with their image variants, objects under blobs/ older than the grace period
+        whose blob has no row, and temporary files left by interrupted writes.
+
+        Each object is first moved aside, then its row is deleted only if it is still
+        unreferenced and old. An upload of the same content in between refreshes stored_at, the
+        delete then matches nothing and the object is moved back. Objects without a row are
+        moved aside the same way and put back if an upload wrote the row meanwhile.
+
+        Returns:
+            tuple: (blobs removed, bytes freed)
+        """
+        from model.image import ImageVariant
+        now = now or datetime.utcnow()
+        cutoff = now - grace
+        table = Blob.__table__
+        candidates = db.session.execute(
+            select(table.c.sha256, table.c.extension, table.c.bytes).where(table.c.refcount <= 0, table.c.stored_at < cutoff)
+        ).all()
+
+        removed, freed = 0, 0
+        for sha256, extension, size in candidates:
+            key = blob_key(sha256 + extension)
+            aside = key + '.gc'
+            present = storage.move(key, aside)
+            try:
+                deleted = db.session.execute(
+                    table.delete().where(table.c.sha256 == sha256, table.c.refcount <= 0, table.c.stored_at < cutoff)
+                ).rowcount
+                commit()
+            except Exception as e:
+                rollback()
+                if present:
+                    storage.move(aside, key)
+                raise e
+            if not deleted:
+                if present:
+                    storage.move(aside, key)
+                continue
+            if present:
+                storage.delete(aside)
+            ImageVariant.remove(sha256 + extension)
+            removed += 1
+            freed += size
+
+        # Objects without a row, e.g. variants finished after their blob was collected
+        objects = [
+            (key, size, OBJECT_HASH.match(key.rsplit('/', 1)[-1]))
+            for key, size, modified in storage.list_objects(BLOB_FOLDER + '/') if modified < cutoff
+        ]
+        objects = [(key, size, match.group(1)) for key, size, match in objects if match]
+        hashes = sorted({sha256 for _, _, sha256 in objects})
+        known = set()
+        for start in range(0, len(hashes), 500):
+            known.update(db.session.scalars(select(table.c.sha256).where(table.c.sha256.in_(hashes[start:start + 500]))))
+        for key, size, sha256 in objects:
+            if sha256 in known:
+                continue
+            aside = key if key.endswith('.gc') else key + '.gc'
+            if aside != key and not storage.move(key, aside):
+                continue
+            # A fresh transaction, so a row committed since the read above is seen
+            with db.engine.connect() as connection:
+                stored = connection.execute(select(table.c.sha256).where(table.c.sha256 == sha256)).first()
+            if stored:
+                if aside != key:
+                    storage.move(aside, key)
+                continue
+            storage.delete(aside)
+            removed += is_blob_name(key.rsplit('/', 1)[-1])
+            freed += size
+
+        # Temporary files of writes that never finished
+        root = os.path.join(app.config['UPLOAD_FOLDER'], BLOB_FOLDER)
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if filename.startswith('.tmp-') and datetime.utcfromtimestamp(os.path.getmtime(path)) < cutoff:
+                    os.unlink(path)
+        return removed, freed
+
+
+def _history(target, name):
+    """
+    Returns (old, new) values of an attribute in the pending change.
+    """
+    history = inspect(target).attrs[name].history
+    old = history.deleted[0] if history.deleted else None
+    return old, getattr(target, name)
+
+
+def _listen(model, attribute):
+    # Load the old value on set even when it is expired, so the old blob is released
+    event.listen(getattr(model, attribute), 'set', lambda target, value, oldvalue, initiator: None, active_history=True)
+
+    @event.listens_for(model, 'after_insert')
+    def _insert(mapper, connection, target):
+        Blob.adjust(connection, getattr(target, attribute), 1)
+
+    @event.listens_for(model, 'after_update')
+    def _update(mapper, connection, target):
+        old, new = _history(target, attribute)
+        if inspect(target).attrs[attribute].history.has_changes() and old != new:
+            Blob.adjust(connection, old, -1)
+            Blob.adjust(connection, new, 1)
+
+    @event.listens_for(model, 'before_delete')
+    def _delete(mapper, connection, target):
+        Blob.adjust(connection, getattr(target, attribute), -1)
+
+
+_listen(User, '_pfp')
+_listen(NestPost, '_image_url')
+
+
+def initBlobs():
+    """
+    Creates the blobs table and moves pictures stored per user, UPLOAD_FOLDER/<uid>/<filename>,
+    into the blob store. Each user and post is pointed at its blob and the old file is removed.
+    """
+    from model.image import ImageRejected, save_upload
+    with app.app_context():
+        db.create_all()
+        users = {user.id: user for user in User.query.all()}
+        references = [(user, '_pfp', user.uid) for user in users.values()]
+        references += [(post, '_image_url', users[post._user_id].uid) for post in NestPost.query.all() if post._user_id in users]
+        moved = 0
+        for owner, attribute, uid in references:
+            filename = getattr(owner, attribute)
+            if not filename or is_blob_name(filename):
+                continue
+            path = os.path.join(app.config['UPLOAD_FOLDER'], uid, filename)
+            if not os.path.isfile(path):
+                continue
+            try:
+                with open(path, 'rb') as legacy_file:
+                    name = save_upload(iter(lambda: legacy_file.read(UPLOAD_CHUNK_SIZE), b''))
+            except ImageRejected as e:
+                print(f"Skipped {uid}/{filename}: {e}")
+                continue
+            try:
+                setattr(owner, attribute, name)
+                commit()
+            except Exception as e:
+                rollback()
+                raise e
+            moved += 1
+            # Files shared by several references are removed with the last of them
+            if not any(getattr(other, attr) == filename and other_uid == uid for other, attr, other_uid in references):
+                os.remove(path)
+        Blob.reconcile()
+        print(f"Pictures moved to the blob store: {moved}")
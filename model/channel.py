@@ -2,6 +2,7 @@
 from sqlite3 import IntegrityError
 from sqlalchemy import Text, JSON
 from __init__ import app, db
+from model.unit_of_work import commit, rollback
 from model.group import Group
 
 class Channel(db.Model):
@@ -70,9 +71,9 @@ class Channel(db.Model):
         """
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
 
     def read(self):
@@ -112,9 +113,9 @@ class Channel(db.Model):
             self._group_id = group_id
 
         try:
-            db.session.commit()
+            commit()
         except IntegrityError:
-            db.session.rollback()
+            rollback()
             return None
         return self
         
@@ -2,6 +2,7 @@
 import logging
 from sqlite3 import IntegrityError
 from __init__ import app, db
+from model.unit_of_work import commit, rollback
 class ChatLog(db.Model):
     __tablename__ = 'chat_logs'
     id = db.Column(db.Integer, primary_key=True)
@@ -30,9 +31,9 @@ class ChatLog(db.Model):
         """
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
     def read(self):
         """
@@ -56,9 +57,9 @@ class ChatLog(db.Model):
             self._response = response
         # Attempt to commit the changes to the database
         try:
-            db.session.commit()
+            commit()
         except IntegrityError:
-            db.session.rollback()
+            rollback()
             logging.warning(f"IntegrityError: Could not update chat log with ID '{self.id}'.")
             return None
         return self
@@ -1,5 +1,7 @@
+from sqlalchemy import delete
 from sqlalchemy.exc import IntegrityError
 from __init__ import db
+from model.unit_of_work import commit, rollback
 from flask import current_app
 from sqlalchemy.orm import relationship
 
@@ -48,18 +50,50 @@ class Deck(db.Model):
     def create(self):
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
             print(f"Deck created: {self.title}")
             return self
         except IntegrityError as e:
-            db.session.rollback()
+            rollback()
             print(f"IntegrityError while creating deck: {e}")
             return None
         except Exception as e:
-            db.session.rollback()
+            rollback()
             print(f"Unexpected error while creating deck: {e}")
             return None
 
+    @staticmethod
+    def create_with_cards(title, user_id, cards):
+        """
+        Creates a deck and all of its flashcards in one transaction, all or nothing.
+
+        Every card is validated before anything is written. Valid input is written with one deck
+        INSERT and one batched flashcard INSERT, then committed once.
+
+        Args:
+            title (str): Title of the deck.
+            user_id (int): Owner of the deck and its cards.
+            cards (list): Dictionaries with "title" and "content" keys.
+
+        Returns:
+            tuple: (deck, errors), deck is None and errors lists each invalid card when validation fails.
+        """
+        from model.flashcard import Flashcard  # imported here, flashcard.py imports this module
+
+        errors = Flashcard.validate_many(cards)
+        if errors:
+            return None, errors
+        deck = Deck(title=title, user_id=user_id)
+        try:
+            db.session.add(deck)
+            db.session.flush()  # assigns deck.id for the cards
+            Flashcard.bulk_insert(cards, user_id=user_id, deck_id=deck.id)
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        return deck, []
+
     # Read method
     def read(self):
         return {
@@ -71,7 +105,24 @@ class Deck(db.Model):
     # Delete method
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
+
+    def purge(self):
+        """
+        Deletes the deck with its flashcards and their review states in one transaction, one
+        DELETE per table, without loading the cards, so a large deck costs three statements.
+        The per card delete events do not fire.
+        """
+        from model.flashcard import Flashcard  # imported here, flashcard.py imports this module
+        from model.review import ReviewState
+        try:
+            db.session.execute(delete(ReviewState).where(ReviewState._deck_id == self.id))
+            db.session.execute(delete(Flashcard).where(Flashcard._deck_id == self.id))
+            db.session.execute(delete(Deck).where(Deck.id == self.id))
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
 
     @staticmethod
     def restore(data):
@@ -2,8 +2,10 @@
 from sqlite3 import IntegrityError
 from sqlalchemy import Text
 from __init__ import app, db
+from model.unit_of_work import commit, rollback
 from model.user import User
 from model.post import Post
+from model.references import resolve_references
 
 class Feedback(db.Model):
     """
@@ -59,9 +61,9 @@ class Feedback(db.Model):
         """
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
         
     def read(self):
@@ -69,20 +71,36 @@ class Feedback(db.Model):
         The read method retrieves the object data from the object's attributes and returns it as a dictionary.
         
         Uses:
-            The Post.query and User.query methods to retrieve the post and user objects.
+            The read_many method, so a single feedback is serialized the same way as a listing.
         
         Returns:
             dict: A dictionary containing the post data, including user and post names.
         """
-        user = User.query.get(self._user_id)
-        post = Post.query.get(self._post_id)
-        data = {
-            "id": self.id,
-            "content": self._content,
-            "user_name": user.name if user else None,
-            "post_title": post.title if post else None,
-        }
-        return data
+        return Feedback.read_many([self])[0]
+
+    @staticmethod
+    def read_many(feedbacks):
+        """
+        Serializes a list of feedbacks, resolving user names and post titles for the whole list at once.
+
+        Uses:
+            One IN query against users and one against posts, regardless of how many feedbacks
+            are passed, instead of two lookups per feedback.
+
+        Args:
+            feedbacks (list): Feedback objects to serialize.
+
+        Returns:
+            list: Dictionaries in the same shape as read().
+        """
+        names = resolve_references(feedbacks, {'_user_id': User._name, '_post_id': Post._title})
+        user_names, post_titles = names['_user_id'], names['_post_id']
+        return [{
+            "id": feedback.id,
+            "content": feedback._content,
+            "user_name": user_names.get(feedback._user_id),
+            "post_title": post_titles.get(feedback._post_id),
+        } for feedback in feedbacks]
     
     def update(self):
         """
@@ -95,9 +113,9 @@ class Feedback(db.Model):
             Exception: An error occurred when updating the object in the database.
         """
         try:
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
     
     def delete(self):
@@ -112,9 +130,9 @@ class Feedback(db.Model):
         """    
         try:
             db.session.delete(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
 
 def initFeedbacks():
@@ -1,5 +1,7 @@
+from sqlalchemy import func, insert, select
 from sqlalchemy.exc import IntegrityError
 from __init__ import app, db
+from model.unit_of_work import commit, rollback
 from model.user import User
 from model.deck import Deck
 
@@ -15,6 +17,9 @@ class Flashcard(db.Model):
         deck_id (int): ID of the deck to which this flashcard belongs.
     """
     __tablename__ = 'flashcards'
+    __table_args__ = (
+        db.Index('ix_flashcards_deck_id_id', '_deck_id', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     _title = db.Column(db.String(255), nullable=False)
@@ -32,15 +37,15 @@ class Flashcard(db.Model):
     def create(self):
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
             print(f"Flashcard Created: {self._title}, {self._content}")
             return self
         except IntegrityError as e:
-            db.session.rollback()
+            rollback()
             print(f"IntegrityError while creating flashcard: {e}")
             return None
         except Exception as e:
-            db.session.rollback()
+            rollback()
             print(f"Unexpected error while creating flashcard: {e}")
             return None
 
@@ -59,34 +64,179 @@ class Flashcard(db.Model):
                 self._title = value
             if key == "content":
                 self._content = value
-        db.session.commit()
+        commit()
         return self
 
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
+
+    @staticmethod
+    def validate_many(cards):
+        """
+        Validates flashcard data before a bulk insert.
+
+        Args:
+            cards (list): Dictionaries with "title" and "content" keys.
+
+        Returns:
+            list: One {"index", "message"} dictionary per invalid card, empty when all are valid.
+        """
+        errors = []
+        for index, card in enumerate(cards):
+            if not isinstance(card, dict):
+                errors.append({"index": index, "message": "Card must be an object"})
+                continue
+            for key in ("title", "content"):
+                value = card.get(key)
+                if not isinstance(value, str) or not value.strip():
+                    errors.append({"index": index, "message": f"Card {key} is missing or empty"})
+                elif len(value) > 255:
+                    errors.append({"index": index, "message": f"Card {key} is longer than 255 characters"})
+        return errors
+
+    @staticmethod
+    def bulk_insert(cards, user_id=None, deck_id=None):
+        """
+        Inserts many flashcards with one batched INSERT in the current transaction, without committing.
+        Review states for the new cards are created in the same transaction.
+
+        Args:
+            cards (list): Dictionaries with "title" and "content", and "user_id"/"deck_id" when the
+                defaults do not apply.
+            user_id (int, optional): Owner used for cards without a user_id.
+            deck_id (int, optional): Deck used for cards without a deck_id.
+
+        Returns:
+            int: Number of flashcards inserted.
+        """
+        from model.review import ReviewState  # imported here, review.py imports this module
+
+        rows = [{
+            "_title": card["title"],
+            "_content": card["content"],
+            "_user_id": card.get("user_id", user_id),
+            "_deck_id": card.get("deck_id", deck_id)
+        } for card in cards]
+        if rows:
+            # Batched inserts skip the mapper events, schedule the new cards for review in one statement
+            if db.session.connection().dialect.insert_executemany_returning:
+                card_ids = db.session.execute(insert(Flashcard).returning(Flashcard.id), rows).scalars().all()
+                for start in range(0, len(card_ids), 500):
+                    ReviewState.seed(flashcard_ids=card_ids[start:start + 500])
+            else:
+                # MySQL has no RETURNING, other transactions can insert ids in the same range, so the
+                # range is narrowed to the users and decks written here
+                after_id = db.session.query(func.max(Flashcard.id)).scalar() or 0
+                db.session.execute(insert(Flashcard), rows)
+                ReviewState.seed(after_id=after_id, user_ids=list({row["_user_id"] for row in rows}),
+                                 deck_ids=list({row["_deck_id"] for row in rows}))
+        return len(rows)
+
+    @staticmethod
+    def stream_deck(deck_id, batch_size=1000):
+        """
+        Yields (title, content) for every card of a deck in id order from a server side cursor,
+        holding at most batch_size rows in memory.
+        """
+        query = select(Flashcard._title, Flashcard._content).where(
+            Flashcard._deck_id == deck_id
+        ).order_by(Flashcard.id).execution_options(yield_per=batch_size)
+        for row in db.session.execute(query):
+            yield row
+
+    @staticmethod
+    def import_stream(cards, user_id, deck_id, batch_size=1000, max_errors=100):
+        """
+        Validates and inserts cards from an iterator, committing every batch_size cards.
+
+        Invalid cards are skipped. Memory stays bounded by one batch however long the iterator is.
+
+        Args:
+            cards (iterable): Dictionaries with "title" and "content", or exceptions for rows the
+                parser could not read.
+            user_id (int): Owner of the imported cards.
+            deck_id (int or callable): Deck the cards are added to, or a function returning it that is
+                called once, before the first batch, so no deck is created for an upload without cards.
+            batch_size (int): Cards per INSERT and commit.
+            max_errors (int): Maximum number of errors kept for the report.
+
+        Returns:
+            tuple: (imported, error_count, errors) with errors as {"index", "message"} dictionaries.
+        """
+        imported = 0
+        error_count = 0
+        errors = []
+        batch = []
+
+        def flush():
+            nonlocal deck_id
+            if callable(deck_id):
+                deck_id = deck_id()
+            try:
+                Flashcard.bulk_insert(batch, user_id=user_id, deck_id=deck_id)
+                commit()
+            except Exception as e:
+                rollback()
+                raise e
+
+        for index, card in enumerate(cards):
+            if isinstance(card, Exception):
+                problems = [{"index": index, "message": str(card)}]
+            else:
+                problems = [dict(problem, index=index) for problem in Flashcard.validate_many([card])]
+            if problems:
+                error_count += 1
+                errors.extend(problems[:max(0, max_errors - len(errors))])
+                continue
+            batch.append({"title": card["title"], "content": card["content"]})
+            if len(batch) >= batch_size:
+                flush()
+                imported += len(batch)
+                batch = []
+        if batch:
+            flush()
+            imported += len(batch)
+        return imported, error_count, errors
 
     @staticmethod
     def restore(data):
         """
         Restore flashcards from a list of data.
 
+        Existing cards, matched on user, deck and title, are updated and the rest are bulk inserted,
+        all in one transaction.
+
         Args:
             data (list): A list of dictionaries containing flashcard data.
         """
         for card_data in data:
             card_data.pop('id', None)  # Ignore the ID field if present
-            user_id = card_data.get("user_id")
-            deck_id = card_data.get("deck_id")
-            title = card_data.get("title")
 
-            # Check if the flashcard already exists
-            flashcard = Flashcard.query.filter_by(_user_id=user_id, _deck_id=deck_id, _title=title).first()
+        # Look up existing cards by title in chunks rather than one query per card
+        titles = list({card_data.get("title") for card_data in data})
+        existing = {}
+        for start in range(0, len(titles), 500):
+            for flashcard in Flashcard.query.filter(Flashcard._title.in_(titles[start:start + 500])).all():
+                existing[(flashcard._user_id, flashcard._deck_id, flashcard._title)] = flashcard
+
+        new_cards = []
+        for card_data in data:
+            key = (card_data.get("user_id"), card_data.get("deck_id"), card_data.get("title"))
+            flashcard = existing.get(key)
             if flashcard:
-                flashcard.update(card_data)
+                if "title" in card_data:
+                    flashcard._title = card_data["title"]
+                if "content" in card_data:
+                    flashcard._content = card_data["content"]
             else:
-                flashcard = Flashcard(**card_data)
-                flashcard.create()
+                new_cards.append(card_data)
+        try:
+            Flashcard.bulk_insert(new_cards)
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
 
 
 def initFlashcards():
@@ -1,5 +1,6 @@
 from sqlalchemy.exc import IntegrityError
 from __init__ import app, db
+from model.unit_of_work import commit, rollback
 from model.user import User
 from datetime import datetime
 
@@ -22,7 +23,7 @@ class GradeLog(db.Model):
     subject = db.Column(db.String(100), nullable=False)
     grade = db.Column(db.Float, nullable=False)
     notes = db.Column(db.Text)
-    date = db.Column(db.DateTime, default=db.func.current_timestamp())
+    date = db.Column(db.DateTime, default=datetime.utcnow)  # UTC, set in Python so rollups see it
 
     def __init__(self, user_id, subject, grade, notes=''):
         self.user_id = user_id
@@ -39,10 +40,10 @@ class GradeLog(db.Model):
         """
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
             return self
         except IntegrityError:
-            db.session.rollback()
+            rollback()
             return None
 
     def read(self):
@@ -78,7 +79,7 @@ class GradeLog(db.Model):
                 self.grade = value
             if key == "notes":
                 self.notes = value
-        db.session.commit()
+        commit()
         return self
 
     def delete(self):
@@ -86,7 +87,7 @@ class GradeLog(db.Model):
         Delete the current GradeLog instance from the database.
         """
         db.session.delete(self)
-        db.session.commit()
+        commit()
 
     @staticmethod
     def restore(data):
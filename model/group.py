@@ -1,6 +1,7 @@
 # group.py
 from sqlite3 import IntegrityError
 from __init__ import app, db
+from model.unit_of_work import commit, rollback
 from model.section import Section
 from model.user import User
 
@@ -77,9 +78,9 @@ class Group(db.Model):
         """
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
     
     def read(self):
@@ -119,9 +120,9 @@ class Group(db.Model):
             self._section_id = section_id
 
         try:
-            db.session.commit()
+            commit()
         except IntegrityError:
-            db.session.rollback()
+            rollback()
             return None
         return self
         
@@ -155,7 +156,7 @@ class Group(db.Model):
             if moderator_ids:
                 group.moderators = [users_by_id.get(moderator_id) for moderator_id in moderator_ids if users_by_id.get(moderator_id)]
             
-            db.session.commit()
+            commit()
             restored_groups[group.name] = group
         
         return restored_groups
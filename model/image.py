@@ -0,0 +1,497 @@
+import binascii
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from sqlalchemy import delete, func, select
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+from __init__ import app, db
+from model.unit_of_work import commit, rollback
+from model.blob import BLOB_FOLDER, Blob, BlobWriter, blob_key
+from model.storage import storage
+from model.vote import insert_ignore
+
+# Pillow format of an accepted upload -> file extension, limited to UPLOAD_EXTENSIONS
+IMAGE_FORMATS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif'}
+
+# Image.info keys that hold metadata rather than pixels, e.g. the GPS position in EXIF
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop')
+# Image.info keys kept when an upload is re-saved without its metadata, needed to render it
+RENDER_KEYS = ('transparency', 'icc_profile', 'gamma', 'dpi', 'duration', 'loop', 'background', 'disposal')
+
+# Variant formats, every variant is written as WebP plus a fallback for clients without WebP
+VARIANT_EXTENSIONS = {'webp': '.webp', 'jpeg': '.jpg', 'png': '.png'}
+
+
+class ImageRejected(ValueError):
+    """
+    Raised for uploads that are not a supported image, callers should answer 400.
+    """
+
+
+def image_version(path):
+    """
+    Returns a strong validator for an image file from its size and modification time, so it is
+    computed without reading the file and changes whenever the file is replaced.
+    """
+    stat = os.stat(path)
+    return hashlib.sha1(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:20]
+
+
+def inspect_image(path):
+    """
+    Checks that an uploaded file is an image of an accepted type by reading its header, without
+    decoding the pixels.
+
+    Returns:
+        str: The file extension matching the real image type, e.g. ".jpg".
+
+    Raises:
+        ImageRejected: The data is not an image, is of an unsupported type or is too large.
+    """
+    try:
+        with Image.open(path) as image:
+            image_format = image.format
+            width, height = image.size
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        raise ImageRejected("Not a valid image")
+    extension = IMAGE_FORMATS.get(image_format)
+    if extension not in app.config['UPLOAD_EXTENSIONS']:
+        raise ImageRejected(f"Unsupported image type {image_format}, use one of {', '.join(app.config['UPLOAD_EXTENSIONS'])}")
+    if width * height > app.config['IMAGE_MAX_PIXELS']:
+        raise ImageRejected(f"Image is too large ({width}x{height})")
+    return extension
+
+
+def strip_metadata(path):
+    """
+    Re-saves an image without its EXIF, XMP, comments and PNG text chunks, which can hold where
+    and with what camera it was taken, with the EXIF orientation applied to the pixels. Images
+    without metadata, most of them, are kept as uploaded and not decoded.
+
+    Returns:
+        BlobWriter: The image without metadata, or None if the image has none.
+
+    Raises:
+        ImageRejected: The image data is broken past its header.
+    """
+    writer = None
+    try:
+        with Image.open(path) as image:
+            # PNG text chunks after the pixel data are only found by reading to the end
+            if not any(key in image.info for key in METADATA_KEYS) and not getattr(image, 'text', None):
+                return None
+            image_format = image.format
+            options = {'save_all': True} if getattr(image, 'n_frames', 1) > 1 else {}
+            if image_format == 'JPEG':
+                options = {'quality': 'keep', 'subsampling': 'keep'}
+            clean = image
+            if image.getexif().get(ExifTags.Base.Orientation, 1) != 1:
+                clean = ImageOps.exif_transpose(image)
+                options = {'quality': 95} if image_format == 'JPEG' else options
+            clean.info = {key: value for key, value in image.info.items() if key in RENDER_KEYS}
+            writer = BlobWriter()
+            clean.save(writer, format=image_format, **options)
+            writer.close()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        if writer:
+            writer.discard()
+        raise ImageRejected("Not a valid image")
+    except Exception:
+        if writer:
+            writer.discard()
+        raise
+    return writer
+
+
+def decode_base64(text_chunks):
+    """
+    Decodes base64 text arriving in chunks of any length, yielding the bytes as it goes so the
+    whole encoded and decoded image are never held at once. Whitespace is ignored.
+
+    Raises:
+        ImageRejected: The text is not valid base64.
+    """
+    pending = ''
+    for text in text_chunks:
+        pending += ''.join(text.split())
+        usable = len(pending) - len(pending) % 4
+        if usable:
+            try:
+                yield binascii.a2b_base64(pending[:usable].encode('ascii'), strict_mode=True)
+            except (binascii.Error, UnicodeEncodeError):
+                raise ImageRejected("Image data is not valid base64")
+            pending = pending[usable:]
+    if pending:
+        raise ImageRejected("Image data is not valid base64")
+
+
+def save_upload(chunks):
+    """
+    Writes an upload to the blob store chunk by chunk, checks it, then queues its variants
+    with image_pipeline. Memory use is one chunk whatever the size of the upload, unless the
+    image carries metadata, it is then decoded once and stored without it, as the blob itself is
+    served until its variants exist. An image that is already stored is neither kept twice nor
+    processed again.
+
+    Args:
+        chunks (iterable): The image bytes, e.g. from decode_base64 or a request stream.
+
+    Returns:
+        str: The blob name of the image.
+
+    Raises:
+        ImageRejected: The upload is empty or not a supported image.
+    """
+    writer = BlobWriter()
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+        writer.close()
+        if not writer.bytes:
+            raise ImageRejected("Image data required")
+        extension = inspect_image(writer.path)
+        clean = strip_metadata(writer.path)
+        if clean:
+            writer.discard()
+            writer = clean
+        name = Blob.store_temp(writer, extension)
+    finally:
+        writer.discard()
+    try:
+        image_pipeline.submit(name)
+    except Exception as e:
+        # The blob is stored and served without its metadata, its variants are left to initImageVariants
+        print(f'An error occurred while queueing image {name}: {str(e)}')
+    return name
+
+
+def _render_variants(source, sizes, quality):
+    """
+    Runs in a pool process. Decodes the source image once, drops its metadata and stores the
+    full size image and each size that is smaller than it, as WebP and as JPEG, or PNG when
+    the image has transparency, next to the source blob. Variant names derive from the source
+    name, so identical jobs write identical objects.
+
+    Returns:
+        list: One dict per file written, with size (0 for full size), format, filename, width,
+            height and bytes.
+    """
+    stem = os.path.splitext(source)[0]
+    directory = os.path.join(app.config['UPLOAD_FOLDER'], BLOB_FOLDER)
+    os.makedirs(directory, exist_ok=True)
+    with storage.local_copy(blob_key(source)) as source_path, Image.open(source_path) as opened:
+        opened.seek(0)  # first frame of animated GIFs
+        image = ImageOps.exif_transpose(opened)
+        alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        # A fresh image carries no EXIF, ICC or text chunks from the upload
+        image = image.convert('RGBA' if alpha else 'RGB')
+    fallback = 'png' if alpha else 'jpeg'
+
+    records = []
+    longest = max(image.size)
+    for size in [0] + sorted(size for size in sizes if size < longest):
+        variant = image
+        if size:
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.LANCZOS)
+        for variant_format in ('webp', fallback):
+            filename = f"{stem}-{size or 'full'}{VARIANT_EXTENSIONS[variant_format]}"
+            options = {'quality': quality, 'method': 4} if variant_format == 'webp' else \
+                {'quality': quality, 'optimize': True, 'progressive': True} if variant_format == 'jpeg' else \
+                {'optimize': True}
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as tmp_file:
+                variant.save(tmp_file, format=variant_format.upper(), **options)
+            records.append({
+                'size': size, 'format': variant_format, 'filename': filename,
+                'width': variant.width, 'height': variant.height, 'bytes': os.path.getsize(tmp_path)
+            })
+            storage.put_file(blob_key(source, filename), tmp_path)
+    return records
+
+
+class ImageVariant(db.Model):
+    """
+    ImageVariant Model
+
+    One resized, recompressed copy of an image in the blob store, stored next to its blob by the
+    storage backend. The
+    read endpoints serve the smallest variant that fits the requested size. A blob has one
+    variant per size and format, web workers that process the same blob write the same row.
+
+    Attributes:
+        source (db.Column): Blob name of the uploaded image.
+        size (db.Column): Bounding box in pixels, 0 for the full size image.
+        format (db.Column): "webp", "jpeg" or "png".
+        filename (db.Column): Filename of the variant in the blob's folder.
+        width (db.Column): Width in pixels.
+        height (db.Column): Height in pixels.
+        bytes (db.Column): File size.
+    """
+    __tablename__ = 'image_variants'
+    __table_args__ = (
+        db.Index('uq_image_variants_source_size_format', 'source', 'size', 'format', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(80), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    format = db.Column(db.String(8), nullable=False)
+    filename = db.Column(db.String(100), nullable=False)
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    bytes = db.Column(db.Integer, nullable=False)
+
+    @staticmethod
+    def record(source, records):
+        """
+        Replaces the recorded variants of a blob with a new set and deletes files of the old set
+        that the new one does not reuse. Rows another worker recorded in between are kept, they
+        describe the same files.
+        """
+        table = ImageVariant.__table__
+        stale = db.session.scalars(select(table.c.filename).where(table.c.source == source)).all()
+        try:
+            db.session.execute(delete(table).where(table.c.source == source))
+            connection = db.session.connection()
+            for record in records:
+                connection.execute(insert_ignore(connection, table, dict(record, source=source), ['source', 'size', 'format']))
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        kept = {record['filename'] for record in records}
+        _remove_files(source, [filename for filename in stale if filename not in kept])
+
+    @staticmethod
+    def remove(source):
+        """
+        Deletes the variants of a blob, rows and files.
+        """
+        stale = ImageVariant.query.filter_by(source=source).all()
+        try:
+            for variant in stale:
+                db.session.delete(variant)
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        _remove_files(source, [variant.filename for variant in stale])
+
+    @staticmethod
+    def remove_duplicates():
+        """
+        Keeps only the newest variant row per (source, size, format), needed before the unique
+        index can be created on a database that predates it. The files are shared, none is removed.
+
+        Returns:
+            int: Number of duplicate rows removed.
+        """
+        table = ImageVariant.__table__
+        newest = select(func.max(table.c.id)).group_by(table.c.source, table.c.size, table.c.format)
+        # MySQL cannot delete from a table it selects from directly, wrap the ids in a derived table
+        keep = select(newest.subquery().c[0])
+        try:
+            removed = db.session.execute(delete(table).where(table.c.id.not_in(keep))).rowcount
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        return removed
+
+    @property
+    def key(self):
+        return blob_key(self.source, self.filename)
+
+    @property
+    def path(self):
+        return storage.path(self.key)
+
+    @staticmethod
+    def best(source, size=None, webp=True):
+        """
+        Picks the variant to serve for a display size.
+
+        Args:
+            source (str): Blob name of the uploaded image.
+            size (int, optional): Display size in pixels, None for the full size image.
+            webp (bool): Whether the client accepts WebP.
+
+        Returns:
+            ImageVariant: The smallest variant at least size pixels on its longest side, else the
+                full size variant, or None while the blob has no variants yet.
+        """
+        variants = ImageVariant.query.filter_by(source=source).all()
+        candidates = [variant for variant in variants if (variant.format == 'webp') == webp]
+        fitting = sorted(
+            (variant for variant in candidates if variant.size and size and max(variant.width, variant.height) >= size),
+            key=lambda variant: variant.size
+        )
+        full = [variant for variant in candidates if variant.size == 0]
+        chosen = fitting[0] if fitting else (full[0] if full else None)
+        # Local files are checked, a lookup per read in remote storage would cost a round trip
+        return chosen if chosen and (chosen.path is None or os.path.isfile(chosen.path)) else None
+
+
+def _remove_files(source, filenames):
+    for filename in filenames:
+        storage.delete(blob_key(source, filename))
+
+
+class ImagePipeline:
+    """
+    Makes image variants off the request path.
+
+    Uploads are queued on a process pool that is created lazily in each worker process, so
+    decoding and encoding never hold a request thread or the GIL of the web worker. Blobs that
+    already have variants are skipped, so an image uploaded by many users is processed once.
+    When a job finishes its variants are recorded, unless the blob was collected meanwhile, in
+    which case its files are dropped. With workers=0 jobs run inline, which is handy for
+    scripts and the CLI. Until a blob's variants are recorded the read endpoints serve the
+    upload itself. A pool whose process died is replaced on the next submit.
+
+    Attributes:
+        sizes (list): Variant sizes in pixels, the longest side of each variant.
+        quality (int): WebP and JPEG quality.
+    """
+    def __init__(self, sizes, quality=80, workers=1):
+        self.sizes = sizes
+        self.quality = quality
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pending = set()  # blobs with a job queued or running in this worker
+        self._metrics = {"submitted": 0, "deduplicated": 0, "processed": 0, "collected": 0, "failed": 0,
+                         "pool_restarts": 0}
+
+    def submit(self, source):
+        """
+        Queues the variants of a blob, returns a Future, or the records when run inline, or
+        None when the blob already has variants or no pool would take the job.
+        """
+        with self._lock:
+            duplicate = source in self._pending
+        if duplicate or ImageVariant.query.filter_by(source=source).first():
+            with self._lock:
+                self._metrics["deduplicated"] += 1
+            return None
+        args = (source, self.sizes, self.quality)
+        with self._lock:
+            self._metrics["submitted"] += 1
+        with self._lock:
+            self._pending.add(source)
+        for _ in range(2):
+            pool = self._get_pool()
+            if pool is None:
+                with self._lock:
+                    self._pending.discard(source)
+                return self._finish(source, _render_variants(*args))
+            try:
+                future = pool.submit(_render_variants, *args)
+            except BrokenProcessPool:
+                self._replace_pool(pool)
+                continue
+            future.add_done_callback(lambda done: self._done(source, pool, done))
+            return future
+        with self._lock:
+            self._pending.discard(source)
+            self._metrics["failed"] += 1
+        print(f'An error occurred while queueing image {source}: the process pool is broken')
+        return None
+
+    def process(self, source):
+        """
+        Makes the variants of a blob inline unless it already has them.
+
+        Returns:
+            bool: True if variants were made.
+        """
+        if ImageVariant.query.filter_by(source=source).first() or not storage.exists(blob_key(source)):
+            return False
+        self._finish(source, _render_variants(source, self.sizes, self.quality))
+        return True
+
+    def stats(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics["sizes"] = self.sizes
+        metrics["workers"] = self.workers
+        return metrics
+
+    def _get_pool(self):
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _replace_pool(self, broken):
+        """
+        Drops a broken pool, the next job creates a fresh one. Other threads that hit the same
+        broken pool find it already replaced.
+        """
+        with self._lock:
+            if self._pool is not broken:
+                return
+            self._pool = None
+            self._metrics["pool_restarts"] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _done(self, source, pool, future):
+        # Runs on the pool's result thread, outside any request
+        try:
+            records = future.result()
+            with app.app_context():
+                self._finish(source, records)
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._replace_pool(pool)
+            with self._lock:
+                self._metrics["failed"] += 1
+            print(f'An error occurred while processing image {source}: {str(e)}')
+        finally:
+            with self._lock:
+                self._pending.discard(source)
+
+    def _finish(self, source, records):
+        if not Blob.query.get(source[:64]):
+            # Collected while the job ran
+            _remove_files(source, [record['filename'] for record in records])
+            with self._lock:
+                self._metrics["collected"] += 1
+            return None
+        ImageVariant.record(source, records)
+        with self._lock:
+            self._metrics["processed"] += 1
+        return records
+
+
+image_pipeline = ImagePipeline(
+    sizes=[int(size) for size in app.config['IMAGE_VARIANT_SIZES'].split(',') if size.strip()],
+    quality=app.config['IMAGE_VARIANT_QUALITY'],
+    workers=app.config['IMAGE_PROCESS_WORKERS']
+)
+
+
+def initImageVariants():
+    """
+    Creates the image_variants table, removes duplicate variant rows and makes variants for
+    blobs that have none.
+    """
+    with app.app_context():
+        db.create_all()
+        removed = ImageVariant.remove_duplicates()
+        print(f"Duplicate image variants removed: {removed}")
+        blobs = Blob.query.all()
+        count = 0
+        for blob in blobs:
+            try:
+                count += image_pipeline.process(blob.name)
+            except Exception as e:
+                print(f'An error occurred while processing image {blob.name}: {str(e)}')
+        print(f"Image variants made for {count} of {len(blobs)} images")
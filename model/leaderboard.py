@@ -1,6 +1,14 @@
 # from flask import Blueprint, request, jsonify, Response, g
 # from flask_restful import Api, Resource
+import bisect
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import and_, case, delete, event, func, inspect, or_, select
+from sqlalchemy.orm import Session
 from __init__ import db, app  # Import `app` for context management
+from model.unit_of_work import commit, rollback
+from model.vote import upsert
 # from api.jwt_authorize import token_required
 
 # # Blueprint for Leaderboard API
@@ -16,21 +24,378 @@ class LeaderboardEntry(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     score = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)  # UTC, null for entries saved before timestamps
 
     def create(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def read(self):
         return {"id": self.id, "name": self.name, "score": self.score}
 
     def update(self, newScore):
         self.score = newScore
-        db.session.commit()
+        commit()
 
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
+
+    @staticmethod
+    def compact(before):
+        """
+        Folds entries saved before a time into the rollups, then deletes all of them except each
+        player's best, so the all-time leaderboard keeps every player's top score.
+
+        Args:
+            before (datetime): UTC cutoff, entries saved earlier are compacted.
+
+        Returns:
+            int: Number of entries deleted.
+        """
+        try:
+            LeaderboardRollup.rebuild(before=before)
+            kept = set()
+            dropped = []
+            rows = db.session.execute(
+                select(LeaderboardEntry.id, LeaderboardEntry.name).where(LeaderboardEntry.created_at < before)
+                .order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.id).execution_options(yield_per=1000)
+            )
+            for entry_id, name in rows:
+                if name in kept:
+                    dropped.append(entry_id)
+                else:
+                    kept.add(name)
+            for start in range(0, len(dropped), 500):
+                db.session.execute(delete(LeaderboardEntry).where(LeaderboardEntry.id.in_(dropped[start:start + 500])))
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        return len(dropped)
+
+
+# Ranking order is score descending, ties go to the earlier entry
+db.Index('ix_leaderboard_score_id', LeaderboardEntry.score.desc(), LeaderboardEntry.id)
+db.Index('ix_leaderboard_name_score', LeaderboardEntry.name, LeaderboardEntry.score)
+db.Index('ix_leaderboard_created_at', LeaderboardEntry.created_at)
+
+
+# Rollup periods, weeks start on Monday, both in UTC
+WINDOWS = ('day', 'week')
+
+
+def period_start(window, when):
+    """
+    Returns the first day of the day or week containing when.
+    """
+    day = when.date()
+    if window == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+class LeaderboardRollup(db.Model):
+    """
+    LeaderboardRollup Model
+
+    Best score of each player per day and per week. Every saved entry updates its day and week
+    rows with one upsert each, so a window's leaderboard is an index range scan of k rows
+    instead of a scan of every entry ever submitted.
+
+    Attributes:
+        period (db.Column): "day" or "week", part of the primary key.
+        period_start (db.Column): First day of the period, part of the primary key.
+        name (db.Column): Player name, part of the primary key.
+        best_score (db.Column): Best score of the player in the period.
+    """
+    __tablename__ = 'leaderboard_rollups'
+
+    period = db.Column(db.String(8), primary_key=True)
+    period_start = db.Column(db.Date, primary_key=True)
+    name = db.Column(db.String(255), primary_key=True)
+    best_score = db.Column(db.Integer, nullable=False)
+
+    def read(self):
+        return {"window": self.period, "window_start": self.period_start.isoformat(), "name": self.name, "score": self.best_score}
+
+    @staticmethod
+    def record(connection, name, score, when):
+        """
+        Raises the player's day and week bests to score where it is higher, on the given connection.
+        """
+        table = LeaderboardRollup.__table__
+        for window in WINDOWS:
+            values = {'period': window, 'period_start': period_start(window, when), 'name': name, 'best_score': score}
+            update = {'best_score': case((table.c.best_score >= score, table.c.best_score), else_=score)}
+            connection.execute(upsert(connection, table, values, update, ['period', 'period_start', 'name']))
+
+    @staticmethod
+    def top(window, k=10, now=None):
+        """
+        Returns the k best players of the current day or week with their rank, ties in name order.
+        """
+        start = period_start(window, now or datetime.utcnow())
+        rows = db.session.execute(
+            select(LeaderboardRollup.name, LeaderboardRollup.best_score)
+            .where(LeaderboardRollup.period == window, LeaderboardRollup.period_start == start)
+            .order_by(LeaderboardRollup.best_score.desc(), LeaderboardRollup.name).limit(k)
+        )
+        return [{"rank": rank, "name": name, "score": score} for rank, (name, score) in enumerate(rows, start=1)]
+
+    @staticmethod
+    def rebuild(since=None, before=None):
+        """
+        Folds timestamped entries saved in [since, before) into the rollups, in the current
+        transaction without committing. Bests only ever go up, so running it again is harmless.
+
+        Needed for entries written with statement level inserts, which skip the mapper events.
+
+        Returns:
+            int: Number of rollup rows written.
+        """
+        query = select(LeaderboardEntry.name, LeaderboardEntry.score, LeaderboardEntry.created_at).where(
+            LeaderboardEntry.created_at.is_not(None)
+        )
+        if since is not None:
+            query = query.where(LeaderboardEntry.created_at >= since)
+        if before is not None:
+            query = query.where(LeaderboardEntry.created_at < before)
+        best = {}
+        for name, score, created_at in db.session.execute(query.execution_options(yield_per=1000)):
+            for window in WINDOWS:
+                key = (window, period_start(window, created_at), name)
+                if key not in best or score > best[key]:
+                    best[key] = score
+        connection = db.session.connection()
+        table = LeaderboardRollup.__table__
+        for (window, start, name), score in best.items():
+            values = {'period': window, 'period_start': start, 'name': name, 'best_score': score}
+            update = {'best_score': case((table.c.best_score >= score, table.c.best_score), else_=score)}
+            connection.execute(upsert(connection, table, values, update, ['period', 'period_start', 'name']))
+        return len(best)
+
+
+db.Index('ix_leaderboard_rollups_period_best', LeaderboardRollup.period, LeaderboardRollup.period_start,
+         LeaderboardRollup.best_score.desc(), LeaderboardRollup.name)
+
+
+@event.listens_for(LeaderboardEntry, 'after_insert')
+def _roll_up_entry(mapper, connection, target):
+    if target.created_at is not None:
+        LeaderboardRollup.record(connection, target.name, target.score, target.created_at)
+
+
+@event.listens_for(LeaderboardEntry, 'after_update')
+def _roll_up_score_change(mapper, connection, target):
+    # A raised score can raise the period best, a lowered one is left for rebuild
+    if target.created_at is not None and inspect(target).attrs.score.history.has_changes():
+        LeaderboardRollup.record(connection, target.name, target.score, target.created_at)
+
+
+def _ranked_before(score, entry_id):
+    """
+    Condition for entries ranked ahead of an entry with this score and id.
+    """
+    return or_(LeaderboardEntry.score > score, and_(LeaderboardEntry.score == score, LeaderboardEntry.id < entry_id))
+
+
+class Leaderboard:
+    """
+    Ranked view of the leaderboard table.
+
+    The top entries are kept in memory as a list of (-score, id, name) tuples in rank order,
+    bounded to size entries. Every read first merges in entries it has not seen from the ids
+    above the last one seen minus id_window, a primary key range scan that usually returns only
+    known ids, so new scores from any worker show up at once without reloading. Ids are assigned
+    at insert but become visible at commit, so a lower id can commit after a higher one, the
+    window re-reads the recent ids to pick those up, and an entry committing later than that is
+    picked up by the next TTL reload. Updates and deletes committed in this worker, and the TTL
+    for those made by other workers, trigger a full reload of the top entries through the
+    (score DESC, id) index. Queries past the cached range go to the same index.
+    """
+    def __init__(self, size=1000, ttl=60, id_window=100):
+        self.size = size
+        self.ttl = ttl
+        self.id_window = id_window
+        self._entries = []
+        self._total = 0
+        self._last_id = 0
+        self._recent_ids = set()  # ids seen within id_window of _last_id
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def top(self, k=10, window=None):
+        """
+        Returns the k best entries as dictionaries with their rank, or with window "day" or
+        "week" the k best players of the current period from the rollups.
+        """
+        if window is not None:
+            return LeaderboardRollup.top(window, k)
+        self._refresh()
+        with self._lock:
+            entries = self._entries[:k]
+            complete = len(entries) == k or len(self._entries) == self._total
+        if not complete:
+            rows = db.session.execute(
+                select(LeaderboardEntry.score, LeaderboardEntry.id, LeaderboardEntry.name)
+                .order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.id).limit(k)
+            )
+            entries = [(-score, entry_id, name) for score, entry_id, name in rows]
+        return [self._read(rank, entry) for rank, entry in enumerate(entries, start=1)]
+
+    def rank(self, name):
+        """
+        Returns the rank of a player's best entry and its percentile, or None for unknown names.
+
+        The percentile is the share of all entries ranked at or below the player's.
+        """
+        found = self._find(name)
+        if found is None:
+            return None
+        rank, entry, total = found
+        result = self._read(rank, entry)
+        result["total"] = total
+        result["percentile"] = round(100.0 * (total - rank + 1) / total, 1)
+        return result
+
+    def around(self, name, window=5):
+        """
+        Returns a player's best entry with up to window entries ranked above and below it,
+        or None for unknown names.
+        """
+        found = self._find(name)
+        if found is None:
+            return None
+        rank, entry, total = found
+        with self._lock:
+            if rank + window <= len(self._entries) or len(self._entries) == self._total:
+                start = max(rank - 1 - window, 0)
+                return [self._read(index, item) for index, item in enumerate(self._entries[start:rank + window], start=start + 1)]
+
+        score, entry_id = -entry[0], entry[1]
+        above = db.session.execute(
+            select(LeaderboardEntry.score, LeaderboardEntry.id, LeaderboardEntry.name)
+            .where(_ranked_before(score, entry_id))
+            .order_by(LeaderboardEntry.score, LeaderboardEntry.id.desc()).limit(window)
+        ).all()
+        below = db.session.execute(
+            select(LeaderboardEntry.score, LeaderboardEntry.id, LeaderboardEntry.name)
+            .where(~_ranked_before(score, entry_id), LeaderboardEntry.id != entry_id)
+            .order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.id).limit(window)
+        ).all()
+        entries = [(-s, i, n) for s, i, n in reversed(above)] + [entry] + [(-s, i, n) for s, i, n in below]
+        start = rank - len(above)
+        return [self._read(index, item) for index, item in enumerate(entries, start=start)]
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _find(self, name):
+        """
+        Returns (rank, entry, total) for a player's best entry, or None.
+        """
+        self._refresh()
+        with self._lock:
+            total = self._total
+            for index, entry in enumerate(self._entries):
+                if entry[2] == name:
+                    return index + 1, entry, total
+            if len(self._entries) == total:
+                return None  # everything is cached, the name has no entries
+
+        best = db.session.execute(
+            select(LeaderboardEntry.score, LeaderboardEntry.id).where(LeaderboardEntry.name == name)
+            .order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.id).limit(1)
+        ).first()
+        if best is None:
+            return None
+        score, entry_id = best
+        ahead = db.session.execute(
+            select(func.count()).select_from(LeaderboardEntry).where(_ranked_before(score, entry_id))
+        ).scalar()
+        return ahead + 1, (-score, entry_id, name), max(total, ahead + 1)
+
+    def _refresh(self):
+        now = time.monotonic()
+        with self._lock:
+            reload = self._loaded_at is None or now - self._loaded_at > self.ttl
+            last_id = self._last_id
+        if reload:
+            rows = db.session.execute(
+                select(LeaderboardEntry.score, LeaderboardEntry.id, LeaderboardEntry.name)
+                .order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.id).limit(self.size)
+            )
+            entries = [(-score, entry_id, name) for score, entry_id, name in rows]
+            total, last_id = db.session.execute(
+                select(func.count(), func.max(LeaderboardEntry.id)).select_from(LeaderboardEntry)
+            ).one()
+            last_id = last_id or 0
+            recent_ids = set(db.session.execute(
+                select(LeaderboardEntry.id).where(LeaderboardEntry.id > last_id - self.id_window)
+            ).scalars())
+            with self._lock:
+                self._entries, self._total, self._last_id, self._loaded_at = entries, total, last_id, now
+                self._recent_ids = recent_ids
+            return
+
+        rows = db.session.execute(
+            select(LeaderboardEntry.score, LeaderboardEntry.id, LeaderboardEntry.name)
+            .where(LeaderboardEntry.id > last_id - self.id_window).order_by(LeaderboardEntry.id)
+        ).all()
+        with self._lock:
+            if self._last_id != last_id:
+                return  # another thread merged them
+            rows = [row for row in rows if row[1] not in self._recent_ids]
+            if not rows:
+                return
+            for score, entry_id, name in rows:
+                entry = (-score, entry_id, name)
+                if len(self._entries) < self.size or entry < self._entries[-1]:
+                    bisect.insort(self._entries, entry)
+                    if len(self._entries) > self.size:
+                        self._entries.pop()
+            self._total += len(rows)
+            self._last_id = max(last_id, rows[-1][1])
+            self._recent_ids.update(row[1] for row in rows)
+            self._recent_ids = {entry_id for entry_id in self._recent_ids if entry_id > self._last_id - self.id_window}
+
+    @staticmethod
+    def _read(rank, entry):
+        return {"rank": rank, "id": entry[1], "name": entry[2], "score": -entry[0]}
+
+
+leaderboard = Leaderboard(size=app.config['LEADERBOARD_CACHE_SIZE'], ttl=app.config['LEADERBOARD_CACHE_TTL'],
+                          id_window=app.config['LEADERBOARD_ID_WINDOW'])
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_leaderboard_changes(session, flush_context):
+    # New entries are merged on the next read, only edits and deletes need a reload
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, LeaderboardEntry):
+            session.info['leaderboard_changed'] = True
+            return
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_leaderboard_statements(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if getattr(table, 'name', None) == LeaderboardEntry.__tablename__:
+            orm_execute_state.session.info['leaderboard_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_leaderboard(session):
+    if session.info.pop('leaderboard_changed', False):
+        leaderboard.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_leaderboard_changes(session):
+    session.info.pop('leaderboard_changed', None)
 
 
 
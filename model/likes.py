@@ -2,6 +2,7 @@
 from sqlite3 import IntegrityError
 from sqlalchemy import Text
 from __init__ import app, db
+from model.unit_of_work import commit, rollback
 from model.post import Post
 
 class Likes(db.Model):
@@ -58,9 +59,9 @@ class Likes(db.Model):
         """
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
         
     def read(self):
@@ -93,9 +94,9 @@ class Likes(db.Model):
             Exception: An error occurred when updating the object in the database.
         """
         try:
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
     
     def delete(self):
@@ -110,9 +111,9 @@ class Likes(db.Model):
         """    
         try:
             db.session.delete(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
 
 def initLikes():
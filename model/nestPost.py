@@ -2,8 +2,10 @@
 from sqlite3 import IntegrityError
 from sqlalchemy import Text
 from __init__ import app, db
+from model.unit_of_work import commit, rollback
 from model.user import User
 from model.group import Group
+from model.references import resolve_references
 
 class NestPost(db.Model):
     """
@@ -67,9 +69,9 @@ class NestPost(db.Model):
         """
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
         
     def read(self):
@@ -77,23 +79,39 @@ class NestPost(db.Model):
         The read method retrieves the object data from the object's attributes and returns it as a dictionary.
         
         Uses:
-            The Group.query and User.query methods to retrieve the group and user objects.
+            The read_many method, so a single post is serialized the same way as a listing.
         
         Returns:
             dict: A dictionary containing the post data, including user and group names.
         """
-        user = User.query.get(self._user_id)
-        group = Group.query.get(self._group_id)
-        data = {
-            "id": self.id,
-            "title": self._title,
-            "content": self._content,
-            "user_name": user.name if user else None,
-            "group_name": group.name if group else None,
+        return NestPost.read_many([self])[0]
+
+    @staticmethod
+    def read_many(posts):
+        """
+        Serializes a list of posts, resolving user and group names for the whole list at once.
+
+        Uses:
+            One IN query against users and one against groups, regardless of how many posts
+            are passed, instead of two lookups per post.
+
+        Args:
+            posts (list): NestPost objects to serialize.
+
+        Returns:
+            list: Dictionaries in the same shape as read().
+        """
+        names = resolve_references(posts, {'_user_id': User._name, '_group_id': Group._name})
+        user_names, group_names = names['_user_id'], names['_group_id']
+        return [{
+            "id": post.id,
+            "title": post._title,
+            "content": post._content,
+            "user_name": user_names.get(post._user_id),
+            "group_name": group_names.get(post._group_id),
             # Review information as this may not work as this is a quick workaround
-            "image_url": self._image_url
-        }
-        return data
+            "image_url": post._image_url
+        } for post in posts]
     
     def update(self):
         """
@@ -106,9 +124,9 @@ class NestPost(db.Model):
             Exception: An error occurred when updating the object in the database.
         """
         try:
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
     
     def delete(self):
@@ -123,9 +141,9 @@ class NestPost(db.Model):
         """    
         try:
             db.session.delete(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
 
 def initNestPosts():
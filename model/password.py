@@ -0,0 +1,183 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+from __init__ import app
+
+
+class HashingOverloaded(RuntimeError):
+    """
+    Raised when the hashing queue is full, callers should answer 503 rather than pile up.
+    """
+
+
+def _timed_hash(password, method, salt_length):
+    """
+    Runs in a pool process, returns the hash and the wall clock time the work started.
+    """
+    started = time.time()
+    return generate_password_hash(password, method, salt_length=salt_length), started
+
+
+def _timed_check(pwhash, password):
+    """
+    Runs in a pool process, returns the check result and the wall clock time the work started.
+    """
+    started = time.time()
+    return check_password_hash(pwhash, password), started
+
+
+class PasswordHasher:
+    """
+    Password hashing service that keeps pbkdf2 work off the request threads.
+
+    Hashes and checks run in a bounded process pool that is created lazily in each worker
+    process. At most queue_limit jobs may be waiting or running at once; further callers wait
+    up to queue_timeout seconds for a slot and then get HashingOverloaded. With workers=0 the
+    work runs inline, which is handy for scripts and the CLI.
+
+    A pool whose process died, e.g. killed for memory, is broken for good. It is replaced and
+    the job retried once in the new pool, then run inline, so logins keep working.
+
+    Attributes:
+        method (str): The werkzeug method string including the cost, e.g. "pbkdf2:sha256:1000000".
+        salt_length (int): Length of the generated salt.
+    """
+    def __init__(self, iterations, salt_length=10, workers=2, queue_limit=32, queue_timeout=5.0):
+        self.method = f"pbkdf2:sha256:{iterations}"
+        self.salt_length = salt_length
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(queue_limit)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._metrics = {
+            "hash_count": 0,
+            "check_count": 0,
+            "batch_hash_count": 0,
+            "rejected": 0,
+            "pool_restarts": 0,
+            "latency_total": 0.0,
+            "latency_max": 0.0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0
+        }
+
+    def hash(self, password):
+        """
+        Hashes a password with the current method and cost.
+        """
+        return self._run("hash_count", _timed_hash, password, self.method, self.salt_length)
+
+    def check(self, pwhash, password):
+        """
+        Checks a password against a stored hash of any supported method and cost.
+        """
+        return self._run("check_count", _timed_check, pwhash, password)
+
+    def hash_many(self, passwords):
+        """
+        Hashes a batch of passwords across the whole pool, used by bulk user imports.
+
+        Batches bypass the queue limit since they are admin operations that should finish
+        rather than be rejected.
+        """
+        pool = self._get_pool()
+        count = len(passwords)
+        if pool is None or count < 2:
+            return [generate_password_hash(password, self.method, salt_length=self.salt_length) for password in passwords]
+        try:
+            results = list(pool.map(_timed_hash, passwords, [self.method] * count, [self.salt_length] * count,
+                                    chunksize=max(1, count // (self.workers * 8))))
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            results = [_timed_hash(password, self.method, self.salt_length) for password in passwords]
+        hashes = [pwhash for pwhash, _ in results]
+        with self._lock:
+            self._metrics["batch_hash_count"] += count
+        return hashes
+
+    def needs_rehash(self, pwhash):
+        """
+        Tells whether a stored hash was made with different parameters than the current ones.
+        """
+        return not pwhash or pwhash.split("$", 1)[0] != self.method
+
+    def stats(self):
+        """
+        Returns hashing metrics: counts, rejected jobs, and latency/queue wait in seconds.
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+        jobs = metrics["hash_count"] + metrics["check_count"]
+        metrics["latency_avg"] = metrics["latency_total"] / jobs if jobs else 0.0
+        metrics["queue_wait_avg"] = metrics["queue_wait_total"] / jobs if jobs else 0.0
+        metrics["method"] = self.method
+        metrics["workers"] = self.workers
+        metrics["queue_limit"] = self.queue_limit
+        return metrics
+
+    def _get_pool(self):
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _replace_pool(self, broken):
+        """
+        Drops a broken pool, the next job creates a fresh one. Other threads that hit the same
+        broken pool find it already replaced.
+        """
+        with self._lock:
+            if self._pool is not broken:
+                return
+            self._pool = None
+            self._metrics["pool_restarts"] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, func, *args):
+        """
+        Runs a job in the pool, in a fresh pool if the current one is broken, else inline.
+        """
+        for _ in range(2):
+            pool = self._get_pool()
+            if pool is None:
+                break
+            try:
+                return pool.submit(func, *args).result()
+            except BrokenProcessPool:
+                self._replace_pool(pool)
+        return func(*args)
+
+    def _run(self, counter, func, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._metrics["rejected"] += 1
+            raise HashingOverloaded("Password hashing queue is full, try again shortly")
+        try:
+            submitted = time.time()
+            result, started = self._submit(func, *args)
+            finished = time.time()
+        finally:
+            self._slots.release()
+        wait = max(0.0, started - submitted)
+        latency = finished - started
+        with self._lock:
+            self._metrics[counter] += 1
+            self._metrics["latency_total"] += latency
+            self._metrics["latency_max"] = max(self._metrics["latency_max"], latency)
+            self._metrics["queue_wait_total"] += wait
+            self._metrics["queue_wait_max"] = max(self._metrics["queue_wait_max"], wait)
+        return result
+
+
+password_hasher = PasswordHasher(
+    iterations=app.config['PASSWORD_HASH_ITERATIONS'],
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    queue_limit=app.config['PASSWORD_HASH_QUEUE_LIMIT'],
+    queue_timeout=app.config['PASSWORD_HASH_QUEUE_TIMEOUT']
+)
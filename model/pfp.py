@@ -1,56 +1,48 @@
-import base64
 import os
-from werkzeug.utils import secure_filename
+from werkzeug.exceptions import HTTPException
 from __init__ import app
+from model.blob import blob_path, is_blob_name
+from model.image import ImageRejected, save_upload
 
-def pfp_base64_decode(user_id, user_pfp):
+def pfp_file_path(user_uid, user_pfp):
     """
-    Reads a user's profile picture from the server.
+    Returns the path of a user's profile picture on the server, or None if the file does not exist.
 
-    This function reads a user's profile picture from the server and returns the image as a base64 encoded string.
-    If the user does not have a profile picture set, the function returns None.
+    Pictures are blobs in the shared blob store, pictures uploaded before it are files in the user's directory. Blobs
+    kept in remote storage, e.g. S3, have no path on the server and give None.
 
     Parameters:
-    - user_id (str): The unique identifier for the user.
-    - user_pfp (str): The filename of the user's profile picture.
-
-    Returns:
-    - str: The base64 encoded image if the user has a profile picture; otherwise, None.
+    - user_uid (str): The unique identifier for the user.
+    - user_pfp (str): The blob name or filename of the user's profile picture.
     """
-    img_path = os.path.join(app.config['UPLOAD_FOLDER'], user_id, user_pfp)
-    try:
-        with open(img_path, 'rb') as img_file:
-            base64_encoded = base64.b64encode(img_file.read()).decode('utf-8')
-        return base64_encoded
-    except Exception as e:
-        print(f'An error occurred while reading the profile picture: {str(e)}')
-        return None
+    if is_blob_name(user_pfp):
+        img_path = blob_path(user_pfp)
+    else:
+        img_path = os.path.join(app.config['UPLOAD_FOLDER'], user_uid, user_pfp)
+    return img_path if img_path and os.path.isfile(img_path) else None
 
-def pfp_base64_upload(base64_image, user_uid):
+def pfp_upload(chunks):
     """
-    Uploads a base64 encoded image as a profile picture for a user.
+    Uploads an image as a profile picture.
 
-    This function decodes a base64 encoded image and saves it to a secure location on the server.
-    It organizes images by storing each user's image in a separate directory within the UPLOAD_FOLDER.
-    This approach helps to avoid filename conflicts and ensures better organization of files.
+    This function writes the image to disk chunk by chunk, so memory use stays bounded whatever its size, checks that
+    it really is a supported image and stores it in the content-addressed blob store within the UPLOAD_FOLDER, so an
+    image uploaded by many users is stored once. Resized variants are then made in the background, see model.image.
 
     Parameters:
-    - base64_image (str): The base64 encoded image to be uploaded.
-    - user_uid (str): The unique identifier for the user.
+    - chunks (iterable): The image bytes, e.g. decode_base64 over the base64 text of a JSON body, or a request stream.
 
     Returns:
-    - str: The filename of the saved image if the upload is successful; otherwise, None.
+    - str: The blob name of the saved image if the upload is successful; otherwise, None.
+
+    Raises:
+    - ImageRejected: The upload is not a supported image.
     """
     try:
-        image_data = base64.b64decode(base64_image)
-        filename = secure_filename(f'{user_uid}.png')
-        user_dir = os.path.join(app.config['UPLOAD_FOLDER'], user_uid)
-        if not os.path.exists(user_dir):
-            os.makedirs(user_dir)
-        file_path = os.path.join(user_dir, filename)
-        with open(file_path, 'wb') as img_file:
-            img_file.write(image_data)
-        return filename 
+        return save_upload(chunks)
+    except (ImageRejected, HTTPException):
+        # Rejected images and bodies over MAX_CONTENT_LENGTH are the client's error
+        raise
     except Exception as e:
         print (f'An error occurred while updating the profile picture: {str(e)}')
         return None
@@ -60,7 +52,8 @@ def pfp_file_delete(user_uid, filename):
     Deletes the profile picture file from the server.
 
     This function removes a file from the server's filesystem. It is typically used to delete profile pictures
-    when a user updates their image or removes it entirely.
+    when a user updates their image or removes it entirely. Blobs may be shared with other users and are left alone,
+    dropping the user's reference releases them and gc_uploads removes them once unreferenced.
 
     Parameters:
     - user_uid (str): The unique identifier for the user.
@@ -69,6 +62,8 @@ def pfp_file_delete(user_uid, filename):
     Returns:
     - bool: True if the file was deleted successfully; otherwise, False.
     """
+    if is_blob_name(filename):
+        return True
     try:
         img_path = os.path.join(app.config['UPLOAD_FOLDER'], user_uid, filename)
         if os.path.exists(img_path):
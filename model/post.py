@@ -1,11 +1,15 @@
 # post.py
+import base64
+import json
 import logging
 from sqlite3 import IntegrityError
 from sqlalchemy import Text, JSON
 from sqlalchemy.exc import IntegrityError
 from __init__ import app, db
+from model.unit_of_work import commit, rollback
 from model.user import User
 from model.channel import Channel
+from model.references import resolve_references
 
 class Post(db.Model):
     """
@@ -22,6 +26,11 @@ class Post(db.Model):
         _channel_id (db.Column): An integer representing the channel to which the post belongs.
     """
     __tablename__ = 'posts'
+    # Feed queries filter by channel or user and walk backwards by id
+    __table_args__ = (
+        db.Index('ix_posts_channel_id_id', '_channel_id', 'id'),
+        db.Index('ix_posts_user_id_id', '_user_id', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     _title = db.Column(db.String(255), nullable=False)
@@ -30,6 +39,8 @@ class Post(db.Model):
     _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     _channel_id = db.Column(db.Integer, db.ForeignKey('channels.id'), nullable=False)
 
+    MAX_PAGE_SIZE = 100  # largest page served by paginate
+
     def __init__(self, title, comment, user_id=None, channel_id=None, content={}, user_name=None, channel_name=None):
         """
         Constructor, 1st step in object creation.
@@ -66,9 +77,9 @@ class Post(db.Model):
         """
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
         except IntegrityError as e:
-            db.session.rollback()
+            rollback()
             logging.warning(f"IntegrityError: Could not create post with title '{self._title}' due to {str(e)}.")
             return None
         return self
@@ -78,24 +89,86 @@ class Post(db.Model):
         The read method retrieves the object data from the object's attributes and returns it as a dictionary.
         
         Uses:
-            The Channel.query and User.query methods to retrieve the channel and user objects.
+            The read_many method, so a single post is serialized the same way as a listing.
         
         Returns:
             dict: A dictionary containing the post data, including user and channel names.
         """
-        user = User.query.get(self._user_id)
-        channel = Channel.query.get(self._channel_id)
-        data = {
-            "id": self.id,
-            "title": self._title,
-            "comment": self._comment,
-            "content": self._content,
-            "user_name": user.name if user else None,
-            "channel_name": channel.name if channel else None
-        }
-        return data
+        return Post.read_many([self])[0]
+
+    @staticmethod
+    def read_many(posts):
+        """
+        Serializes a list of posts, resolving user and channel names for the whole list at once.
+
+        Uses:
+            One IN query against users and one against channels, regardless of how many posts
+            are passed, instead of two lookups per post.
+
+        Args:
+            posts (list): Post objects to serialize.
+
+        Returns:
+            list: Dictionaries in the same shape as read().
+        """
+        names = resolve_references(posts, {'_user_id': User._name, '_channel_id': Channel._name})
+        user_names, channel_names = names['_user_id'], names['_channel_id']
+        return [{
+            "id": post.id,
+            "title": post._title,
+            "comment": post._comment,
+            "content": post._content,
+            "user_name": user_names.get(post._user_id),
+            "channel_name": channel_names.get(post._channel_id)
+        } for post in posts]
     
 
+    @staticmethod
+    def encode_cursor(post_id):
+        """
+        Wraps the last post id of a page into an opaque cursor string.
+        """
+        return base64.urlsafe_b64encode(json.dumps({"id": post_id}).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Unwraps a cursor made by encode_cursor.
+
+        Raises:
+            ValueError: The cursor is malformed.
+        """
+        try:
+            return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["id"])
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def paginate(query, cursor=None, limit=20):
+        """
+        Returns one page of a post query, newest first, using keyset pagination on id.
+
+        Args:
+            query (Query): A Post query, typically filtered by channel or user.
+            cursor (str, optional): The next_cursor returned with the previous page.
+            limit (int): Page size, capped at MAX_PAGE_SIZE.
+
+        Returns:
+            tuple: (posts, next_cursor) where next_cursor is None on the last page.
+
+        Raises:
+            ValueError: The cursor is malformed.
+        """
+        limit = max(1, min(limit, Post.MAX_PAGE_SIZE))
+        if cursor:
+            query = query.filter(Post.id < Post.decode_cursor(cursor))
+        posts = query.order_by(Post.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = Post.encode_cursor(posts[-1].id)
+        return posts, next_cursor
+
     def update(self):
         """
         Updates the post object with new data.
@@ -139,9 +212,9 @@ class Post(db.Model):
             self._user_id = user_id
 
         try:
-            db.session.commit()
+            commit()
         except IntegrityError:
-            db.session.rollback()
+            rollback()
             logging.warning(f"IntegrityError: Could not update post with title '{title}' due to missing channel_id.")
             return None
         return self
@@ -158,9 +231,9 @@ class Post(db.Model):
         """    
         try:
             db.session.delete(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
         
     @staticmethod
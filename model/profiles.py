@@ -1,6 +1,7 @@
 from sqlite3 import IntegrityError
 from sqlalchemy import Text
 from __init__ import app, db
+from model.unit_of_work import commit
 from model.user import User
 
 class Profile(db.Model):
@@ -37,20 +38,20 @@ class Profile(db.Model):
     def add_class(self, class_name):
         if class_name not in self._classes:
             self._classes.append(class_name)
-            db.session.commit()
+            commit()
             return True
         return False
 
     def remove_class(self, class_name):
         if class_name in self._classes:
             self._classes.remove(class_name)
-            db.session.commit()
+            commit()
             return True
         return False
 
     def create(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
         return self
 
     def read(self):
@@ -69,12 +70,12 @@ class Profile(db.Model):
         self._classes = inputs.get("classes", self._classes)
         self._favorite_class = inputs.get("favorite_class", self._favorite_class)
         self._grade = inputs.get("grade", self._grade)
-        db.session.commit()
+        commit()
         return self
 
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
 
     @staticmethod
     def restore(data):
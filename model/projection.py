@@ -0,0 +1,183 @@
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from __init__ import app, db
+from model.unit_of_work import commit, rollback
+from model.gradelog import GradeLog
+
+MIN_GRADE = 0.0
+MAX_GRADE = 100.0
+
+
+def default_term_end(now):
+    """
+    Returns the configured GRADE_TERM_END, or the end of the current half year.
+    """
+    if app.config['GRADE_TERM_END']:
+        return date.fromisoformat(app.config['GRADE_TERM_END'])
+    return date(now.year, 6, 30) if now.month <= 6 else date(now.year, 12, 31)
+
+
+def fit_trends(codes, x, y, groups):
+    """
+    Fits y = intercept + slope * x for every group in one vectorized pass.
+
+    Args:
+        codes (ndarray): Group index of each sample, 0 to groups - 1.
+        x (ndarray): Sample positions.
+        y (ndarray): Sample values.
+        groups (int): Number of groups.
+
+    Returns:
+        tuple: (count, mean, slope, intercept) arrays indexed by group. Groups with fewer than
+            two samples or a single x get slope 0 and their mean as intercept.
+    """
+    count = np.bincount(codes, minlength=groups).astype(float)
+    sum_x = np.bincount(codes, weights=x, minlength=groups)
+    sum_y = np.bincount(codes, weights=y, minlength=groups)
+    sum_xx = np.bincount(codes, weights=x * x, minlength=groups)
+    sum_xy = np.bincount(codes, weights=x * y, minlength=groups)
+    denominator = count * sum_xx - sum_x ** 2
+    # Relative threshold, x values are large when the samples span a long time
+    fit = (count >= 2) & (denominator > 1e-9 * np.maximum(count * sum_xx, 1.0))
+    slope = np.zeros(groups)
+    np.divide(count * sum_xy - sum_x * sum_y, denominator, out=slope, where=fit)
+    mean_y = sum_y / count
+    intercept = mean_y - slope * (sum_x / count)
+    return count, mean_y, slope, intercept
+
+
+class GradeProjection(db.Model):
+    """
+    GradeProjection Model
+
+    Projected end-of-term grade of one user in one subject, from a linear trend fitted to the
+    user's grade logs in that subject. The whole table is recomputed by a batch job, reads
+    never fit anything.
+
+    Attributes:
+        user_id (db.Column): The student, part of the primary key.
+        subject (db.Column): The subject, part of the primary key.
+        samples (db.Column): Number of grades the trend was fitted to.
+        average (db.Column): Mean of those grades.
+        current (db.Column): Trend value at computation time.
+        slope_per_week (db.Column): Trend in grade points per week.
+        projected (db.Column): Trend value at term_end, clipped to 0-100.
+        term_end (db.Column): Date the projection is for.
+        computed_at (db.Column): When the batch job ran.
+    """
+    __tablename__ = 'grade_projections'
+    __table_args__ = (
+        db.Index('ix_grade_projections_subject_user_id', 'subject', 'user_id'),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    subject = db.Column(db.String(100), primary_key=True)
+    samples = db.Column(db.Integer, nullable=False)
+    average = db.Column(db.Float, nullable=False)
+    current = db.Column(db.Float, nullable=False)
+    slope_per_week = db.Column(db.Float, nullable=False)
+    projected = db.Column(db.Float, nullable=False)
+    term_end = db.Column(db.Date, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False)
+
+    def read(self):
+        return {
+            "user_id": self.user_id,
+            "subject": self.subject,
+            "samples": self.samples,
+            "average": round(self.average, 2),
+            "current": round(self.current, 2),
+            "slope_per_week": round(self.slope_per_week, 3),
+            "projected": round(self.projected, 2),
+            "term_end": self.term_end.isoformat(),
+            "computed_at": self.computed_at.isoformat()
+        }
+
+    @staticmethod
+    def compute(term_end=None, now=None):
+        """
+        Recomputes every (user, subject) projection and replaces the table in one transaction.
+
+        grade_logs is read once as columns, the rows are grouped with pandas.factorize and all
+        trends are fitted together with numpy bincount sums, so the cost does not grow with the
+        number of round trips per user.
+
+        Args:
+            term_end (date, optional): Date to project to, defaults to default_term_end.
+            now (datetime, optional): Defaults to the current UTC time.
+
+        Returns:
+            int: Number of projections written.
+        """
+        now = now or datetime.utcnow()
+        term_end = term_end or default_term_end(now)
+        rows = db.session.execute(
+            select(GradeLog.user_id, GradeLog.subject, GradeLog.grade, GradeLog.date).where(GradeLog.date.is_not(None))
+        ).all()
+        frame = pd.DataFrame(rows, columns=['user_id', 'subject', 'grade', 'date'])
+
+        records = []
+        if len(frame):
+            codes, groups = pd.factorize(pd.MultiIndex.from_frame(frame[['user_id', 'subject']]))
+            # Weeks relative to now, so the intercept is the current trend value
+            weeks = ((pd.to_datetime(frame['date']) - pd.Timestamp(now)) / pd.Timedelta(weeks=1)).to_numpy(dtype=float)
+            count, average, slope, current = fit_trends(codes, weeks, frame['grade'].to_numpy(dtype=float), len(groups))
+            horizon = (pd.Timestamp(term_end) - pd.Timestamp(now)) / pd.Timedelta(weeks=1)
+            projected = np.clip(current + slope * horizon, MIN_GRADE, MAX_GRADE)
+            records = pd.DataFrame({
+                'user_id': groups.get_level_values(0), 'subject': groups.get_level_values(1),
+                'samples': count.astype(int), 'average': average, 'current': current,
+                'slope_per_week': slope, 'projected': projected, 'term_end': term_end, 'computed_at': now
+            }).to_dict('records')
+
+        table = GradeProjection.__table__
+        try:
+            db.session.execute(table.delete())
+            for start in range(0, len(records), 1000):
+                db.session.execute(table.insert(), records[start:start + 1000])
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        return len(records)
+
+    @staticmethod
+    def for_class(subject, user_ids=None):
+        """
+        Returns the projections of a subject, optionally for a set of students, with a class
+        summary, read from the subject index.
+
+        Returns:
+            dict: "students" sorted by projected grade and "summary" with count, mean and
+                quartiles of the projected grades.
+        """
+        query = GradeProjection.query.filter(GradeProjection.subject == subject)
+        if user_ids:
+            query = query.filter(GradeProjection.user_id.in_(user_ids))
+        students = [projection.read() for projection in query.all()]
+        students.sort(key=lambda student: student["projected"], reverse=True)
+        projected = np.array([student["projected"] for student in students])
+        summary = {"count": len(students)}
+        if len(students):
+            quartiles = np.percentile(projected, [25, 50, 75])
+            summary.update({
+                "mean": round(float(projected.mean()), 2),
+                "p25": round(float(quartiles[0]), 2),
+                "median": round(float(quartiles[1]), 2),
+                "p75": round(float(quartiles[2]), 2),
+                "computed_at": students[0]["computed_at"],
+                "term_end": students[0]["term_end"]
+            })
+        return {"subject": subject, "students": students, "summary": summary}
+
+
+def initProjections():
+    """
+    Creates the grade_projections table and computes the projections.
+    """
+    with app.app_context():
+        db.create_all()
+        count = GradeProjection.compute()
+        print(f"Grade projections computed: {count}")
@@ -0,0 +1,265 @@
+import random
+import threading
+from sqlalchemy import JSON, event, select, update
+from sqlalchemy.orm import Session
+from __init__ import app, db
+from model.unit_of_work import commit, rollback
+
+
+class Question(db.Model):
+    """
+    Question Model
+
+    A multiple choice quiz question in the question bank.
+
+    Attributes:
+        id (db.Column): The primary key, also the questionId clients submit answers for.
+        _subject (db.Column): Short subject key used in URLs, e.g. "apush".
+        _category (db.Column): Optional topic within the subject.
+        _difficulty (db.Column): "easy", "medium" or "hard".
+        _text (db.Column): The question text.
+        _options (db.Column): JSON list of answer options.
+        _answer (db.Column): The correct option.
+    """
+    __tablename__ = 'questions'
+    __table_args__ = (
+        db.Index('ix_questions_subject_difficulty', '_subject', '_difficulty'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    _subject = db.Column(db.String(64), nullable=False)
+    _category = db.Column(db.String(255), nullable=True)
+    _difficulty = db.Column(db.String(16), nullable=False, default='medium')
+    _text = db.Column(db.String(1024), nullable=False)
+    _options = db.Column(JSON, nullable=False)
+    _answer = db.Column(db.String(255), nullable=False)
+
+    def __init__(self, subject, text, options, answer, category=None, difficulty='medium', id=None):
+        self.id = id
+        self._subject = subject
+        self._category = category
+        self._difficulty = difficulty
+        self._text = text
+        self._options = options
+        self._answer = answer
+
+    def create(self):
+        try:
+            db.session.add(self)
+            commit()
+            return self
+        except Exception as e:
+            rollback()
+            raise e
+
+    def read(self):
+        """
+        Returns the question as a dictionary, without the answer so it can be sent to quiz takers.
+        """
+        return {
+            "id": self.id,
+            "subject": self._subject,
+            "category": self._category,
+            "difficulty": self._difficulty,
+            "text": self._text,
+            "options": self._options
+        }
+
+    def delete(self):
+        try:
+            db.session.delete(self)
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+
+
+class QuestionBankVersion(db.Model):
+    """
+    Single row counter bumped in the same transaction as every question write, so each worker's
+    QuestionIndex can tell with one primary key lookup whether it must reload.
+    """
+    __tablename__ = 'question_bank_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    _version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class QuestionIndex:
+    """
+    In-process index of the question bank.
+
+    Holds each question's answer keyed by id for O(1) grading, plus prebuilt answer-free
+    question dictionaries grouped by subject and by (subject, difficulty) so drawing a quiz is
+    a random.sample over a ready list. The index is rebuilt when the bank version in the
+    database differs from the one it was built from.
+    """
+    def __init__(self):
+        self.version = None
+        self._answers = {}  # id -> (subject, answer)
+        self._pools = {}  # subject or (subject, difficulty) -> list of question dictionaries
+        self._lock = threading.Lock()
+
+    def sample(self, subject, count=10, difficulty=None):
+        """
+        Draws up to count random questions of a subject, optionally of one difficulty.
+
+        Returns:
+            list: Question dictionaries without answers, or None when the subject has no questions.
+        """
+        self._refresh()
+        pool = self._pools.get((subject, difficulty) if difficulty else subject)
+        if not pool:
+            return None
+        return random.sample(pool, min(count, len(pool)))
+
+    def grade(self, subject, answers):
+        """
+        Scores submitted answers, one dictionary lookup per answer.
+
+        Args:
+            subject (str): Subject of the quiz, answers to other subjects' questions do not count.
+            answers (list): Dictionaries with "questionId" and "answer".
+
+        Returns:
+            int: Number of correct answers, each question counted once.
+        """
+        self._refresh()
+        correct = set()
+        for answer in answers:
+            if not isinstance(answer, dict):
+                continue
+            question_id = answer.get("questionId")
+            entry = self._answers.get(question_id)
+            if entry is not None and entry[0] == subject and entry[1] == answer.get("answer"):
+                correct.add(question_id)
+        return len(correct)
+
+    def subjects(self):
+        self._refresh()
+        return sorted(key for key in self._pools if isinstance(key, str))
+
+    def _refresh(self):
+        version = db.session.execute(
+            select(QuestionBankVersion._version).where(QuestionBankVersion.id == 1)
+        ).scalar() or 0
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            answers = {}
+            pools = {}
+            for question in Question.query.order_by(Question.id):
+                answers[question.id] = (question._subject, question._answer)
+                public = question.read()
+                pools.setdefault(question._subject, []).append(public)
+                pools.setdefault((question._subject, question._difficulty), []).append(public)
+            self._answers, self._pools, self.version = answers, pools, version
+
+
+question_index = QuestionIndex()
+
+
+def bump_version(connection):
+    """
+    Increments the bank version on the given connection, creating the row on first use.
+    """
+    table = QuestionBankVersion.__table__
+    if not connection.execute(update(table).where(table.c.id == 1).values(_version=table.c._version + 1)).rowcount:
+        connection.execute(table.insert().values(id=1, _version=1))
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_on_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Question):
+            bump_version(session.connection())
+            return
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bump_on_statement(orm_execute_state):
+    # Statement level writes (bulk insert/update/delete) skip the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if getattr(table, 'name', None) == Question.__tablename__:
+            bump_version(orm_execute_state.session.connection())
+
+
+# Starter APUSH questions, previously the hard-coded question_pool in main.py and app.py
+APUSH_QUESTIONS = [
+    {"id": 1, "text": "Who was the first President of the United States?", "options": ["George Washington", "Thomas Jefferson", "John Adams", "James Madison"], "correctAnswer": "George Washington"},
+    {"id": 2, "text": "What year did the American Revolutionary War end?", "options": ["1776", "1781", "1783", "1791"], "correctAnswer": "1783"},
+    {"id": 3, "text": "What was the primary purpose of the Declaration of Independence?", "options": ["To declare war on Britain", "To establish a federal government", "To explain the reasons for American independence", "To create a constitution"], "correctAnswer": "To explain the reasons for American independence"},
+    {"id": 4, "text": "Which battle is considered the turning point of the American Civil War?", "options": ["Battle of Antietam", "Battle of Gettysburg", "Battle of Fort Sumter", "Battle of Vicksburg"], "correctAnswer": "Battle of Gettysburg"},
+    {"id": 5, "text": "Who wrote the 'Star-Spangled Banner' during the War of 1812?", "options": ["Francis Scott Key", "Thomas Paine", "Paul Revere", "John Quincy Adams"], "correctAnswer": "Francis Scott Key"},
+    {"id": 6, "text": "What was the main reason for the Louisiana Purchase?", "options": ["To expand westward", "To secure navigation rights on the Mississippi River", "To establish trade with Mexico", "To claim Alaska"], "correctAnswer": "To secure navigation rights on the Mississippi River"},
+    {"id": 7, "text": "Which event marked the start of the Great Depression?", "options": ["Stock Market Crash of 1929", "World War I", "Dust Bowl", "New Deal"], "correctAnswer": "Stock Market Crash of 1929"},
+    {"id": 8, "text": "What was the purpose of the Emancipation Proclamation?", "options": ["To free slaves in Confederate states", "To end the Civil War", "To grant voting rights to African Americans", "To create a constitutional amendment"], "correctAnswer": "To free slaves in Confederate states"},
+    {"id": 9, "text": "What was the significance of the Seneca Falls Convention of 1848?", "options": ["It launched the women's suffrage movement", "It ended slavery in the United States", "It marked the beginning of the abolitionist movement", "It established labor unions"], "correctAnswer": "It launched the women's suffrage movement"},
+    {"id": 10, "text": "What was the main goal of the Marshall Plan?", "options": ["To rebuild European economies after World War II", "To contain communism in Asia", "To establish NATO", "To rebuild Japan's military"], "correctAnswer": "To rebuild European economies after World War II"},
+    {"id": 11, "text": "Which Supreme Court case established judicial review?", "options": ["Marbury v. Madison", "McCulloch v. Maryland", "Dred Scott v. Sandford", "Brown v. Board of Education"], "correctAnswer": "Marbury v. Madison"},
+    {"id": 12, "text": "What was the main cause of the Mexican-American War?", "options": ["Border disputes over Texas", "Annexation of California", "Desire to acquire New Mexico", "Clash over Oregon territory"], "correctAnswer": "Border disputes over Texas"},
+    {"id": 13, "text": "Which amendment abolished slavery in the United States?", "options": ["13th Amendment", "14th Amendment", "15th Amendment", "19th Amendment"], "correctAnswer": "13th Amendment"},
+    {"id": 14, "text": "What was the primary purpose of the Monroe Doctrine?", "options": ["To prevent European colonization in the Americas", "To establish trade agreements with Europe", "To create alliances in Asia", "To defend against Native American attacks"], "correctAnswer": "To prevent European colonization in the Americas"},
+    {"id": 15, "text": "Which territory was acquired as a result of the Spanish-American War?", "options": ["Puerto Rico", "Hawaii", "Alaska", "Texas"], "correctAnswer": "Puerto Rico"},
+    {"id": 16, "text": "Who was the President during the Louisiana Purchase?", "options": ["Thomas Jefferson", "James Madison", "John Adams", "George Washington"], "correctAnswer": "Thomas Jefferson"},
+    {"id": 17, "text": "What was the primary goal of the Freedmen's Bureau?", "options": ["To help former slaves and poor whites", "To establish segregation laws", "To create northern industries", "To rebuild the southern economy"], "correctAnswer": "To help former slaves and poor whites"},
+    {"id": 18, "text": "Which event led directly to the start of the American Revolution?", "options": ["Boston Tea Party", "Stamp Act", "Boston Massacre", "Intolerable Acts"], "correctAnswer": "Intolerable Acts"},
+    {"id": 19, "text": "What was the significance of the Battle of Yorktown?", "options": ["It ended the Revolutionary War", "It began the Civil War", "It was a turning point in World War I", "It marked the end of the French and Indian War"], "correctAnswer": "It ended the Revolutionary War"},
+    {"id": 20, "text": "Which President issued the New Deal during the Great Depression?", "options": ["Franklin D. Roosevelt", "Herbert Hoover", "Harry S. Truman", "Woodrow Wilson"], "correctAnswer": "Franklin D. Roosevelt"},
+    {"id": 21, "text": "What was the goal of the Sherman Antitrust Act?", "options": ["To prevent monopolies and promote competition", "To establish labor unions", "To regulate stock markets", "To create income taxes"], "correctAnswer": "To prevent monopolies and promote competition"},
+    {"id": 22, "text": "Who was the author of 'Common Sense'?", "options": ["Thomas Paine", "Benjamin Franklin", "John Locke", "Alexander Hamilton"], "correctAnswer": "Thomas Paine"},
+    {"id": 23, "text": "Which treaty ended the Mexican-American War?", "options": ["Treaty of Guadalupe Hidalgo", "Treaty of Paris", "Adams-Onís Treaty", "Jay Treaty"], "correctAnswer": "Treaty of Guadalupe Hidalgo"},
+    {"id": 24, "text": "Which President is associated with the Trail of Tears?", "options": ["Andrew Jackson", "Martin Van Buren", "James Monroe", "Zachary Taylor"], "correctAnswer": "Andrew Jackson"},
+    {"id": 25, "text": "Which war was fought between the U.S. and Britain in the early 19th century?", "options": ["War of 1812", "Mexican-American War", "Spanish-American War", "World War I"], "correctAnswer": "War of 1812"},
+
+    {"id": 26, "text": "Which treaty ended the Revolutionary War?", "options": ["Treaty of Paris", "Treaty of Versailles", "Jay's Treaty", "Treaty of Ghent"], "correctAnswer": "Treaty of Paris"},
+    {"id": 27, "text": "Who was the leader of the Confederate Army during the Civil War?", "options": ["Robert E. Lee", "Ulysses S. Grant", "Stonewall Jackson", "Jefferson Davis"], "correctAnswer": "Robert E. Lee"},
+    {"id": 28, "text": "What was the primary goal of the abolitionist movement?", "options": ["To end slavery", "To expand suffrage", "To promote industrialization", "To defend states' rights"], "correctAnswer": "To end slavery"},
+    {"id": 29, "text": "What was the significance of the Homestead Act of 1862?", "options": ["It provided free land to settlers in the West", "It ended Reconstruction", "It promoted the growth of railroads", "It abolished slavery"], "correctAnswer": "It provided free land to settlers in the West"},
+    {"id": 30, "text": "Which economic policy was promoted by Alexander Hamilton?", "options": ["A strong central bank", "Laissez-faire capitalism", "Agrarian-based economy", "Free trade with Britain"], "correctAnswer": "A strong central bank"},
+    {"id": 31, "text": "What was the primary purpose of the Gadsden Purchase?", "options": ["To build a southern transcontinental railroad", "To annex California", "To establish Texas' borders", "To acquire Oregon"], "correctAnswer": "To build a southern transcontinental railroad"},
+    {"id": 32, "text": "What was the main effect of the Compromise of 1850?", "options": ["It allowed California to enter as a free state", "It started the Civil War", "It ended Reconstruction", "It established popular sovereignty in the North"], "correctAnswer": "It allowed California to enter as a free state"},
+    {"id": 33, "text": "Who was the main author of the U.S. Constitution?", "options": ["James Madison", "Alexander Hamilton", "Thomas Jefferson", "George Washington"], "correctAnswer": "James Madison"},
+    {"id": 34, "text": "What was the significance of the Dred Scott v. Sandford case?", "options": ["It ruled that African Americans could not be U.S. citizens", "It ended segregation", "It granted voting rights to women", "It established judicial review"], "correctAnswer": "It ruled that African Americans could not be U.S. citizens"},
+    {"id": 35, "text": "What was the main purpose of the Federalist Papers?", "options": ["To promote the ratification of the Constitution", "To establish the Bill of Rights", "To outline states' rights", "To end the Revolutionary War"], "correctAnswer": "To promote the ratification of the Constitution"},
+    {"id": 36, "text": "What did the Kansas-Nebraska Act of 1854 do?", "options": ["Allowed popular sovereignty to decide slavery", "Ended slavery in the U.S.", "Granted voting rights to women", "Created new railroads"], "correctAnswer": "Allowed popular sovereignty to decide slavery"},
+    {"id": 37, "text": "What was the primary reason for the War of 1812?", "options": ["British impressment of American sailors", "U.S. expansion into Mexico", "Conflict over the Louisiana Purchase", "Spanish interference in trade"], "correctAnswer": "British impressment of American sailors"},
+    {"id": 38, "text": "Who were the main laborers on the Transcontinental Railroad?", "options": ["Chinese and Irish immigrants", "Slaves and Native Americans", "Freedmen and women", "Mexicans and Canadians"], "correctAnswer": "Chinese and Irish immigrants"},
+    {"id": 39, "text": "Which event is associated with the start of the women's suffrage movement?", "options": ["Seneca Falls Convention", "Montgomery Bus Boycott", "The New Deal", "The Great Migration"], "correctAnswer": "Seneca Falls Convention"},
+    {"id": 40, "text": "What was the purpose of the Proclamation of 1763?", "options": ["To limit colonial expansion west of the Appalachians", "To establish new taxes on tea", "To create a trade alliance with Spain", "To declare war on France"], "correctAnswer": "To limit colonial expansion west of the Appalachians"},
+    {"id": 41, "text": "What did the 19th Amendment achieve?", "options": ["Granted women the right to vote", "Abolished slavery", "Limited presidential terms", "Guaranteed freedom of speech"], "correctAnswer": "Granted women the right to vote"},
+    {"id": 42, "text": "Which President is known for the Square Deal?", "options": ["Theodore Roosevelt", "Franklin D. Roosevelt", "Woodrow Wilson", "William Taft"], "correctAnswer": "Theodore Roosevelt"},
+    {"id": 43, "text": "What was the goal of the Civilian Conservation Corps (CCC)?", "options": ["To create jobs during the Great Depression", "To end slavery", "To promote women's suffrage", "To build the Transcontinental Railroad"], "correctAnswer": "To create jobs during the Great Depression"},
+    {"id": 44, "text": "Which treaty ended World War I?", "options": ["Treaty of Versailles", "Treaty of Paris", "Treaty of Ghent", "Treaty of Guadalupe Hidalgo"], "correctAnswer": "Treaty of Versailles"},
+    {"id": 45, "text": "What was the purpose of the Fugitive Slave Act?", "options": ["To require the return of escaped slaves to their owners", "To abolish slavery in the North", "To create abolitionist societies", "To protect freed slaves in the South"], "correctAnswer": "To require the return of escaped slaves to their owners"},
+    {"id": 46, "text": "What was the primary goal of the Lewis and Clark Expedition?", "options": ["To explore the Louisiana Territory", "To establish settlements in Oregon", "To expand the railroad system", "To negotiate with Native American tribes"], "correctAnswer": "To explore the Louisiana Territory"},
+    {"id": 47, "text": "Who was the President during the Cuban Missile Crisis?", "options": ["John F. Kennedy", "Dwight D. Eisenhower", "Lyndon B. Johnson", "Richard Nixon"], "correctAnswer": "John F. Kennedy"},
+    {"id": 48, "text": "What was the main reason for the Salem Witch Trials?", "options": ["Religious hysteria and social tensions", "A Native American uprising", "Political corruption", "A lack of education"], "correctAnswer": "Religious hysteria and social tensions"},
+    {"id": 49, "text": "What was the purpose of the Social Security Act of 1935?", "options": ["To provide financial assistance to the elderly and unemployed", "To regulate labor unions", "To fund public education", "To establish a minimum wage"], "correctAnswer": "To provide financial assistance to the elderly and unemployed"},
+    {"id": 50, "text": "Which amendment gave African American men the right to vote?", "options": ["15th Amendment", "13th Amendment", "14th Amendment", "19th Amendment"], "correctAnswer": "15th Amendment"}
+]
+
+
+def initQuestions():
+    """
+    The initQuestions function creates the Question table and adds the APUSH starter questions.
+    """
+    with app.app_context():
+        db.create_all()
+        if Question.query.filter_by(_subject='apush').first():
+            print("Questions already exist.")
+            return
+        try:
+            db.session.add_all([
+                Question(id=question["id"], subject='apush', text=question["text"],
+                         options=question["options"], answer=question["correctAnswer"])
+                for question in APUSH_QUESTIONS
+            ])
+            db.session.commit()
+            print(f"Questions created: {len(APUSH_QUESTIONS)}")
+        except Exception as e:
+            db.session.rollback()
+            raise e
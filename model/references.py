@@ -0,0 +1,25 @@
+from __init__ import db
+
+
+def resolve_references(rows, references):
+    """
+    Looks up a column of the rows referenced by a list of rows, one IN query per reference
+    however many rows are passed, so a listing is serialized without a lookup per row.
+
+    Args:
+        rows (list): Model objects to serialize, e.g. posts.
+        references (dict): Foreign key attribute of the rows -> column of the referenced model,
+            e.g. {'_user_id': User._name, '_channel_id': Channel._name}. The referenced model is
+            matched on its id.
+
+    Returns:
+        dict: Foreign key attribute -> {referenced id: column value}, ids that match no row are
+            missing, so .get() gives None as the per-row lookups did.
+    """
+    resolved = {}
+    for attribute, column in references.items():
+        ids = {getattr(row, attribute) for row in rows}
+        ids.discard(None)
+        id_column = column.class_.id
+        resolved[attribute] = dict(db.session.query(id_column, column).filter(id_column.in_(ids)).all()) if ids else {}
+    return resolved
@@ -0,0 +1,251 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event, exists, insert, inspect, literal, or_, select, update
+from __init__ import app, db
+from model.unit_of_work import commit, rollback
+from model.flashcard import Flashcard
+
+# SM-2 constants
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+MAX_PAGE_SIZE = 100
+
+
+def schedule(ease, interval, repetitions, grade, now):
+    """
+    Applies one SM-2 review to a card's scheduling state.
+
+    Args:
+        ease (float): Current ease factor.
+        interval (int): Current interval in days.
+        repetitions (int): Consecutive successful reviews so far.
+        grade (int): Recall quality from 0 (blackout) to 5 (perfect).
+        now (datetime): Time of the review.
+
+    Returns:
+        tuple: (ease, interval, repetitions, due_at) after the review.
+    """
+    if grade < 3:
+        repetitions = 0
+        interval = 1
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval = 1
+        elif repetitions == 2:
+            interval = 6
+        else:
+            interval = int(round(interval * ease))
+    ease = max(MIN_EASE, ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    return ease, interval, repetitions, now + timedelta(days=interval)
+
+
+class ReviewState(db.Model):
+    """
+    ReviewState Model
+
+    Spaced-repetition scheduling state of one flashcard for one user, one compact row per card.
+    New cards get a row due immediately, so the review queue is always an index range scan on
+    (user, due_at) and never a scan of the user's flashcards.
+
+    Attributes:
+        _user_id (db.Column): The user studying the card, part of the primary key.
+        _flashcard_id (db.Column): The card, part of the primary key.
+        _deck_id (db.Column): The card's deck, copied here so deck queues use the same index.
+        _ease (db.Column): SM-2 ease factor.
+        _interval (db.Column): Current interval in days.
+        _repetitions (db.Column): Consecutive successful reviews.
+        _due_at (db.Column): When the card is next due.
+    """
+    __tablename__ = 'review_states'
+    __table_args__ = (
+        db.Index('ix_review_states_user_id_due_at', '_user_id', '_due_at'),
+        db.Index('ix_review_states_user_id_deck_id_due_at', '_user_id', '_deck_id', '_due_at'),
+    )
+
+    _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    _flashcard_id = db.Column(db.Integer, db.ForeignKey('flashcards.id', ondelete='CASCADE'), primary_key=True)
+    _deck_id = db.Column(db.Integer, nullable=True)
+    _ease = db.Column(db.Float, nullable=False, default=DEFAULT_EASE)
+    _interval = db.Column(db.Integer, nullable=False, default=0)
+    _repetitions = db.Column(db.Integer, nullable=False, default=0)
+    _due_at = db.Column(db.DateTime, nullable=False)
+
+    @staticmethod
+    def next_due(user_id, deck_id=None, limit=20, now=None):
+        """
+        Returns the cards due for a user, most overdue first, with their question and answer.
+
+        Args:
+            user_id (int): The user studying.
+            deck_id (int, optional): Only cards from this deck.
+            limit (int): Maximum number of cards, capped at MAX_PAGE_SIZE.
+            now (datetime, optional): Review time, defaults to the current UTC time.
+
+        Returns:
+            list: Dictionaries with the card and its scheduling state.
+        """
+        now = now or datetime.utcnow()
+        query = select(
+            ReviewState._flashcard_id, ReviewState._deck_id, ReviewState._ease, ReviewState._interval,
+            ReviewState._repetitions, ReviewState._due_at, Flashcard._title, Flashcard._content
+        ).join(Flashcard, Flashcard.id == ReviewState._flashcard_id).where(
+            ReviewState._user_id == user_id, ReviewState._due_at <= now
+        )
+        if deck_id is not None:
+            query = query.where(ReviewState._deck_id == deck_id)
+        query = query.order_by(ReviewState._due_at).limit(min(limit, MAX_PAGE_SIZE))
+        return [{
+            "flashcard_id": flashcard_id,
+            "deck_id": card_deck_id,
+            "title": title,
+            "content": content,
+            "ease": round(ease, 2),
+            "interval": interval,
+            "repetitions": repetitions,
+            "due_at": due_at.isoformat()
+        } for flashcard_id, card_deck_id, ease, interval, repetitions, due_at, title, content in db.session.execute(query)]
+
+    @staticmethod
+    def record(user_id, results, now=None):
+        """
+        Applies a batch of graded reviews in one transaction.
+
+        States are loaded with one IN query per 500 cards and written back with one batched
+        UPDATE. Invalid entries are reported and skipped, the valid ones are all committed together.
+
+        Args:
+            user_id (int): The user who reviewed the cards.
+            results (list): Dictionaries with "flashcard_id" and "grade" (0-5).
+            now (datetime, optional): Review time, defaults to the current UTC time.
+
+        Returns:
+            tuple: (updated, errors) where updated lists the new state per reviewed card and errors
+                lists {"index", "message"} for each skipped entry.
+        """
+        now = now or datetime.utcnow()
+        errors = []
+        grades = {}
+        for index, result in enumerate(results):
+            flashcard_id = result.get("flashcard_id") if isinstance(result, dict) else None
+            grade = result.get("grade") if isinstance(result, dict) else None
+            if not isinstance(flashcard_id, int):
+                errors.append({"index": index, "message": "flashcard_id must be an integer"})
+            elif not isinstance(grade, int) or isinstance(grade, bool) or not 0 <= grade <= 5:
+                errors.append({"index": index, "message": "grade must be an integer from 0 to 5"})
+            else:
+                grades[flashcard_id] = (index, grade)  # the last grade for a card wins
+
+        states = {}
+        ids = list(grades)
+        for start in range(0, len(ids), 500):
+            rows = db.session.execute(select(
+                ReviewState._flashcard_id, ReviewState._ease, ReviewState._interval, ReviewState._repetitions
+            ).where(ReviewState._user_id == user_id, ReviewState._flashcard_id.in_(ids[start:start + 500])))
+            for flashcard_id, ease, interval, repetitions in rows:
+                states[flashcard_id] = (ease, interval, repetitions)
+
+        updates = []
+        for flashcard_id, (index, grade) in grades.items():
+            state = states.get(flashcard_id)
+            if state is None:
+                errors.append({"index": index, "message": f"Flashcard {flashcard_id} not found"})
+                continue
+            ease, interval, repetitions, due_at = schedule(*state, grade, now)
+            updates.append({
+                "_user_id": user_id, "_flashcard_id": flashcard_id, "_ease": ease,
+                "_interval": interval, "_repetitions": repetitions, "_due_at": due_at
+            })
+
+        try:
+            if updates:
+                db.session.execute(update(ReviewState), updates)  # batched UPDATE by primary key
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        errors.sort(key=lambda error: error["index"])
+        updated = [{
+            "flashcard_id": row["_flashcard_id"],
+            "ease": round(row["_ease"], 2),
+            "interval": row["_interval"],
+            "repetitions": row["_repetitions"],
+            "due_at": row["_due_at"].isoformat()
+        } for row in updates]
+        return updated, errors
+
+    @staticmethod
+    def seed(after_id=0, user_ids=None, deck_ids=None, flashcard_ids=None, connection=None):
+        """
+        Creates states, due now, for flashcards that do not have one yet.
+
+        Args:
+            after_id (int): Only flashcards with a greater id, lets bulk inserts seed just the
+                rows they added with a primary key range scan.
+            user_ids (list, optional): Only flashcards owned by these users.
+            deck_ids (list, optional): Only flashcards in these decks, None matches cards without one.
+            flashcard_ids (list, optional): Only these flashcards.
+            connection (Connection, optional): Connection to run on, defaults to the session's.
+
+        Returns:
+            int: Number of states created.
+        """
+        cards = Flashcard.__table__
+        states = ReviewState.__table__
+        source = select(
+            cards.c._user_id, cards.c.id, cards.c._deck_id, literal(DEFAULT_EASE), literal(0), literal(0),
+            literal(datetime.utcnow())
+        ).where(cards.c.id > after_id, ~exists().where(
+            states.c._user_id == cards.c._user_id, states.c._flashcard_id == cards.c.id
+        ))
+        if user_ids is not None:
+            source = source.where(cards.c._user_id.in_(user_ids))
+        if deck_ids is not None:
+            in_decks = cards.c._deck_id.in_([deck for deck in deck_ids if deck is not None])
+            source = source.where(or_(in_decks, cards.c._deck_id.is_(None)) if None in deck_ids else in_decks)
+        if flashcard_ids is not None:
+            source = source.where(cards.c.id.in_(flashcard_ids))
+        statement = insert(states).from_select(
+            ['_user_id', '_flashcard_id', '_deck_id', '_ease', '_interval', '_repetitions', '_due_at'], source
+        )
+        return (connection or db.session.connection()).execute(statement).rowcount
+
+
+@event.listens_for(Flashcard, 'after_insert')
+def _schedule_new_card(mapper, connection, target):
+    connection.execute(insert(ReviewState.__table__).values(
+        _user_id=target._user_id, _flashcard_id=target.id, _deck_id=target._deck_id,
+        _ease=DEFAULT_EASE, _interval=0, _repetitions=0, _due_at=datetime.utcnow()
+    ))
+
+
+@event.listens_for(Flashcard, 'after_update')
+def _move_card(mapper, connection, target):
+    if not inspect(target).attrs._deck_id.history.has_changes():
+        return
+    states = ReviewState.__table__
+    connection.execute(update(states).where(
+        states.c._user_id == target._user_id, states.c._flashcard_id == target.id
+    ).values(_deck_id=target._deck_id))
+
+
+@event.listens_for(Flashcard, 'after_delete')
+def _unschedule_card(mapper, connection, target):
+    states = ReviewState.__table__
+    connection.execute(states.delete().where(
+        states.c._user_id == target._user_id, states.c._flashcard_id == target.id
+    ))
+
+
+def initReviewStates():
+    """
+    Creates the review_states table and schedules every flashcard that has no state yet.
+    """
+    with app.app_context():
+        db.create_all()
+        try:
+            count = ReviewState.seed()
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        print(f"Review states created: {count}")
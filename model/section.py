@@ -1,6 +1,7 @@
 # section.py
 from sqlite3 import IntegrityError
 from __init__ import app, db
+from model.unit_of_work import commit, rollback
 
 class Section(db.Model):
     """
@@ -54,9 +55,9 @@ class Section(db.Model):
         """
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
         
     def read(self):
@@ -95,9 +96,9 @@ class Section(db.Model):
             self._theme = theme
 
         try:
-            db.session.commit()
+            commit()
         except IntegrityError:
-            db.session.rollback()
+            rollback()
             return None
         return self
     
@@ -113,7 +114,7 @@ class Section(db.Model):
             else:
                 section = Section(**section_data)
                 section.create()        
-        db.session.commit()
+        commit()
         return sections
 
 def initSections():
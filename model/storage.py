@@ -0,0 +1,243 @@
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from __init__ import app
+
+URL_CACHE_SIZE = 10000  # presigned URLs kept per process for reuse
+
+
+class LocalStorage:
+    """
+    Keeps uploaded objects as files under a folder on the server, the default. Objects are served
+    by the app, so url returns None and callers send the file at path instead.
+
+    Attributes:
+        root (str): Folder the object keys are relative to.
+    """
+    name = 'local'
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        """
+        Returns the file of an object, whether or not it exists.
+        """
+        return os.path.join(self.root, *key.split('/'))
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def put_file(self, key, local_path):
+        """
+        Moves a finished temporary file into place with a rename, so readers never see a partial
+        object. The temporary file must be on the same filesystem as root.
+        """
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(local_path, path)
+
+    def move(self, key, new_key):
+        """
+        Renames an object, returns False if it does not exist.
+        """
+        try:
+            os.replace(self.path(key), self.path(new_key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def list_objects(self, prefix):
+        """
+        Yields (key, bytes, modified) of every object under a key prefix ending in "/", modified
+        as a naive UTC datetime.
+        """
+        root = self.path(prefix)
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # removed while walking
+                key = prefix + os.path.relpath(path, root).replace(os.sep, '/')
+                yield key, stat.st_size, datetime.utcfromtimestamp(stat.st_mtime)
+
+    @contextmanager
+    def local_copy(self, key):
+        """
+        Yields a file holding the object, for code that needs a path, here the object itself.
+        """
+        yield self.path(key)
+
+    def url(self, key):
+        return None
+
+
+class S3Storage:
+    """
+    Keeps uploaded objects in an S3 bucket, or any S3-compatible server such as MinIO with
+    endpoint_url. Reads are answered with a presigned GET URL, so image bytes go from the bucket
+    to the browser and never through the app. Objects are content-addressed and never change,
+    they are written with an immutable Cache-Control that the bucket sends with every GET.
+
+    A presigned URL is reused for half its lifetime, the signature changes every second and a
+    fresh URL would miss the browser's cache of the same image.
+
+    boto3 clients are not safe to share across fork, each process makes its own on first use,
+    so the image pool processes can read and write the bucket too. Credentials come from the
+    usual AWS environment variables, shared config or instance role.
+
+    Attributes:
+        bucket (str): Bucket name.
+        prefix (str): Prepended to every key, so the bucket can be shared.
+        expires (int): Seconds a presigned URL stays valid.
+    """
+    name = 's3'
+
+    def __init__(self, bucket, prefix='', region=None, endpoint_url=None, expires=3600, cache_max_age=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.region = region
+        self.endpoint_url = endpoint_url
+        self.expires = expires
+        self.cache_max_age = cache_max_age
+        self._lock = threading.Lock()
+        self._client = None
+        self._pid = None
+        self._urls = {}  # key -> (url, signed at), presigned URLs still worth handing out
+
+    def client(self):
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                import boto3
+                self._client = boto3.client('s3', region_name=self.region, endpoint_url=self.endpoint_url)
+                self._pid = os.getpid()
+            return self._client
+
+    def path(self, key):
+        return None
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client().head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
+
+    def put_file(self, key, local_path):
+        """
+        Uploads a finished temporary file, multipart for large files, then removes it. An object
+        only becomes visible once the upload completes.
+        """
+        extra = {'ContentType': mimetypes.guess_type(key)[0] or 'application/octet-stream'}
+        if self.cache_max_age:
+            extra['CacheControl'] = f"private, max-age={self.cache_max_age}, immutable"
+        self.client().upload_file(local_path, self.bucket, self.prefix + key, ExtraArgs=extra)
+        os.remove(local_path)
+
+    def move(self, key, new_key):
+        """
+        Copies an object to a new key and deletes the old one, returns False if it does not exist.
+        """
+        from botocore.exceptions import ClientError
+        client = self.client()
+        try:
+            client.copy({'Bucket': self.bucket, 'Key': self.prefix + key}, self.bucket, self.prefix + new_key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+        return True
+
+    def delete(self, key):
+        # Deleting a missing key succeeds
+        self.client().delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def open(self, key):
+        return self.client().get_object(Bucket=self.bucket, Key=self.prefix + key)['Body']
+
+    def list_objects(self, prefix):
+        """
+        Yields (key, bytes, modified) of every object under a key prefix, a page of 1000 keys
+        per request, modified as a naive UTC datetime.
+        """
+        pages = self.client().get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=self.prefix + prefix)
+        for page in pages:
+            for item in page.get('Contents', []):
+                modified = item['LastModified'].astimezone(timezone.utc).replace(tzinfo=None)
+                yield item['Key'][len(self.prefix):], item['Size'], modified
+
+    @contextmanager
+    def local_copy(self, key):
+        """
+        Downloads the object to a temporary file and yields its path, the file is removed after.
+        """
+        fd, path = tempfile.mkstemp(prefix='.tmp-', suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            self.client().download_file(self.bucket, self.prefix + key, path)
+            yield path
+        finally:
+            os.remove(path)
+
+    def url(self, key):
+        """
+        Returns a presigned GET URL of an object, valid for at least half of expires seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._urls.get(key)
+        if cached and now - cached[1] < self.expires / 2:
+            return cached[0]
+        url = self.client().generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': self.prefix + key}, ExpiresIn=self.expires
+        )
+        with self._lock:
+            if len(self._urls) >= URL_CACHE_SIZE:
+                self._urls = {k: v for k, v in self._urls.items() if now - v[1] < self.expires / 2}
+                if len(self._urls) >= URL_CACHE_SIZE:
+                    self._urls.clear()
+            self._urls[key] = (url, now)
+        return url
+
+
+def make_storage(config):
+    """
+    Returns the storage backend chosen by STORAGE_BACKEND, "local" or "s3".
+    """
+    backend = config['STORAGE_BACKEND']
+    if backend == 'local':
+        return LocalStorage(config['UPLOAD_FOLDER'])
+    if backend == 's3':
+        if not config['STORAGE_S3_BUCKET']:
+            raise ValueError("STORAGE_S3_BUCKET is required for the s3 storage backend")
+        return S3Storage(
+            config['STORAGE_S3_BUCKET'],
+            prefix=config['STORAGE_S3_PREFIX'],
+            region=config['STORAGE_S3_REGION'],
+            endpoint_url=config['STORAGE_S3_ENDPOINT_URL'],
+            expires=config['STORAGE_URL_EXPIRES'],
+            cache_max_age=config['IMAGE_CACHE_MAX_AGE']
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend}, use local or s3")
+
+
+storage = make_storage(app.config)
@@ -1,8 +1,11 @@
+import base64
+import json
 import logging
+from sqlalchemy import and_, or_
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from __init__ import app, db
-from model.user import User
+from model.unit_of_work import commit, rollback
 
 class StudyLog(db.Model):
     """
@@ -12,6 +15,7 @@ class StudyLog(db.Model):
     """
 
     __tablename__ = 'studylog'
+    MAX_PAGE_SIZE = 200
 
     # Columns in the 'studylog' table
     id = db.Column(db.Integer, primary_key=True)
@@ -19,7 +23,7 @@ class StudyLog(db.Model):
     subject = db.Column(db.String(100), nullable=False)      # subject of study
     hours_studied = db.Column(db.Float, nullable=False)      # amount of time studied (in hours)
     notes = db.Column(db.Text)                               # any additional notes
-    date = db.Column(db.DateTime, default=db.func.current_timestamp())  # timestamp of the study session
+    date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # timestamp of the study session, UTC, set in Python so rollups see it
 
     def __init__(self, user_id, subject, hours_studied, notes='', date=None):
         """
@@ -48,9 +52,9 @@ class StudyLog(db.Model):
         """
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
         except IntegrityError as e:
-            db.session.rollback()
+            rollback()
             logging.warning(f"IntegrityError: Could not create studylog with subject '{self.subject}' due to {str(e)}.")
             return None
         return self
@@ -58,16 +62,15 @@ class StudyLog(db.Model):
     def read(self):
         """
         Converts the StudyLog object into a dictionary for JSON serialization.
-        Includes user_id from the 'users' table (linked by ForeignKey).
+        Uses the user_id column directly, so no 'users' row is loaded.
         """
-        user = User.query.get(self.user_id)
         data = {
             "id": self.id,
-            "user_id": user.id if user else None,
+            "user_id": self.user_id,
             "subject": self.subject,
             "hours_studied": self.hours_studied,
             "notes": self.notes,
-            "date": self.date.strftime('%Y-%m-%d %H:%M:%S')
+            "date": self.date.strftime('%Y-%m-%d %H:%M:%S') if self.date else None  # tables made before date was required can hold NULL
         }
         return data
 
@@ -79,9 +82,9 @@ class StudyLog(db.Model):
         for key, value in data.items():
             setattr(self, key, value)  # set each attribute to the new value
         try:
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
 
     def delete(self):
@@ -91,11 +94,91 @@ class StudyLog(db.Model):
         """
         try:
             db.session.delete(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
 
+    @staticmethod
+    def encode_cursor(log):
+        """
+        Wraps the (user_id, date, id) position of the last log of a page into an opaque cursor string.
+        """
+        position = {"user_id": log.user_id, "date": log.date.isoformat(), "id": log.id}
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Unwraps a cursor made by encode_cursor into (user_id, date, id).
+
+        Raises:
+            ValueError: The cursor is malformed.
+        """
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return int(position["user_id"]), datetime.fromisoformat(position["date"]), int(position["id"])
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def filtered(user_id=None, subject=None, start=None, end=None):
+        """
+        Builds a StudyLog query with the filters applied in SQL.
+
+        Args:
+            user_id (int, optional): Only this user's logs, None for every user.
+            subject (str, optional): Only logs of this subject.
+            start (datetime, optional): Only logs dated at or after start.
+            end (datetime, optional): Only logs dated before end.
+        """
+        query = StudyLog.query
+        if user_id is not None:
+            query = query.filter(StudyLog.user_id == user_id)
+        if subject:
+            query = query.filter(StudyLog.subject == subject)
+        if start is not None:
+            query = query.filter(StudyLog.date >= start)
+        if end is not None:
+            query = query.filter(StudyLog.date < end)
+        return query
+
+    @staticmethod
+    def paginate(query, cursor=None, limit=50):
+        """
+        Returns one page of a StudyLog query ordered by user, then newest first, using keyset
+        pagination on (user_id, date, id). Logs without a date, possible in tables created before
+        date was required, have no position in that order and are left out.
+
+        Args:
+            query (Query): A StudyLog query, typically from filtered.
+            cursor (str, optional): The next_cursor returned with the previous page.
+            limit (int): Page size, capped at MAX_PAGE_SIZE.
+
+        Returns:
+            tuple: (logs, next_cursor) where next_cursor is None on the last page.
+
+        Raises:
+            ValueError: The cursor is malformed.
+        """
+        limit = max(1, min(limit, StudyLog.MAX_PAGE_SIZE))
+        query = query.filter(StudyLog.date.is_not(None))
+        if cursor:
+            user_id, date, log_id = StudyLog.decode_cursor(cursor)
+            query = query.filter(or_(
+                StudyLog.user_id > user_id,
+                and_(StudyLog.user_id == user_id, or_(
+                    StudyLog.date < date,
+                    and_(StudyLog.date == date, StudyLog.id < log_id)
+                ))
+            ))
+        logs = query.order_by(StudyLog.user_id, StudyLog.date.desc(), StudyLog.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(logs) > limit:
+            logs = logs[:limit]
+            next_cursor = StudyLog.encode_cursor(logs[-1])
+        return logs, next_cursor
+
     @staticmethod
     def restore(data):
         """
@@ -131,14 +214,18 @@ class StudyLog(db.Model):
             try:
                 new_studylog = StudyLog(**log_data)
                 db.session.add(new_studylog)
-                db.session.commit()
+                commit()
             except IntegrityError as e:
-                db.session.rollback()
+                rollback()
                 logging.warning(f"IntegrityError: Could not restore log due to {str(e)}.")
             except Exception as e:
-                db.session.rollback()
+                rollback()
                 logging.warning(f"Error restoring log: {str(e)}.")
 
+# Keyset pages walk this index, one user's logs newest first
+db.Index('ix_studylog_user_id_date_id', StudyLog.user_id, StudyLog.date.desc(), StudyLog.id.desc())
+
+
 def initStudyLog():
     """
     Initializes the StudyLog table and inserts some default records 
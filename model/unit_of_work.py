@@ -0,0 +1,111 @@
+from contextlib import ContextDecorator
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from __init__ import app, db
+
+
+def in_unit_of_work():
+    """
+    Tells whether the current session is inside a unit of work.
+    """
+    return db.session.info.get('unit_of_work', 0) > 0
+
+
+def commit():
+    """
+    Commits the session, or only flushes it inside a unit of work so the boundary commits once.
+
+    Model create/update/delete methods call this instead of db.session.commit(). A flush still
+    assigns primary keys and raises constraint errors at the same point a commit would.
+    """
+    if in_unit_of_work():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+def rollback():
+    """
+    Rolls the session back. Inside a unit of work the whole unit is marked as failed, so the
+    boundary rolls back instead of committing whatever is written afterwards.
+    """
+    db.session.rollback()
+    if in_unit_of_work():
+        db.session.info['unit_of_work_failed'] = True
+
+
+class unit_of_work(ContextDecorator):
+    """
+    Groups model writes into one transaction with a single commit or rollback at the boundary.
+
+    Use it as `with unit_of_work():` in CLI commands and scripts, or as `@unit_of_work()` on a
+    view. Units nest, only the outermost one commits. With UNIT_OF_WORK enabled every request
+    runs as one unit, committed after the view returns a non-error response.
+    """
+    def __enter__(self):
+        begin()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end(success=exc_type is None)
+        return False
+
+
+def begin():
+    info = db.session.info
+    if not info.get('unit_of_work'):
+        info['unit_of_work_failed'] = False
+    info['unit_of_work'] = info.get('unit_of_work', 0) + 1
+
+
+def end(success=True):
+    """
+    Leaves a unit of work, the outermost exit commits on success and rolls back otherwise.
+    """
+    info = db.session.info
+    depth = info.get('unit_of_work', 0)
+    if depth <= 0:
+        return
+    if not success:
+        info['unit_of_work_failed'] = True
+    info['unit_of_work'] = depth - 1
+    if depth > 1:
+        return
+    failed = info.pop('unit_of_work_failed', False)
+    if failed:
+        db.session.rollback()
+        return
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise e
+
+
+@event.listens_for(Session, 'after_commit')
+def _count_commit(session):
+    if has_request_context():
+        g.commit_count = g.get('commit_count', 0) + 1
+
+
+@app.before_request
+def _begin_request_unit():
+    if app.config['UNIT_OF_WORK']:
+        begin()
+        g.unit_of_work = True
+
+
+@app.after_request
+def _end_request_unit(response):
+    if g.pop('unit_of_work', False):
+        end(success=response.status_code < 400)
+    response.headers['X-Commit-Count'] = str(g.get('commit_count', 0))
+    return response
+
+
+@app.teardown_request
+def _discard_request_unit(exc):
+    # The view raised, after_request did not run
+    if g.pop('unit_of_work', False):
+        end(success=False)
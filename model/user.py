@@ -2,12 +2,14 @@
 from flask import current_app
 from flask_login import UserMixin
 from datetime import date, datetime
+from sqlalchemy import insert
 from sqlalchemy.exc import IntegrityError
-from werkzeug.security import generate_password_hash, check_password_hash
 import os
 import json
 
 from __init__ import app, db
+from model.unit_of_work import commit, in_unit_of_work, rollback
+from model.password import password_hasher
 
 """ Association Table for User and Classes """
 user_classes = db.Table('user_classes',
@@ -270,11 +272,14 @@ class User(db.Model, UserMixin):
         """
         if not password or password == "":
             password=app.config["DEFAULT_PASSWORD"]
-        self._password = generate_password_hash(password, "pbkdf2:sha256", salt_length=10)
+        self._password = password_hasher.hash(password)
 
     def is_password(self, password):
         """
         Checks if the provided password matches the user's stored password.
+
+        On a match, a hash stored with older parameters is transparently rehashed with the
+        current cost and committed.
         
         Args:
             password (str): The password to check.
@@ -282,7 +287,15 @@ class User(db.Model, UserMixin):
         Returns:
             bool: True if the password matches, False otherwise.
         """
-        return check_password_hash(self._password, password)
+        if not password_hasher.check(self._password, password):
+            return False
+        if password_hasher.needs_rehash(self._password):
+            self._password = password_hasher.hash(password)
+            try:
+                commit()
+            except IntegrityError:
+                rollback()
+        return True
 
     def __str__(self):
         """
@@ -346,12 +359,12 @@ class User(db.Model, UserMixin):
     def join_class(self, class_instance):
         if not self.is_in_class(class_instance):
             self.joined_classes.append(class_instance)
-            db.session.commit()
+            commit()
 
     def leave_class(self, class_instance):
         if self.is_in_class(class_instance):
             self.joined_classes.remove(class_instance)
-            db.session.commit()
+            commit()
 
     def is_in_class(self, class_instance):
         return self.joined_classes.filter(user_classes.c.class_id == class_instance.id).count() > 0
@@ -359,6 +372,70 @@ class User(db.Model, UserMixin):
     def get_classes(self):
         return [cls.name for cls in self.joined_classes.all()]
 
+    # Columns available to read_page, keyed by the names used in read()
+    READ_FIELDS = {
+        "id": "id",
+        "uid": "_uid",
+        "name": "_name",
+        "email": "_email",
+        "role": "_role",
+        "pfp": "_pfp"
+    }
+    DEFAULT_READ_FIELDS = ["id", "uid", "name", "email", "role", "joined_classes"]
+
+    @staticmethod
+    def read_page(after_id=None, limit=None, fields=None):
+        """
+        Reads users in id order as dictionaries, one page at a time.
+
+        Only the requested columns are selected, and joined_classes (when requested) are loaded
+        for the whole page with a single query against user_classes instead of one query per user.
+
+        Args:
+            after_id (int, optional): Keyset cursor, only users with a greater id are returned.
+            limit (int, optional): Maximum number of users to return, all remaining users if None.
+            fields (list, optional): Keys to include, any of READ_FIELDS plus "joined_classes".
+                Defaults to the same keys as read().
+
+        Returns:
+            tuple: (users, next_after_id) where next_after_id is the cursor for the next page, or
+                None when there are no more users.
+        """
+        fields = fields or User.DEFAULT_READ_FIELDS
+        columns = [field for field in fields if field in User.READ_FIELDS]
+        if "id" not in columns:
+            columns.insert(0, "id")
+
+        query = db.session.query(*[getattr(User, User.READ_FIELDS[field]) for field in columns])
+        if after_id is not None:
+            query = query.filter(User.id > after_id)
+        query = query.order_by(User.id)
+        if limit is not None:
+            query = query.limit(limit + 1)  # one extra row tells whether another page exists
+        rows = query.all()
+
+        next_after_id = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_after_id = rows[-1][0]
+
+        users = [{field: value for field, value in zip(columns, row) if field in fields} for row in rows]
+
+        if "joined_classes" in fields:
+            classes = {user["id"]: [] for user in users}
+            if classes:
+                class_rows = db.session.query(user_classes.c.user_id, Class.name) \
+                    .join(Class, Class.id == user_classes.c.class_id) \
+                    .filter(user_classes.c.user_id.in_(list(classes))).all()
+                for user_id, class_name in class_rows:
+                    classes[user_id].append(class_name)
+            for user in users:
+                user["joined_classes"] = classes[user["id"]]
+            if "id" not in fields:
+                for user in users:
+                    user.pop("id")
+        return users, next_after_id
+
     # CRUD methods
     def create(self, inputs=None):
         """
@@ -372,12 +449,12 @@ class User(db.Model, UserMixin):
         """
         try:
             db.session.add(self)  # add prepares to persist person object to Users table
-            db.session.commit()  # SqlAlchemy "unit of work pattern" requires a manual commit
+            commit()  # SqlAlchemy "unit of work pattern" requires a manual commit
             if inputs:
                 self.update(inputs)
             return self
         except IntegrityError:
-            db.session.rollback()
+            rollback()
             return None
 
     def read(self):
@@ -429,9 +506,9 @@ class User(db.Model, UserMixin):
         self.set_email()
 
         try:
-            db.session.commit()
+            commit()
         except IntegrityError:
-            db.session.rollback()
+            rollback()
             return None
         return self
     
@@ -444,9 +521,9 @@ class User(db.Model, UserMixin):
         """
         try:
             db.session.delete(self)
-            db.session.commit()
+            commit()
         except IntegrityError:
-            db.session.rollback()
+            rollback()
         return None   
     
     def save_pfp(self, image_data, filename):
@@ -473,7 +550,7 @@ class User(db.Model, UserMixin):
         Deletes the user's profile picture from the user record.
         """
         self.pfp = None
-        db.session.commit()
+        commit()
         
     def set_uid(self, new_uid=None):
         """
@@ -491,7 +568,7 @@ class User(db.Model, UserMixin):
         if new_uid and new_uid != self._uid:
             self._uid = new_uid
             # Commit the UID change to the database
-            db.session.commit()
+            commit()
 
         # If the UID has changed, update the directory name
         if old_uid != self._uid:
@@ -500,6 +577,71 @@ class User(db.Model, UserMixin):
             if os.path.exists(old_path):
                 os.rename(old_path, new_path)
                 
+    @staticmethod
+    def bulk_create(rows, batch_size=500):
+        """
+        Inserts many users at once, the native path behind the bulk /api/users import.
+
+        Duplicate uids are rejected with a single IN query (plus a check within the rows
+        themselves), passwords are hashed in parallel across the password hashing pool, and rows
+        are inserted in batched transactions instead of one commit per user.
+
+        Args:
+            rows (list): Dictionaries with "name", "uid", "password" and optional "pfp" keys,
+                already validated by the caller.
+            batch_size (int): Number of users inserted per transaction.
+
+        Returns:
+            tuple: (created, errors) where created is the number of inserted users and errors is a
+                list of {"message": ...} dictionaries in the same format as the single user endpoint.
+        """
+        errors = []
+        uids = [row["uid"] for row in rows]
+        existing = set()
+        for i in range(0, len(uids), batch_size):
+            chunk = uids[i:i + batch_size]
+            existing.update(uid for (uid,) in db.session.query(User._uid).filter(User._uid.in_(chunk)))
+
+        accepted = []
+        for row in rows:
+            if row["uid"] in existing:
+                errors.append({'message': f'Processed {row["name"]}, either a format error or User ID {row["uid"]} is duplicate'})
+                continue
+            existing.add(row["uid"])
+            accepted.append(row)
+
+        passwords = [row.get("password") or app.config["DEFAULT_PASSWORD"] for row in accepted]
+        hashes = password_hasher.hash_many(passwords)
+
+        created = 0
+        for i in range(0, len(accepted), batch_size):
+            values = [{
+                "_name": row["name"],
+                "_uid": row["uid"],
+                "_email": "?",
+                "_password": password_hash,
+                "_role": "User",
+                "_pfp": row.get("pfp", "")
+            } for row, password_hash in zip(accepted[i:i + batch_size], hashes[i:i + batch_size])]
+            try:
+                db.session.execute(insert(User), values)
+                commit()
+                created += len(values)
+            except IntegrityError:
+                # A concurrent writer took one of the uids, fall back to row by row for this batch
+                rollback()
+                if in_unit_of_work():
+                    raise  # the unit is failed, rows inserted now would be rolled back with it
+                for value in values:
+                    try:
+                        db.session.execute(insert(User), [value])
+                        commit()
+                        created += 1
+                    except IntegrityError:
+                        rollback()
+                        errors.append({'message': f'Processed {value["_name"]}, either a format error or User ID {value["_uid"]} is duplicate'})
+        return created, errors
+
     @staticmethod
     def restore(data):
         users = {}
@@ -1,8 +1,135 @@
 from __init__ import db, app
+from model.unit_of_work import commit, rollback
+from sqlalchemy import event, case, delete, func, insert, inspect, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
 from model.post import Post
 from model.user import User
 
+
+def upsert(connection, table, values, update, index_elements):
+    """
+    Builds a single INSERT statement that updates the existing row on a key conflict.
+
+    Uses ON CONFLICT on SQLite and PostgreSQL and ON DUPLICATE KEY UPDATE on MySQL.
+
+    Args:
+        connection (Connection): The connection the statement will run on, used to pick the dialect.
+        table (Table): The target table.
+        values (dict): Column values for the insert.
+        update (dict): Column values (or expressions on the existing row) applied on conflict.
+        index_elements (list): Columns of the unique key that may conflict.
+
+    Returns:
+        Insert: The dialect specific upsert statement.
+    """
+    dialect = connection.dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        return mysql.insert(table).values(**values).on_duplicate_key_update(**update)
+    if dialect == 'postgresql':
+        return postgresql.insert(table).values(**values).on_conflict_do_update(index_elements=index_elements, set_=update)
+    return sqlite.insert(table).values(**values).on_conflict_do_update(index_elements=index_elements, set_=update)
+
+
+def insert_ignore(connection, table, values, index_elements):
+    """
+    Builds a single INSERT statement that does nothing on a key conflict, its rowcount tells
+    whether the row was inserted.
+
+    Uses ON CONFLICT DO NOTHING on SQLite and PostgreSQL and INSERT IGNORE on MySQL.
+    """
+    dialect = connection.dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        return mysql.insert(table).values(**values).prefix_with('IGNORE')
+    if dialect == 'postgresql':
+        return postgresql.insert(table).values(**values).on_conflict_do_nothing(index_elements=index_elements)
+    return sqlite.insert(table).values(**values).on_conflict_do_nothing(index_elements=index_elements)
+
+
+class PostVoteCount(db.Model):
+    """
+    PostVoteCount Model
+
+    Materialized up/down vote totals per post, kept in step with the votes table inside the same
+    transaction as every vote insert, switch and delete. Each write adds the change it made,
+    never a recount, so the cost of a vote does not grow with the votes on the post.
+
+    Attributes:
+        _post_id (db.Column): The post the counters belong to, also the primary key.
+        _upvote_count (db.Column): Number of upvotes on the post.
+        _downvote_count (db.Column): Number of downvotes on the post.
+    """
+    __tablename__ = 'post_vote_counts'
+
+    _post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), primary_key=True)
+    _upvote_count = db.Column(db.Integer, nullable=False, default=0)
+    _downvote_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def read(self):
+        """
+        Retrieve the counters as a dictionary.
+
+        Returns:
+            dict: Dictionary with the post id and vote counts.
+        """
+        return {
+            "post_id": self._post_id,
+            "upvote_count": self._upvote_count,
+            "downvote_count": self._downvote_count
+        }
+
+    @staticmethod
+    def read_many(post_ids):
+        """
+        Retrieve counters for many posts with one query, posts without votes report zeros.
+
+        Args:
+            post_ids (list): Post ids to look up.
+
+        Returns:
+            list: One dictionary per requested post id, in the requested order.
+        """
+        rows = PostVoteCount.query.filter(PostVoteCount._post_id.in_(post_ids)).all() if post_ids else []
+        counts = {row._post_id: row.read() for row in rows}
+        return [counts.get(post_id, {"post_id": post_id, "upvote_count": 0, "downvote_count": 0}) for post_id in post_ids]
+
+    @staticmethod
+    def adjust(connection, post_id, vote_type, delta):
+        """
+        Adds delta to one counter of a post on the given connection, creating the row if needed.
+        """
+        column = '_upvote_count' if vote_type == 'upvote' else '_downvote_count'
+        table = PostVoteCount.__table__
+        values = {'_post_id': post_id, '_upvote_count': 0, '_downvote_count': 0}
+        values[column] = max(delta, 0)
+        connection.execute(upsert(connection, table, values, {column: table.c[column] + delta}, ['_post_id']))
+
+    @staticmethod
+    def reconcile():
+        """
+        Recomputes every counter from the votes table, used to repair drift.
+
+        Returns:
+            int: Number of posts with counters after reconciliation.
+        """
+        totals = db.session.query(
+            Vote._post_id,
+            func.sum(case((Vote._vote_type == 'upvote', 1), else_=0)),
+            func.sum(case((Vote._vote_type == 'downvote', 1), else_=0))
+        ).group_by(Vote._post_id).all()
+        try:
+            PostVoteCount.query.delete()
+            if totals:
+                db.session.execute(insert(PostVoteCount), [
+                    {'_post_id': post_id, '_upvote_count': int(upvotes or 0), '_downvote_count': int(downvotes or 0)}
+                    for post_id, upvotes, downvotes in totals
+                ])
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        return len(totals)
+
 class Vote(db.Model):
     """
     Vote Model
@@ -16,6 +143,9 @@ class Vote(db.Model):
         _post_id (db.Column): An integer representing the ID of the post that received the vote.
     """
     __tablename__ = 'votes'
+    __table_args__ = (
+        db.Index('uq_votes_post_id_user_id', '_post_id', '_user_id', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     _vote_type = db.Column(db.String(10), nullable=False)  # "upvote" or "downvote"
@@ -41,9 +171,9 @@ class Vote(db.Model):
         """
         try:
             db.session.add(self)
-            db.session.commit()
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
 
     def read(self):
@@ -66,10 +196,129 @@ class Vote(db.Model):
         """
         try:
             db.session.delete(self)
-            db.session.commit()
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+
+    @staticmethod
+    def cast(user_id, post_id, vote_type, toggle=False):
+        """
+        Records a user's vote on a post on the (post, user) unique index, without reading the
+        vote first.
+
+        Every statement is a single row write whose rowcount says what it changed, and the
+        counters get exactly that change. The row lock the write takes orders concurrent votes by
+        the same user, the later one sees the row as the earlier one left it, so neither
+        duplicate rows nor lost counter updates are possible at any isolation level.
+
+        Args:
+            user_id (int): ID of the user voting.
+            post_id (int): ID of the post being voted on.
+            vote_type (str): "upvote" or "downvote".
+            toggle (bool): When True, sending the type already recorded removes the vote.
+
+        Returns:
+            str: The vote type now recorded, or None when a toggle removed the vote.
+        """
+        votes = Vote.__table__
+        key = (votes.c._post_id == post_id, votes.c._user_id == user_id)
+        other_type = 'downvote' if vote_type == 'upvote' else 'upvote'
+        try:
+            connection = db.session.connection()
+            removed = 0
+            if toggle:
+                removed = connection.execute(delete(votes).where(*key, votes.c._vote_type == vote_type)).rowcount
+                if removed:
+                    PostVoteCount.adjust(connection, post_id, vote_type, -1)
+            # A vote inserted by a concurrent request between the two statements is switched on the second pass
+            for _ in range(0 if removed else 2):
+                switched = connection.execute(
+                    update(votes).where(*key, votes.c._vote_type == other_type).values(_vote_type=vote_type)
+                ).rowcount
+                if switched:
+                    PostVoteCount.adjust(connection, post_id, other_type, -1)
+                    PostVoteCount.adjust(connection, post_id, vote_type, 1)
+                    break
+                values = {'_post_id': post_id, '_user_id': user_id, '_vote_type': vote_type}
+                if connection.execute(insert_ignore(connection, votes, values, ['_post_id', '_user_id'])).rowcount:
+                    PostVoteCount.adjust(connection, post_id, vote_type, 1)
+                    break
+            commit()
         except Exception as e:
-            db.session.rollback()
+            rollback()
             raise e
+        return None if removed else vote_type
+
+    @staticmethod
+    def retract(user_id, post_id):
+        """
+        Removes a user's vote on a post, one DELETE per vote type so each rowcount says which
+        counter to decrement.
+
+        Returns:
+            bool: True when a vote was removed.
+        """
+        votes = Vote.__table__
+        removed = 0
+        try:
+            connection = db.session.connection()
+            for vote_type in ('upvote', 'downvote'):
+                count = connection.execute(delete(votes).where(
+                    votes.c._post_id == post_id, votes.c._user_id == user_id, votes.c._vote_type == vote_type
+                )).rowcount
+                if count:
+                    PostVoteCount.adjust(connection, post_id, vote_type, -count)
+                    removed += count
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        return bool(removed)
+
+    @staticmethod
+    def remove_duplicates():
+        """
+        Keeps only the newest vote per (post, user), needed before the unique index can be
+        created on a database that predates it.
+
+        Returns:
+            int: Number of duplicate votes removed.
+        """
+        votes = Vote.__table__
+        newest = select(func.max(votes.c.id)).group_by(votes.c._post_id, votes.c._user_id)
+        # MySQL cannot delete from a table it selects from directly, wrap the ids in a derived table
+        keep = select(newest.subquery().c[0])
+        try:
+            removed = db.session.execute(delete(votes).where(votes.c.id.not_in(keep))).rowcount
+            commit()
+        except Exception as e:
+            rollback()
+            raise e
+        return removed
+
+@event.listens_for(Vote, 'after_insert')
+def _count_new_vote(mapper, connection, target):
+    PostVoteCount.adjust(connection, target._post_id, target._vote_type, 1)
+
+
+@event.listens_for(Vote, 'after_update')
+def _count_switched_vote(mapper, connection, target):
+    state = inspect(target)
+    vote_type = state.attrs._vote_type.history
+    post_id = state.attrs._post_id.history
+    if not vote_type.has_changes() and not post_id.has_changes():
+        return
+    old_type = vote_type.deleted[0] if vote_type.deleted else target._vote_type
+    old_post = post_id.deleted[0] if post_id.deleted else target._post_id
+    PostVoteCount.adjust(connection, old_post, old_type, -1)
+    PostVoteCount.adjust(connection, target._post_id, target._vote_type, 1)
+
+
+@event.listens_for(Vote, 'after_delete')
+def _count_removed_vote(mapper, connection, target):
+    PostVoteCount.adjust(connection, target._post_id, target._vote_type, -1)
+
 
 def initVotes():
     """
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+""" bench_deck_create.py
+Compares deck creation with one commit per flashcard (the old create_deck path) against
+Deck.create_with_cards, which writes the deck and all cards in one transaction.
+
+Benchmark decks are deleted afterwards.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_deck_create.py
+
+Or run from the root of the project:
+> scripts/bench_deck_create.py [sizes...]
+"""
+
+import io
+import sys
+import os
+import time
+from contextlib import redirect_stdout
+from sqlalchemy import event
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from model.deck import Deck
+from model.flashcard import Flashcard
+from model.user import User
+
+
+def per_card(user_id, cards):
+    deck = Deck(title='bench per-card', user_id=user_id)
+    deck.create()
+    for card in cards:
+        Flashcard(title=card['title'], content=card['content'], user_id=user_id, deck_id=deck.id).create()
+    return deck
+
+
+def bulk(user_id, cards):
+    deck, _ = Deck.create_with_cards('bench bulk', user_id, cards)
+    return deck
+
+
+def run(func, user_id, size):
+    """
+    Creates one deck of the given size and returns (seconds, commits), the deck is then deleted.
+    """
+    cards = [{'title': f'Question {i}', 'content': f'Answer {i}'} for i in range(size)]
+    commits = []
+    listener = lambda session: commits.append(1)
+    event.listen(db.session, 'after_commit', listener)
+    start = time.perf_counter()
+    deck = func(user_id, cards)
+    elapsed = time.perf_counter() - start
+    event.remove(db.session, 'after_commit', listener)
+    deck.delete()
+    return elapsed, len(commits)
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or [10, 100, 1000]
+    with app.app_context():
+        db.create_all()
+        user = User.query.first()
+        if user is None:
+            print("No users found, run the database init first")
+            return
+        for size in sizes:
+            for label, func in (('per-card', per_card), ('bulk', bulk)):
+                # Silence the per-card "Flashcard Created" prints of the old path
+                with redirect_stdout(io.StringIO()):
+                    elapsed, commits = run(func, user.id, size)
+                print(f"{label:>8} {size:>5} cards: {elapsed * 1000:9.1f} ms, {commits} commits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+""" bench_grade_projection.py
+Compares fitting grade trends per user, one grade_logs query and one numpy.polyfit per
+subject for every user, against GradeProjection.compute, which reads grade_logs once and
+fits every (user, subject) trend in one vectorized pass.
+
+Benchmark grade logs are deleted afterwards and the projections are recomputed.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_grade_projection.py
+
+Or run from the root of the project:
+> scripts/bench_grade_projection.py [rows]
+"""
+
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+import numpy as np
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from model.gradelog import GradeLog
+from model.projection import GradeProjection
+
+FIRST_USER_ID = 1000000  # benchmark rows use user ids far above the real ones
+SUBJECTS = ['Math', 'Science', 'History', 'English', 'Spanish']
+GRADES_PER_SUBJECT = 10
+
+
+def seed(rows):
+    """
+    Inserts rows grade logs spread over 10 grades per subject per user, without the model so
+    the analytics rollups are left alone.
+    """
+    rng = np.random.default_rng(0)
+    now = datetime.utcnow()
+    users = rows // (len(SUBJECTS) * GRADES_PER_SUBJECT)
+    records = []
+    for index in range(rows):
+        user_id = FIRST_USER_ID + index % users
+        records.append({
+            'user_id': user_id,
+            'subject': SUBJECTS[(index // users) % len(SUBJECTS)],
+            'grade': float(rng.uniform(50, 100)),
+            'notes': '',
+            'date': now - timedelta(days=int(rng.integers(0, 120)))
+        })
+    for start in range(0, len(records), 5000):
+        db.session.execute(GradeLog.__table__.insert(), records[start:start + 5000])
+    db.session.commit()
+    return users
+
+
+def per_user(users):
+    """
+    The on-demand approach, one query and one polyfit per subject for every user.
+    """
+    now = datetime.utcnow()
+    fitted = 0
+    for user_id in range(FIRST_USER_ID, FIRST_USER_ID + users):
+        logs = GradeLog.query.filter_by(user_id=user_id).all()
+        by_subject = {}
+        for log in logs:
+            by_subject.setdefault(log.subject, []).append(((log.date - now).days / 7.0, log.grade))
+        for points in by_subject.values():
+            x, y = np.array(points).T
+            if len(points) >= 2 and np.ptp(x) > 0:
+                np.polyfit(x, y, 1)
+            fitted += 1
+    return fitted
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with app.app_context():
+        db.create_all()
+        table = GradeLog.__table__
+        try:
+            users = seed(rows)
+            db.session.expire_all()
+
+            start = time.perf_counter()
+            fitted = per_user(users)
+            elapsed = time.perf_counter() - start
+            print(f"per-user   {rows} rows, {fitted} trends: {elapsed * 1000:9.1f} ms, {users} queries")
+
+            start = time.perf_counter()
+            fitted = GradeProjection.compute()
+            elapsed = time.perf_counter() - start
+            print(f"vectorized {rows} rows, {fitted} trends: {elapsed * 1000:9.1f} ms, 1 query")
+        finally:
+            db.session.rollback()
+            db.session.execute(table.delete().where(table.c.user_id >= FIRST_USER_ID))
+            db.session.commit()
+            GradeProjection.compute()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+""" bench_image_upload.py
+Compares the peak Python memory of one image upload handled the old way, the JSON body parsed
+whole, the base64 string decoded whole and written, against read_upload + save_upload, which
+decode and write the upload in UPLOAD_CHUNK_SIZE chunks, for JSON, raw and multipart bodies.
+
+Variants are made in another process and are not part of the measurement. Benchmark blobs
+are deleted afterwards.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_image_upload.py
+
+Or run from the root of the project:
+> scripts/bench_image_upload.py [megabytes...]
+"""
+
+import base64
+import io
+import json
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from PIL import Image
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from flask import request
+from api.image_file import read_upload
+from model.blob import Blob, blob_key
+from model.image import image_pipeline, save_upload
+from model.storage import storage
+
+
+def noise_png(megabytes):
+    """
+    Returns a PNG of random pixels, which does not compress, of about the given size.
+    """
+    side = int((megabytes * 1024 * 1024 / 3) ** 0.5)
+    pixels = np.random.default_rng(0).integers(0, 256, (side, side, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'PNG', compress_level=0)
+    return buffer.getvalue()
+
+
+def buffered():
+    """
+    The old path, request.json, then b64decode of the whole string, then one write.
+    """
+    image_data = base64.b64decode(request.json['pfp'])
+    with tempfile.NamedTemporaryFile() as img_file:
+        img_file.write(image_data)
+    return None
+
+
+def streamed():
+    chunks, _ = read_upload('pfp')
+    return save_upload(chunks)
+
+
+def measure(func, body, content_type):
+    """
+    Runs func in a request with the given body and returns (seconds, peak bytes, blob name).
+    """
+    ctx = app.test_request_context('/api/id/pfp', method='PUT', data=body, content_type=content_type)
+    with ctx:
+        tracemalloc.start()
+        start = time.perf_counter()
+        name = func()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak, name
+
+
+def main():
+    sizes = [float(size) for size in sys.argv[1:]] or [1, 4, 16]
+    # Uploads only, variants are made in the pool and measured separately
+    image_pipeline.submit = lambda name: None
+    # Larger bodies than production accepts show how each path grows with the upload
+    app.config['MAX_CONTENT_LENGTH'] = None
+    names = set()
+    with app.app_context():
+        db.create_all()
+        try:
+            for megabytes in sizes:
+                png = noise_png(megabytes)
+                encoded = base64.b64encode(png).decode()
+                json_body = json.dumps({'pfp': encoded}).encode()
+                boundary = 'benchboundary'
+                multipart = (
+                    f'--{boundary}\r\nContent-Disposition: form-data; name="pfp"; filename="bench.png"\r\n'
+                    f'Content-Type: image/png\r\n\r\n'
+                ).encode() + png + f'\r\n--{boundary}--\r\n'.encode()
+                cases = [
+                    ('buffered json', buffered, json_body, 'application/json'),
+                    ('streamed json', streamed, json_body, 'application/json'),
+                    ('streamed raw', streamed, png, 'image/png'),
+                    ('streamed multipart', streamed, multipart, f'multipart/form-data; boundary={boundary}'),
+                ]
+                print(f"{len(png) / 1048576:.1f} MB image, {len(json_body) / 1048576:.1f} MB JSON body")
+                for label, func, body, content_type in cases:
+                    elapsed, peak, name = measure(func, body, content_type)
+                    if name:
+                        names.add(name)
+                    print(f"  {label:20} peak {peak / 1048576:7.2f} MB  {elapsed * 1000:8.1f} ms")
+        finally:
+            for name in names:
+                storage.delete(blob_key(name))
+                Blob.query.filter_by(sha256=name[:64]).delete()
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+""" bench_user_import.py
+Compares the bulk user import of POST /api/users done the old way, every row replayed through
+the single user endpoint POST /api/user with one hash and one commit each, against
+User.bulk_create, which checks duplicates with one IN query, hashes across the password pool and
+inserts in batched transactions.
+
+Full cost pbkdf2 hashing dominates both paths, set PASSWORD_HASH_ITERATIONS=1000 to see the
+import overhead itself. Benchmark users are deleted afterwards.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./bench_user_import.py
+
+Or run from the root of the project:
+> PASSWORD_HASH_ITERATIONS=1000 scripts/bench_user_import.py [sizes...]
+"""
+
+import io
+import sys
+import os
+import time
+from contextlib import redirect_stdout
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from model.user import User
+
+UID_PREFIX = 'bench-import-'  # benchmark users are found and deleted by this prefix
+
+
+def rows(label, size):
+    return [{'name': f'Bench {i}', 'uid': f'{UID_PREFIX}{label}-{i}', 'password': app.config['DEFAULT_PASSWORD']}
+            for i in range(size)]
+
+
+def per_row(users):
+    """
+    The old path, one request to the single user endpoint per row.
+    """
+    created = 0
+    with app.test_client() as client:
+        for user in users:
+            created += client.post('/api/user', json=user).status_code == 200
+    return created
+
+
+def bulk(users):
+    created, _ = User.bulk_create(users)
+    return created
+
+
+def cleanup():
+    table = User.__table__
+    db.session.execute(table.delete().where(table.c._uid.like(f'{UID_PREFIX}%')))
+    db.session.commit()
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or [1000, 10000]
+    print(f"pbkdf2 iterations: {app.config['PASSWORD_HASH_ITERATIONS']}")
+    with app.app_context():
+        db.create_all()
+        try:
+            for size in sizes:
+                for label, func in (('per-row', per_row), ('bulk', bulk)):
+                    users = rows(label, size)
+                    # Silence the per-user prints of the old path
+                    with redirect_stdout(io.StringIO()):
+                        start = time.perf_counter()
+                        created = func(users)
+                        elapsed = time.perf_counter() - start
+                    print(f"{label:>7} {size:>6} users: {elapsed:8.2f} s, {created} created")
+                    cleanup()
+        finally:
+            db.session.rollback()
+            cleanup()
+
+
+if __name__ == "__main__":
+    main()
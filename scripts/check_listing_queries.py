@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+""" check_listing_queries.py
+Regression check for the listing serializers. Post.read_many, NestPost.read_many and
+Feedback.read_many resolve authors and channels, groups or posts for a whole listing at once, so
+serializing 500 rows must issue exactly as many queries as serializing 1. Exits with status 1
+when the query count grows with the listing.
+
+Benchmark rows are inserted directly, spread over the existing users, and deleted afterwards.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./check_listing_queries.py
+
+Or run from the root of the project:
+> scripts/check_listing_queries.py [rows]
+"""
+
+import sys
+import os
+from sqlalchemy import event, func
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from model.channel import Channel
+from model.feedback import Feedback
+from model.group import Group
+from model.nestPost import NestPost
+from model.post import Post
+from model.user import User
+
+MARKER = 'check-listing-queries'  # title and content of the inserted rows, used for cleanup
+
+
+def count_queries(callable_):
+    """
+    Runs callable_ and returns the number of SQL statements it sent.
+    """
+    statements = []
+    listener = lambda *args: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        callable_()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return len(statements)
+
+
+def seed(rows, user_ids):
+    """
+    Inserts rows posts, nest posts and feedbacks, returns the query of each model's rows.
+    """
+    channel_id = db.session.query(func.min(Channel.id)).scalar() or 1
+    group_id = db.session.query(func.min(Group.id)).scalar() or 1
+    db.session.execute(Post.__table__.insert(), [
+        {'_title': MARKER, '_comment': MARKER, '_content': {}, '_user_id': user_ids[i % len(user_ids)], '_channel_id': channel_id}
+        for i in range(rows)
+    ])
+    db.session.execute(NestPost.__table__.insert(), [
+        {'_title': MARKER, '_content': MARKER, '_user_id': user_ids[i % len(user_ids)], '_group_id': group_id, '_image_url': ''}
+        for i in range(rows)
+    ])
+    post_ids = [post_id for (post_id,) in db.session.query(Post.id).filter(Post._title == MARKER)]
+    db.session.execute(Feedback.__table__.insert(), [
+        {'_content': MARKER, '_user_id': user_ids[i % len(user_ids)], '_post_id': post_ids[i]}
+        for i in range(rows)
+    ])
+    db.session.commit()
+    return {
+        Post: Post.query.filter(Post._title == MARKER).order_by(Post.id),
+        NestPost: NestPost.query.filter(NestPost._title == MARKER).order_by(NestPost.id),
+        Feedback: Feedback.query.filter(Feedback._content == MARKER).order_by(Feedback.id),
+    }
+
+
+def cleanup():
+    db.session.rollback()
+    db.session.execute(Feedback.__table__.delete().where(Feedback.__table__.c._content == MARKER))
+    db.session.execute(NestPost.__table__.delete().where(NestPost.__table__.c._title == MARKER))
+    db.session.execute(Post.__table__.delete().where(Post.__table__.c._title == MARKER))
+    db.session.commit()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    failed = False
+    with app.app_context():
+        db.create_all()
+        user_ids = [user_id for (user_id,) in db.session.query(User.id)]
+        if not user_ids:
+            print("No users found, run the database init first")
+            sys.exit(1)
+        try:
+            queries = seed(rows, user_ids)
+            for model, query in queries.items():
+                counts = {}
+                for size in sorted({1, 10, rows}):
+                    records = query.limit(size).all()
+                    counts[size] = count_queries(lambda: model.read_many(records))
+                    db.session.expire_all()
+                constant = len(set(counts.values())) == 1
+                failed = failed or not constant
+                print(f"{model.__name__:>8}.read_many queries by rows: {counts} {'ok' if constant else 'FAILED, grows with rows'}")
+        finally:
+            cleanup()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+""" check_post_feed.py
+Checks the cursor feed of /api/posts/filter and /api/post/user. post_api is not registered by
+main.py, so this script registers it on the app itself, then pages through a channel and a user
+newest first and checks that every post comes back exactly once, in id order, and that SQLite
+serves the pages from the ix_posts_channel_id_id and ix_posts_user_id_id indexes. Exits with
+status 1 on a failure.
+
+Benchmark posts are inserted directly and deleted afterwards.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./check_post_feed.py
+
+Or run from the root of the project:
+> scripts/check_post_feed.py [posts] [page size]
+"""
+
+import sys
+import os
+import jwt
+from sqlalchemy import text
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from api.post import post_api
+from model.post import Post
+from model.user import User
+
+MARKER = 'check-post-feed'  # title of the inserted posts, used for cleanup
+CHANNEL_ID = 1000000  # a channel id far above the real ones, so the feed holds only inserted posts
+
+
+def walk(fetch):
+    """
+    Follows next_cursor from the first page to the last, returns the ids in the order served.
+    """
+    ids, cursor = [], None
+    while True:
+        page = fetch(cursor)
+        ids += [post['id'] for post in page['posts']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def plan(sql, **params):
+    """
+    Returns SQLite's query plan for a statement as one string, empty on other databases.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return ''
+    return ' '.join(str(row[-1]) for row in db.session.execute(text('EXPLAIN QUERY PLAN ' + sql), params))
+
+
+def check(label, ok, detail=''):
+    print(f"{label}: {'ok' if ok else 'FAILED'} {detail}")
+    return ok
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    if 'post_api' not in app.blueprints:
+        app.register_blueprint(post_api)
+    passed = True
+    with app.app_context():
+        db.create_all()
+        user = User.query.first()
+        if user is None:
+            print("No users found, run the database init first")
+            sys.exit(1)
+        table = Post.__table__
+        try:
+            db.session.execute(table.insert(), [
+                {'_title': MARKER, '_comment': MARKER, '_content': {}, '_user_id': user.id, '_channel_id': CHANNEL_ID}
+                for _ in range(rows)
+            ])
+            db.session.commit()
+            expected = sorted((post_id for (post_id,) in db.session.query(Post.id).filter(Post._title == MARKER)), reverse=True)
+
+            client = app.test_client()
+            # Signed the way /api/authenticate signs it, no password needed
+            client.set_cookie(app.config['JWT_TOKEN_NAME'], jwt.encode({'_uid': user.uid}, app.config['SECRET_KEY'], algorithm='HS256'))
+            channel_ids = walk(lambda cursor: client.post(
+                '/api/posts/filter', json={'channel_id': CHANNEL_ID, 'limit': limit, 'cursor': cursor}
+            ).get_json())
+            passed &= check('channel feed', channel_ids == expected, f"{len(channel_ids)} of {rows} posts, pages of {limit}")
+            user_ids = walk(lambda cursor: client.get(
+                '/api/post/user', query_string={'limit': limit, **({'cursor': cursor} if cursor else {})}
+            ).get_json())
+            mine = [post_id for post_id in user_ids if post_id in set(expected)]
+            passed &= check('user feed', mine == expected and user_ids == sorted(user_ids, reverse=True), f"{len(user_ids)} posts")
+            legacy = client.post('/api/posts/filter', json={'channel_id': CHANNEL_ID}).get_json()
+            passed &= check('unpaged response', isinstance(legacy, list) and len(legacy) == rows)
+            bad = client.post('/api/posts/filter', json={'channel_id': CHANNEL_ID, 'cursor': 'nope'})
+            passed &= check('bad cursor', bad.status_code == 400)
+
+            for index, column in (('ix_posts_channel_id_id', '_channel_id'), ('ix_posts_user_id_id', '_user_id')):
+                detail = plan(f'SELECT id FROM posts WHERE {column} = :value AND id < :cursor ORDER BY id DESC LIMIT 21',
+                              value=CHANNEL_ID, cursor=expected[0])
+                if detail:
+                    passed &= check(f'{index} plan', index in detail, detail)
+        finally:
+            db.session.rollback()
+            db.session.execute(table.delete().where(table.c._title == MARKER))
+            db.session.commit()
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+""" check_s3_storage.py
+Checks the s3 storage backend against an S3 API: put_file, exists, open, local_copy, move,
+delete and url on S3Storage, then an image upload through save_upload, with its variants made
+inline, and its removal by Blob.collect. Exits with status 1 on a failure.
+
+By default the bucket is moto's in-process S3, install it with requirements-dev.txt. With
+STORAGE_S3_ENDPOINT_URL set the checks run against that server instead, e.g. MinIO, with the
+usual AWS credential variables; STORAGE_S3_BUCKET is created if missing. Objects are written
+under the check-s3-storage/ prefix and deleted afterwards, with the blob row of the upload.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./check_s3_storage.py
+
+Or run from the root of the project:
+> scripts/check_s3_storage.py
+> STORAGE_S3_ENDPOINT_URL=http://localhost:9000 STORAGE_S3_BUCKET=uploads scripts/check_s3_storage.py
+"""
+
+import io
+import sys
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+PREFIX = 'check-s3-storage/'  # every object of the check is under this prefix, used for cleanup
+
+# The storage backend is chosen when the app is imported
+os.environ['STORAGE_BACKEND'] = 's3'
+os.environ['STORAGE_S3_PREFIX'] = PREFIX
+os.environ['IMAGE_PROCESS_WORKERS'] = '0'  # variants are made inline, in this process
+os.environ.setdefault('STORAGE_S3_BUCKET', 'check-s3-storage')
+if not os.environ.get('STORAGE_S3_ENDPOINT_URL'):
+    from moto import mock_aws
+    for name, value in (('AWS_ACCESS_KEY_ID', 'testing'), ('AWS_SECRET_ACCESS_KEY', 'testing'), ('AWS_DEFAULT_REGION', 'us-east-1')):
+        os.environ.setdefault(name, value)
+    mock_aws().start()
+
+import requests
+from botocore.exceptions import ClientError
+from PIL import Image
+from main import app, db
+from model.blob import Blob, blob_key
+from model.image import ImageVariant, save_upload
+from model.storage import storage
+
+
+def check(label, ok, detail=''):
+    print(f"{label}: {'ok' if ok else 'FAILED'} {detail}")
+    return ok
+
+
+def ensure_bucket(client):
+    try:
+        client.head_bucket(Bucket=storage.bucket)
+    except ClientError:
+        region = client.meta.region_name
+        location = {} if region in (None, 'us-east-1') else {'CreateBucketConfiguration': {'LocationConstraint': region}}
+        client.create_bucket(Bucket=storage.bucket, **location)
+
+
+def keys(client):
+    """
+    Returns the keys under PREFIX, without it.
+    """
+    pages = client.get_paginator('list_objects_v2').paginate(Bucket=storage.bucket, Prefix=PREFIX)
+    return [item['Key'][len(PREFIX):] for page in pages for item in page.get('Contents', [])]
+
+
+def check_objects(client):
+    passed = True
+    data = os.urandom(1024)
+    fd, local_path = tempfile.mkstemp()
+    with os.fdopen(fd, 'wb') as file:
+        file.write(data)
+
+    storage.put_file('probe/a.png', local_path)
+    head = client.head_object(Bucket=storage.bucket, Key=PREFIX + 'probe/a.png')
+    passed &= check('put_file', storage.exists('probe/a.png') and not os.path.exists(local_path),
+                    f"{head['ContentType']}, {head.get('CacheControl')}")
+    passed &= check('put_file headers', head['ContentType'] == 'image/png' and 'immutable' in (head.get('CacheControl') or ''))
+    with storage.open('probe/a.png') as body:
+        passed &= check('open', body.read() == data)
+    with storage.local_copy('probe/a.png') as path, open(path, 'rb') as file:
+        passed &= check('local_copy', file.read() == data)
+
+    moved = storage.move('probe/a.png', 'probe/b.png')
+    passed &= check('move', moved and not storage.exists('probe/a.png') and storage.exists('probe/b.png'))
+    passed &= check('move missing', storage.move('probe/missing.png', 'probe/c.png') is False)
+
+    url = storage.url('probe/b.png')
+    response = requests.get(url)
+    passed &= check('url', response.status_code == 200 and response.content == data, url.split('?')[0])
+    passed &= check('url reused', storage.url('probe/b.png') == url)
+
+    storage.delete('probe/b.png')
+    storage.delete('probe/missing.png')
+    passed &= check('delete', not storage.exists('probe/b.png'))
+    return passed
+
+
+def upload_image():
+    """
+    Stores a new image through save_upload, returns its blob name.
+    """
+    image = Image.new('RGB', (600, 400), tuple(random.randrange(256) for _ in range(3)))
+    upload = io.BytesIO()
+    image.save(upload, 'PNG')
+    return save_upload([upload.getvalue()])
+
+
+def check_collect(client, name):
+    passed = True
+    variants = [variant.key for variant in ImageVariant.query.filter_by(source=name)]
+    stored = [blob_key(name)] + variants
+    passed &= check('save_upload', bool(variants) and all(storage.exists(key) for key in stored), f"{len(variants)} variants")
+
+    # Nothing references the upload, date it back so only it falls before the cutoff
+    sha256 = name[:64]
+    db.session.execute(Blob.__table__.update().where(Blob.__table__.c.sha256 == sha256).values(stored_at=datetime(2000, 1, 1)))
+    db.session.commit()
+    removed, freed = Blob.collect(grace=timedelta(0), now=datetime(2000, 1, 2))
+    left = [key for key in keys(client) if sha256 in key]
+    passed &= check('collect', removed == 1 and not left and db.session.get(Blob, sha256) is None,
+                    f"{removed} removed, {freed} bytes, objects left {left}")
+    passed &= check('collect variants', ImageVariant.query.filter_by(source=name).first() is None)
+    return passed
+
+
+def cleanup(client, name):
+    db.session.rollback()
+    if name:
+        ImageVariant.query.filter_by(source=name).delete()
+        Blob.query.filter_by(sha256=name[:64]).delete()
+        db.session.commit()
+    for key in keys(client):
+        client.delete_object(Bucket=storage.bucket, Key=PREFIX + key)
+
+
+def main():
+    passed = True
+    name = None
+    with app.app_context():
+        db.create_all()
+        client = storage.client()
+        print(f"bucket: {storage.bucket} at {client.meta.endpoint_url}")
+        ensure_bucket(client)
+        try:
+            passed &= check_objects(client)
+            name = upload_image()
+            passed &= check_collect(client, name)
+        finally:
+            cleanup(client, name)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+""" check_vote_concurrency.py
+Fires votes at one post from many threads at once, each with its own session and connection,
+then checks the final state: at most one vote row per (post, user), and post_vote_counts equal
+to a recount of the votes table. Exits with status 1 on a mismatch.
+
+Three rounds run. In the first every thread casts the same vote for the same user, which must
+leave exactly one row and a count of one. In the second threads mix upvotes, downvotes, toggles
+and retractions for a few users, so many writes land on the same vote rows and counter row. In
+the last every thread votes once as its own user at the same moment, so the final writes to the
+counter row overlap, which is where a counter computed from a stale snapshot loses votes.
+
+SQLite runs one writer at a time, so it cannot show races between transactions. Run this
+against MySQL (DB_ENDPOINT, DB_USERNAME and DB_PASSWORD, see __init__.py) to exercise the
+row locks. The benchmark post, its votes and the users of the last round are deleted afterwards.
+
+Usage: Run from the terminal as such:
+
+Goto the scripts directory:
+> cd scripts; ./check_vote_concurrency.py
+
+Or run from the root of the project:
+> scripts/check_vote_concurrency.py [threads] [votes per thread]
+"""
+
+import random
+import sys
+import os
+import threading
+from sqlalchemy import case, func
+
+# Add the directory containing main.py to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app, db
+from model.channel import Channel
+from model.post import Post
+from model.user import User
+from model.vote import PostVoteCount, Vote
+
+MARKER = 'check-vote-concurrency'  # title of the inserted post and uid prefix of the inserted users, used for cleanup
+
+
+def run_threads(threads, work):
+    """
+    Starts every thread's work at the same moment and returns the errors raised.
+    """
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def target(index):
+        with app.app_context():
+            barrier.wait()
+            try:
+                work(index)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    workers = [threading.Thread(target=target, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return errors
+
+
+def state(post_id):
+    """
+    Returns (rows per user, recount, stored counters) of a post.
+    """
+    db.session.expire_all()
+    per_user = dict(db.session.query(Vote._user_id, func.count()).filter(Vote._post_id == post_id).group_by(Vote._user_id).all())
+    recount = db.session.query(
+        func.coalesce(func.sum(case((Vote._vote_type == 'upvote', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Vote._vote_type == 'downvote', 1), else_=0)), 0)
+    ).filter(Vote._post_id == post_id).one()
+    stored = PostVoteCount.read_many([post_id])[0]
+    return per_user, (int(recount[0]), int(recount[1])), (stored['upvote_count'], stored['downvote_count'])
+
+
+def check(label, post_id, errors, expected=None):
+    per_user, recount, stored = state(post_id)
+    ok = not errors and all(count == 1 for count in per_user.values()) and recount == stored
+    if expected is not None:
+        ok = ok and stored == expected
+    print(f"{label}: {'ok' if ok else 'FAILED'} rows per user {sorted(per_user.values())}, "
+          f"votes up/down {recount}, counters {stored}, errors {len(errors)}")
+    for error in errors[:3]:
+        print(f"  {type(error).__name__}: {error}")
+    return ok
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with app.app_context():
+        print(f"database: {db.engine.dialect.name}, {threads} threads, {per_thread} votes each")
+        db.create_all()
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id).limit(4)]
+        if not user_ids:
+            print("No users found, run the database init first")
+            sys.exit(1)
+        channel_id = db.session.query(func.min(Channel.id)).scalar() or 1
+        post = Post(title=MARKER, comment=MARKER, user_id=user_ids[0], channel_id=channel_id)
+        db.session.add(post)
+        db.session.commit()
+        post_id = post.id
+        passed = True
+        try:
+            # Round 1, a double click from every thread at once
+            errors = run_threads(threads, lambda index: Vote.cast(user_ids[0], post_id, 'upvote'))
+            passed &= check('same vote from every thread', post_id, errors, expected=(1, 0))
+
+            # Round 2, mixed writes from several users, threads share users so rows are contended
+            def mixed(index):
+                rng = random.Random(index)
+                user_id = user_ids[index % len(user_ids)]
+                for _ in range(per_thread):
+                    action = rng.random()
+                    vote_type = rng.choice(('upvote', 'downvote'))
+                    if action < 0.15:
+                        Vote.retract(user_id, post_id)
+                    else:
+                        Vote.cast(user_id, post_id, vote_type, toggle=action < 0.5)
+            errors = run_threads(threads, mixed)
+            passed &= check('mixed votes', post_id, errors)
+
+            # Round 3, one vote per new user, all at once
+            before = state(post_id)[2]
+            db.session.execute(User.__table__.insert(), [
+                {'_name': MARKER, '_uid': f'{MARKER}-{index}', '_email': '?', '_password': '', '_role': 'User', '_pfp': ''}
+                for index in range(threads)
+            ])
+            db.session.commit()
+            voters = [user_id for (user_id,) in db.session.query(User.id).filter(User._name == MARKER).order_by(User.id)]
+            errors = run_threads(threads, lambda index: Vote.cast(voters[index], post_id, ('upvote', 'downvote')[index % 2]))
+            expected = (before[0] + (threads + 1) // 2, before[1] + threads // 2)
+            passed &= check('one vote per user at once', post_id, errors, expected=expected)
+        finally:
+            db.session.rollback()
+            db.session.query(Vote).filter(Vote._post_id == post_id).delete()
+            db.session.query(PostVoteCount).filter(PostVoteCount._post_id == post_id).delete()
+            db.session.query(Post).filter(Post.id == post_id).delete()
+            db.session.query(User).filter(User._name == MARKER).delete()
+            db.session.commit()
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()